@@ -1,22 +1,20 @@
-﻿import requests
-from bs4 import BeautifulSoup
-import pyodbc
+﻿from bs4 import BeautifulSoup
 from datetime import datetime
+import storage
+import article_store
+import feed_discovery
+import story_index
+from metrics import metrics
+from fetch_middleware import ResilientFetcher
 
-# 1️⃣ SQL Server connection (update your server/database)
-conn = pyodbc.connect(
-    "DRIVER={ODBC Driver 17 for SQL Server};"
-    "SERVER=.;"
-    "DATABASE=NASolution;"
-    "UID=sa;"
-    "PWD=123456;"
-)
-cursor = conn.cursor()
+# 1️⃣ News database (opened on first query; SQL Server or local SQLite, see storage.py)
+news_db = storage.get_repository("NASolution")
 
 # 2️⃣ URL to scrape
 url = "https://www.businesstoday.in/tech-today/enterprise-tech"
-response = requests.get(url)
-soup = BeautifulSoup(response.text, "html.parser")
+feed_urls = ["https://www.businesstoday.in/rssfeeds/?id=home"]  # site-wide RSS, filtered to the section
+feed_path = "/tech-today/"
+fetcher = ResilientFetcher()
 
 # 3️⃣ Utility: generate SEO slug
 def generate_slug(title):
@@ -25,73 +23,125 @@ def generate_slug(title):
         slug = slug.replace(ch, '')
     return slug.strip("-")
 
-# 4️⃣ Find all article blocks
-articles = soup.find_all("div", class_="Section_widget_listing_body__f9Mee")
-print(f"Found {len(articles)} articles")
-
-for article in articles:
-    # Title + Link
-    a_tag = article.find("a", title=True)
-    if not a_tag:
-        continue
-    title = a_tag["title"].strip()
-    link = a_tag["href"]
-    if not link.startswith("http"):
-        link = "https://www.businesstoday.in" + link
-    slug = generate_slug(title)
-
-    # Image
-    img_tag = article.find("img")
-    image_url = img_tag["src"] if img_tag else None
-
-    # Description (first <p>)
-    desc_tag = article.find("p")
-    short_description = desc_tag.text.strip() if desc_tag else None
-
-    # Published Date (in <span>)
-    span_tag = article.find("span")
-    published_date = datetime.now()
-    if span_tag and span_tag.text.strip():
-        date_text = span_tag.text.replace("Updated :", "").strip()
-        try:
-            published_date = datetime.strptime(date_text, "%b %d, %Y")
-        except:
-            pass
-
-    # Skip duplicates
-    cursor.execute("SELECT COUNT(*) FROM Tbl_News WHERE Slug = ?", (slug,))
-    if cursor.fetchone()[0] > 0:
-        print(f"Skipping duplicate: {slug}")
-        continue
-
-    # Insert into Tbl_News
-    cursor.execute("""
-        INSERT INTO Tbl_News
-        (Title, Slug, ShortDescription, Content, Author, Category, Tags, ImageUrl,
-         MetaTitle, MetaDescription, MetaKeywords, PublishedDate, UpdatedDate, IsPublished, IsActive)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        title,
-        slug,
-        short_description,
-        short_description,
-        "Business Today",                    # Author
-        "Enterprise Tech",                   # Category
-        "ai, tech, enterprise, business",    # Tags
-        image_url,
-        title,                               # MetaTitle
-        short_description,                   # MetaDescription
-        "enterprise, ai, technology, 2025",  # MetaKeywords
-        published_date,
-        datetime.now(),
-        1,                                   # IsPublished
-        1                                    # IsActive
-    ))
-
-    print(f"Inserted: {title}")
-
-# 5️⃣ Commit and close
-conn.commit()
-cursor.close()
-conn.close()
-print("✅ Data inserted successfully!")
+# 4️⃣ New articles from the RSS feed; the HTML listing only if it is unavailable
+# (the feed <description> is the card text we store, so no article request either)
+def scrape_listing():
+    entries = feed_discovery.discover(feed_urls, fetcher, path_prefix=feed_path, scraper='business_today')
+    if entries is None:
+        return scrape_listing_page()
+    items = []
+    for entry in entries:
+        item = feed_discovery.entry_to_item(entry)
+        item['slug'] = generate_slug(item['title'])
+        item['published_date'] = item['published_date'] or datetime.now()
+        items.append(item)
+    return items
+
+# 4️⃣b Fallback: find all article blocks on the listing page
+def scrape_listing_page():
+    with metrics.timer('fetch', scraper='business_today'):
+        response = fetcher.get(url)
+    metrics.inc('bytes_fetched_total', len(response.content), scraper='business_today')
+    with metrics.timer('parse', scraper='business_today'):
+        soup = BeautifulSoup(response.text, "html.parser")
+
+    articles = soup.find_all("div", class_="Section_widget_listing_body__f9Mee")
+    print(f"Found {len(articles)} articles")
+
+    items = []
+    for article in articles:
+        # Title + Link
+        a_tag = article.find("a", title=True)
+        if not a_tag:
+            continue
+        title = a_tag["title"].strip()
+        link = a_tag["href"]
+        if not link.startswith("http"):
+            link = "https://www.businesstoday.in" + link
+        slug = generate_slug(title)
+
+        # Image
+        img_tag = article.find("img")
+        image_url = img_tag["src"] if img_tag else None
+
+        # Description (first <p>)
+        desc_tag = article.find("p")
+        short_description = desc_tag.text.strip() if desc_tag else None
+
+        # Published Date (in <span>)
+        span_tag = article.find("span")
+        published_date = datetime.now()
+        if span_tag and span_tag.text.strip():
+            date_text = span_tag.text.replace("Updated :", "").strip()
+            try:
+                published_date = datetime.strptime(date_text, "%b %d, %Y")
+            except:
+                pass
+
+        items.append({
+            'title': title, 'slug': slug, 'url': link, 'image_url': image_url,
+            'short_desc': short_description, 'published_date': published_date,
+        })
+    return items
+
+# Skip duplicates
+def is_duplicate_slug(slug):
+    with metrics.timer('dedupe', scraper='business_today'):
+        return news_db.news_slug_exists(slug)
+
+# Listing cards carry everything we store, so there is no article request
+def fetch_article(item):
+    return item['short_desc']
+
+# Insert into Tbl_News unless the slug is already there (returns True when a row was written)
+def insert_article(item, content):
+    if is_duplicate_slug(item['slug']):
+        metrics.inc('duplicates_skipped_total', scraper='business_today')
+        print(f"Skipping duplicate: {item['slug']}")
+        return False
+
+    with metrics.timer('db_write', scraper='business_today'):
+        news_db.insert_news({
+            'Title': item['title'],
+            'Slug': item['slug'],
+            'ShortDescription': item['short_desc'],
+            'Content': article_store.store_body('business_today', content),  # short card text stays inline
+            'Author': "Business Today",
+            'Category': "Enterprise Tech",
+            'Tags': "ai, tech, enterprise, business",
+            'ImageUrl': item['image_url'],
+            'MetaTitle': item['title'],
+            'MetaDescription': item['short_desc'],
+            'MetaKeywords': "enterprise, ai, technology, 2025",
+            'PublishedDate': item['published_date'],
+            'UpdatedDate': datetime.now(),
+            'IsPublished': 1,
+            'IsActive': 1,
+        })
+        news_db.commit()
+    article_store.train_pending()
+    metrics.inc('rows_saved_total', scraper='business_today')
+    return True
+
+# 5️⃣ Insert every card, committing each row
+def scrape_and_insert_news():
+    for item in scrape_listing():
+        # Same story already stored from another source: link it instead of storing it again
+        match = story_index.find_duplicate(item)
+        if match:
+            story_index.link_duplicate('business_today', item, match)
+            continue
+
+        if insert_article(item, fetch_article(item)):
+            story_index.remember_story('business_today', item)
+            print(f"Inserted: {item['title']}")
+
+
+if __name__ == "__main__":
+    scrape_and_insert_news()
+    story_index.save_story_index()
+    storage.close_all()
+    print("✅ Data inserted successfully!")
+
+    json_path, prom_path = metrics.export('business_today')
+    print(f"📈 Metrics written to {json_path} and {prom_path}")
@@ -1,76 +1,122 @@
 ﻿import requests
 from bs4 import BeautifulSoup
-import pyodbc
 from datetime import datetime
+import storage
+import article_extractor
+import article_store
+import feed_discovery
+import story_index
+from metrics import metrics
+from fetch_middleware import ResilientFetcher
 
-# === SQL Server Connection ===
-conn = pyodbc.connect(
-    "DRIVER={ODBC Driver 17 for SQL Server};"
-    "SERVER=.;"
-    "DATABASE=NASolution;"
-    "UID=sa;"
-    "PWD=123456;"
-)
-cursor = conn.cursor()
+# === News database (SQL Server or local SQLite, see storage.py; opened on first insert) ===
+news_db = storage.get_repository("NASolution")
 
 # === Base URL of news site ===
 base_url = "https://timesofindia.indiatimes.com"
-
-# === Request HTML page ===
 url = "https://timesofindia.indiatimes.com/tech"  # example listing page
-response = requests.get(url)
-soup = BeautifulSoup(response.text, 'html.parser')
+feed_urls = ["https://timesofindia.indiatimes.com/rssfeeds/66949542.cms"]  # RSS of the same section
+
+# === Shared fetcher: default timeout, retries and per-host circuit breaker ===
+fetcher = ResilientFetcher()
+
+# === New articles from the RSS feed; the HTML listing only if the feed is unavailable ===
+def scrape_listing():
+    entries = feed_discovery.discover(feed_urls, fetcher, scraper='indian_express')
+    if entries is None:
+        return scrape_listing_page()
+    return [feed_discovery.entry_to_item(entry) for entry in entries]
+
+# === Request HTML page and collect article cards ===
+def scrape_listing_page():
+    with metrics.timer('fetch', scraper='indian_express'):
+        response = fetcher.get(url)
+    metrics.inc('bytes_fetched_total', len(response.content), scraper='indian_express')
+    with metrics.timer('parse', scraper='indian_express'):
+        soup = BeautifulSoup(response.text, 'html.parser')
+
+    items = []
+    for article in soup.select("div.story-box.clearfix"):
+        title_tag = article.select_one("h4 a")
+        if not title_tag:
+            continue
+
+        title = title_tag.text.strip()
+        slug = title_tag['href']
+        full_url = base_url + slug
+
+        img_tag = article.select_one("div.image img")
+        image_url = img_tag['src'] if img_tag else None
+
+        desc_tag = article.select_one("p")
+        short_desc = desc_tag.text.strip() if desc_tag else None
+
+        time_tag = article.select_one("time")
+        published_date = None
+        if time_tag and time_tag.has_attr("datetime"):
+            published_date = datetime.strptime(time_tag["datetime"], "%b %d, %Y, %I:%M %p IST")
+
+        items.append({
+            'title': title, 'slug': slug, 'url': full_url, 'image_url': image_url,
+            'short_desc': short_desc, 'published_date': published_date,
+        })
+    return items
+
+# === Fetch full article content ===
+def fetch_article(item):
+    full_url = item['url']
+    with metrics.timer('fetch', scraper='indian_express'):
+        full_response = fetcher.get(full_url)
+    full_response.raise_for_status()
+    metrics.inc('bytes_fetched_total', len(full_response.content), scraper='indian_express')
+    with metrics.timer('parse', scraper='indian_express'):
+        return article_extractor.extract_article(full_response.text, full_url)["body"]
+
+# === Insert into SQL (returns True when a row was written) ===
+def insert_article(item, full_description):
+    with metrics.timer('db_write', scraper='indian_express'):
+        news_db.insert_news({
+            'Title': item['title'],
+            'Slug': item['slug'],
+            'ShortDescription': item['short_desc'],
+            'FullDescription': article_store.store_body('indian_express', full_description),  # compressed off-row, reference kept here
+            'ImageUrl': item['image_url'],
+            'Category': 'IT',  # or another category
+            'PublishedDate': item['published_date'],
+            'IsPublished': 1,
+            'IsActive': 1,
+        })
+        news_db.commit()
+    article_store.train_pending()
+    metrics.inc('rows_saved_total', scraper='indian_express')
+    return True
 
 # === Loop through news articles ===
-articles = soup.select("div.story-box.clearfix")
-
-for article in articles:
-    title_tag = article.select_one("h4 a")
-    if not title_tag:
-        continue
-
-    title = title_tag.text.strip()
-    slug = title_tag['href']
-    full_url = base_url + slug
-
-    img_tag = article.select_one("div.image img")
-    image_url = img_tag['src'] if img_tag else None
-
-    desc_tag = article.select_one("p")
-    short_desc = desc_tag.text.strip() if desc_tag else None
-
-    time_tag = article.select_one("time")
-    published_date = None
-    if time_tag and time_tag.has_attr("datetime"):
-        published_date = datetime.strptime(time_tag["datetime"], "%b %d, %Y, %I:%M %p IST")
-
-    # === Fetch full article content ===
-    full_response = requests.get(full_url)
-    full_soup = BeautifulSoup(full_response.text, 'html.parser')
-    full_content_tag = full_soup.find("div", {"class": "Normal"})
-    full_description = ""
-    if full_content_tag:
-        full_description = full_content_tag.get_text(separator="\n").strip()
-
-    # === Insert into SQL ===
-    cursor.execute("""
-        INSERT INTO Tbl_News
-        (Title, Slug, ShortDescription, FullDescription, ImageUrl, Category, PublishedDate, IsPublished, IsActive)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        title,
-        slug,
-        short_desc,
-        full_description,
-        image_url,
-        'IT',  # or another category
-        published_date,
-        1,
-        1
-    ))
-
-    conn.commit()
-    print(f"Inserted: {title}")
-
-conn.close()
-print("✅ All news inserted successfully.")
+def scrape_and_insert_news():
+    for item in scrape_listing():
+        # Same story already stored from another source: link it instead of fetching it again
+        match = story_index.find_duplicate(item)
+        if match:
+            story_index.link_duplicate('indian_express', item, match)
+            continue
+
+        try:
+            full_description = fetch_article(item)
+        except requests.RequestException as e:
+            metrics.inc('fetch_errors_total', scraper='indian_express')
+            print(f"⚠️ Skipping {item['url']}: {e}")
+            continue
+
+        insert_article(item, full_description)
+        story_index.remember_story('indian_express', item)
+        print(f"Inserted: {item['title']}")
+
+
+if __name__ == "__main__":
+    scrape_and_insert_news()
+    story_index.save_story_index()
+    storage.close_all()
+    print("✅ All news inserted successfully.")
+
+    json_path, prom_path = metrics.export('indian_express')
+    print(f"📈 Metrics written to {json_path} and {prom_path}")
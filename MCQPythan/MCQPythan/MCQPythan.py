@@ -1,31 +1,42 @@
 ﻿import time
-import pyodbc
 from urllib.parse import urlparse
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+import storage
+from near_duplicate import NearDuplicateIndex
+from metrics import metrics
 
 # ==============================
 # Database Connection
 # ==============================
-conn = pyodbc.connect(
-    "DRIVER={ODBC Driver 17 for SQL Server};"
-    "SERVER=.;"
-    "DATABASE=MCQ;"
-    "UID=sa;"
-    "PWD=123456;"
-)
-cursor = conn.cursor()
+# Opened on first insert, not at import (SQL Server or local SQLite, see storage.py)
+mcq_db = storage.get_repository("MCQ")
+
+# Shared with the SCC scraper so the same question from another site is caught
+_dedupe_index = None
+
+def get_dedupe_index():
+    """Load the near-duplicate index on first use"""
+    global _dedupe_index
+    if _dedupe_index is None:
+        _dedupe_index = NearDuplicateIndex.load()
+    return _dedupe_index
 
 def insert_question(category, question, optionA, optionB, optionC, optionD, answer):
-    cursor.execute("""
-        INSERT INTO SSC_MCQ_Questions (Categoery, Question, OptionA, OptionB, OptionC, OptionD, Answer)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (category, question, optionA, optionB, optionC, optionD, answer))
-    conn.commit()
+    with metrics.timer('dedupe', scraper='gktoday'):
+        duplicate_of = get_dedupe_index().query(f"{question} {answer or ''}")
+    if duplicate_of is not None:
+        metrics.inc('duplicates_skipped_total', scraper='gktoday')
+        print(f"⏭️ Near-duplicate of {duplicate_of}, skipped: {question[:60]}...")
+        return False
+
+    with metrics.timer('db_write', scraper='gktoday'):
+        mcq_db.insert_mcq({
+            'Categoery': category, 'Question': question,
+            'OptionA': optionA, 'OptionB': optionB, 'OptionC': optionC, 'OptionD': optionD, 'Answer': answer,
+        })
+        mcq_db.commit()
+    metrics.inc('rows_saved_total', scraper='gktoday')
+    get_dedupe_index().add(f"mcq:{category}:{question[:40]}", f"{question} {answer or ''}")
+    return True
 
 def get_category_from_url(url: str) -> str:
     """Extract a readable category name from the URL."""
@@ -40,21 +51,32 @@ def get_category_from_url(url: str) -> str:
 # Scraper for a single quiz section
 # ==============================
 def scrape_section(start_url):
+    # Selenium is only imported when a browser is actually needed
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from webdriver_manager.chrome import ChromeDriverManager
+
     category_name = get_category_from_url(start_url)
     print(f"\n📌 Starting category: {category_name}")
 
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service)
-    driver.get(start_url)
+    with metrics.timer('fetch', scraper='gktoday'):
+        driver.get(start_url)
+    metrics.inc('pages_fetched_total', scraper='gktoday')
 
     page_num = 1
     while True:
         print(f"\n📄 Scraping {category_name} | Page {page_num}")
 
         try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.wp_quiz_question.testclass"))
-            )
+            with metrics.timer('render_wait', scraper='gktoday'):
+                WebDriverWait(driver, 15).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.wp_quiz_question.testclass"))
+                )
         except:
             print(f"⚠️ No questions found on {category_name}.")
             break
@@ -64,40 +86,43 @@ def scrape_section(start_url):
             break
 
         for q in questions:
-            # ---- QUESTION TEXT ----
-            try:
-                question_number = q.find_element(By.CSS_SELECTOR, "span.quesno").text.strip()
-            except:
-                question_number = ""
-            question_text = q.text.replace(question_number, "").strip()
-
-            # ---- OPTIONS ----
-            options_container = q.find_element(
-                By.XPATH, "following-sibling::div[contains(@class,'wp_quiz_question_options')]"
-            )
-            options_text = options_container.get_attribute("innerText").strip().split("\n")
-            optionA = options_text[0] if len(options_text) > 0 else None
-            optionB = options_text[1] if len(options_text) > 1 else None
-            optionC = options_text[2] if len(options_text) > 2 else None
-            optionD = options_text[3] if len(options_text) > 3 else None
-
-            # ---- ANSWER ----
-            try:
-                answer_div = q.find_element(
-                    By.XPATH, "following-sibling::div[contains(@class,'ques_answer')]"
+            with metrics.timer('parse', scraper='gktoday'):
+                # ---- QUESTION TEXT ----
+                try:
+                    question_number = q.find_element(By.CSS_SELECTOR, "span.quesno").text.strip()
+                except:
+                    question_number = ""
+                question_text = q.text.replace(question_number, "").strip()
+
+                # ---- OPTIONS ----
+                options_container = q.find_element(
+                    By.XPATH, "following-sibling::div[contains(@class,'wp_quiz_question_options')]"
                 )
-                answer = answer_div.get_attribute("innerText").strip()
-            except:
-                answer = None
-
-            insert_question(category_name, question_text, optionA, optionB, optionC, optionD, answer)
-            print(f"✅ [{category_name}] Inserted: {question_text[:60]}...")
+                options_text = options_container.get_attribute("innerText").strip().split("\n")
+                optionA = options_text[0] if len(options_text) > 0 else None
+                optionB = options_text[1] if len(options_text) > 1 else None
+                optionC = options_text[2] if len(options_text) > 2 else None
+                optionD = options_text[3] if len(options_text) > 3 else None
+
+                # ---- ANSWER ----
+                try:
+                    answer_div = q.find_element(
+                        By.XPATH, "following-sibling::div[contains(@class,'ques_answer')]"
+                    )
+                    answer = answer_div.get_attribute("innerText").strip()
+                except:
+                    answer = None
+
+            if insert_question(category_name, question_text, optionA, optionB, optionC, optionD, answer):
+                print(f"✅ [{category_name}] Inserted: {question_text[:60]}...")
 
         # ---- NEXT PAGE ----
         try:
             next_link = driver.find_element(By.CSS_SELECTOR, "a.nextpostslink")
             next_url = next_link.get_attribute("href")
-            driver.get(next_url)
+            with metrics.timer('fetch', scraper='gktoday'):
+                driver.get(next_url)
+            metrics.inc('pages_fetched_total', scraper='gktoday')
             page_num += 1
             time.sleep(2)
         except:
@@ -132,8 +157,13 @@ urls = [
 # Run Scraper
 # ==============================
 if __name__ == "__main__":
+    metrics.maybe_start_http_server()
+
     for url in urls:
         scrape_section(url)
 
-    cursor.close()
-    conn.close()
+    if _dedupe_index is not None:
+        _dedupe_index.save()
+    json_path, prom_path = metrics.export('gktoday')
+    print(f"📈 Metrics written to {json_path} and {prom_path}")
+    storage.close_all()
@@ -1,9 +1,14 @@
 ﻿import requests
 from bs4 import BeautifulSoup
-import pyodbc
 import time
 from datetime import datetime
-import re
+import storage
+import article_extractor
+import article_store
+import feed_discovery
+import story_index
+from metrics import metrics
+from fetch_middleware import ResilientFetcher, HostUnavailableError
 
 # ==========================================
 # CONFIGURATION
@@ -11,16 +16,14 @@ import re
 
 BASE_URL = "https://economictimes.indiatimes.com"
 MAIN_URL = "https://economictimes.indiatimes.com/tech/it/articlelist/78570530.cms?from=mdr"
+# RSS of the same list: a few KB per poll instead of the full listing page
+FEED_URLS = ["https://economictimes.indiatimes.com/tech/it/rssfeeds/78570530.cms"]
 
-# SQL SERVER CONNECTION (UPDATE THIS)
-CONN = pyodbc.connect(
-    "DRIVER={ODBC Driver 17 for SQL Server};"
-    "SERVER=.;"
-    "DATABASE=NASolution;"
-    "UID=sa;"
-    "PWD=123456;"
-)
-CURSOR = CONN.cursor()
+# NEWS DATABASE (opened on first query; SQL Server or local SQLite, see storage.py)
+NEWS_DB = storage.get_repository("NASolution")
+
+# Retries, per-host circuit breaker and cached permanent failures
+FETCHER = ResilientFetcher(headers={"User-Agent": "Mozilla/5.0"})
 
 
 # ==========================================
@@ -28,64 +31,43 @@ CURSOR = CONN.cursor()
 # ==========================================
 
 def clean_text(text: str) -> str:
-    """Remove junk lines like 'Catch all the Technology News...' etc."""
+    """Remove junk lines like 'Catch all the Technology News...' etc. (rules in article_boilerplate.json)"""
     if not text:
         return ""
-
-    # Remove boilerplate lines
-    text = re.sub(r"\(Catch all.*?Economic Times\.\).*?(\.\.\.|more)?", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"\b(ETtech|AI Investments|Precedents Increasingly Regular)\b", "", text, flags=re.IGNORECASE)
-
-    # Remove extra whitespace
-    text = re.sub(r"\s{2,}", " ", text).strip()
-    return text
+    return article_extractor.rules_for(BASE_URL).clean(text)
 
 
 def get_full_article(url):
     """Scrape the full article page and return complete description, author, and meta info."""
     try:
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=15)
+        with metrics.timer('fetch', scraper='times_of_india', page='article'):
+            response = FETCHER.get(url, timeout=15)
+        metrics.inc('bytes_fetched_total', len(response.content), scraper='times_of_india')
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # --- Full content from article body ---
-        content_div = soup.find("div", class_=re.compile(r'contentDivWrapper'))
-        full_text = ""
-        if content_div:
-            # Extract all text including <p>, <strong>, and <br>
-            paragraphs = []
-            for elem in content_div.descendants:
-                if elem.name in ["p", "strong"]:
-                    paragraphs.append(elem.get_text(" ", strip=True))
-                elif isinstance(elem, str):
-                    text = elem.strip()
-                    if text:
-                        paragraphs.append(text)
-            full_text = "\n".join(paragraphs)
-            full_text = clean_text(full_text)
-
-        # --- Author ---
-        author_tag = soup.select_one("span.authDetail a, div.author")
-        author = author_tag.get_text(strip=True) if author_tag else None
-
-        # --- Meta Info ---
-        meta_title = soup.title.string.strip() if soup.title else ""
-        meta_desc_tag = soup.find("meta", {"name": "description"})
-        meta_key_tag = soup.find("meta", {"name": "keywords"})
-        meta_desc = meta_desc_tag["content"].strip() if meta_desc_tag else ""
-        meta_keys = meta_key_tag["content"].strip() if meta_key_tag else ""
+        # --- Body blocks, author and meta info in one pass ---
+        with metrics.timer('parse', scraper='times_of_india', page='article'):
+            article = article_extractor.extract_article(response.text, url)
 
         return {
-            "FullDescription": full_text,
-            "Author": author,
-            "MetaTitle": meta_title,
-            "MetaDescription": meta_desc,
-            "MetaKeywords": meta_keys
+            "FullDescription": article["body"],
+            "Author": article["author"],
+            "MetaTitle": article["title"],
+            "MetaDescription": article["meta"].get("description", ""),
+            "MetaKeywords": article["meta"].get("keywords", "")
         }
 
+    except HostUnavailableError as e:
+        metrics.inc('fetch_errors_total', scraper='times_of_india', kind='skipped')
+        print(f"⏭️ {e}")
+        return None
+    except requests.RequestException as e:
+        metrics.inc('fetch_errors_total', scraper='times_of_india', kind='network')
+        print(f"⚠️ Network error fetching full article {url}: {e}")
+        return None
     except Exception as e:
-        print(f"⚠️ Error scraping full article: {e}")
+        metrics.inc('fetch_errors_total', scraper='times_of_india', kind='parse')
+        print(f"⚠️ Error parsing full article {url}: {e}")
         return None
 
 
@@ -93,72 +75,115 @@ def get_full_article(url):
 # SCRAPE MAIN PAGE
 # ==========================================
 
-def scrape_and_insert_news():
-    """Scrape main list and insert full data into SQL Server."""
-    res = requests.get(MAIN_URL, headers={"User-Agent": "Mozilla/5.0"})
+def scrape_listing():
+    """New articles from the RSS feed, or from the main list page if no feed can be read"""
+    entries = feed_discovery.discover(FEED_URLS, FETCHER, scraper='times_of_india')
+    if entries is None:
+        return scrape_listing_page()
+    return [feed_discovery.entry_to_item(entry) for entry in entries]
+
+
+def scrape_listing_page():
+    """Article cards on the main list page (empty if the page cannot be read)"""
+    try:
+        with metrics.timer('fetch', scraper='times_of_india', page='listing'):
+            res = FETCHER.get(MAIN_URL)
+    except requests.RequestException as e:
+        print(f"❌ Failed to open main page: {e}")
+        return []
+    metrics.inc('bytes_fetched_total', len(res.content), scraper='times_of_india')
     if res.status_code != 200:
         print("❌ Failed to open main page")
-        return
+        return []
 
-    soup = BeautifulSoup(res.text, "html.parser")
+    with metrics.timer('parse', scraper='times_of_india', page='listing'):
+        soup = BeautifulSoup(res.text, "html.parser")
     articles = soup.select("div.story-box.clearfix")
     print(f"🔍 Found {len(articles)} articles")
 
-    for idx, article in enumerate(articles, start=1):
-        try:
-            a_tag = article.select_one("h4 a")
-            if not a_tag:
-                continue
+    items = []
+    for article in articles:
+        a_tag = article.select_one("h4 a")
+        if not a_tag:
+            continue
 
-            title = a_tag.get_text(strip=True)
-            slug = a_tag["href"]
-            url = slug if slug.startswith("http") else BASE_URL + slug
+        title = a_tag.get_text(strip=True)
+        slug = a_tag["href"]
+        url = slug if slug.startswith("http") else BASE_URL + slug
 
-            desc_tag = article.select_one("p")
-            short_desc = desc_tag.get_text(strip=True) if desc_tag else ""
+        desc_tag = article.select_one("p")
+        short_desc = desc_tag.get_text(strip=True) if desc_tag else ""
 
-            img_tag = article.select_one("div.image img")
-            image_url = img_tag.get("data-src") or img_tag.get("src") if img_tag else None
+        img_tag = article.select_one("div.image img")
+        image_url = img_tag.get("data-src") or img_tag.get("src") if img_tag else None
 
-            time_tag = article.select_one("time")
-            published_date = time_tag.get("datetime") if time_tag else None
+        time_tag = article.select_one("time")
+        published_date = time_tag.get("datetime") if time_tag else None
 
-            # Fetch full description
-            full_article = get_full_article(url)
-            if not full_article:
+        items.append({
+            "title": title, "slug": slug, "url": url, "short_desc": short_desc,
+            "image_url": image_url, "published_date": published_date,
+        })
+    return items
+
+
+def fetch_article(item):
+    """Full article for a listing card, or None if it failed or has no text"""
+    full_article = get_full_article(item["url"])
+    if not full_article:
+        return None
+
+    # Skip if full text is empty
+    if not full_article["FullDescription"].strip():
+        print(f"⚠️ Skipping empty article: {item['title']}")
+        return None
+    return full_article
+
+
+def insert_article(item, full_article):
+    """Insert one article into Tbl_News (returns True when a row was written)"""
+    with metrics.timer('db_write', scraper='times_of_india'):
+        NEWS_DB.insert_news({
+            "Title": item["title"],
+            "Slug": item["slug"],
+            "ShortDescription": item["short_desc"],
+            "FullDescription": article_store.store_body("times_of_india", full_article["FullDescription"]),  # compressed off-row
+            "Author": full_article["Author"],
+            "Category": "IT",
+            "ImageUrl": item["image_url"],
+            "MetaTitle": full_article["MetaTitle"],
+            "MetaDescription": full_article["MetaDescription"],
+            "MetaKeywords": full_article["MetaKeywords"],
+            "PublishedDate": item["published_date"],
+            "UpdatedDate": datetime.now(),
+            "IsPublished": 1,
+            "IsActive": 1,
+        })
+        NEWS_DB.commit()
+    article_store.train_pending()
+    metrics.inc('rows_saved_total', scraper='times_of_india')
+    return True
+
+
+def scrape_and_insert_news():
+    """Scrape main list and insert full data into SQL Server."""
+    for idx, item in enumerate(scrape_listing(), start=1):
+        try:
+            # Same story already stored from another source: link it instead of fetching it again
+            match = story_index.find_duplicate(item)
+            if match:
+                story_index.link_duplicate('times_of_india', item, match)
                 continue
 
-            # Skip if full text is empty
-            if not full_article["FullDescription"].strip():
-                print(f"⚠️ Skipping empty article: {title}")
+            # Fetch full description
+            full_article = fetch_article(item)
+            if not full_article:
                 continue
 
             # Insert into database
-            CURSOR.execute("""
-                INSERT INTO Tbl_News
-                (Title, Slug, ShortDescription, FullDescription, Author, Category,
-                 ImageUrl, MetaTitle, MetaDescription, MetaKeywords,
-                 PublishedDate, UpdatedDate, IsPublished, IsActive)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                title,
-                slug,
-                short_desc,
-                full_article["FullDescription"],
-                full_article["Author"],
-                "IT",
-                image_url,
-                full_article["MetaTitle"],
-                full_article["MetaDescription"],
-                full_article["MetaKeywords"],
-                published_date,
-                datetime.now(),
-                1,
-                1
-            ))
-            CONN.commit()
-
-            print(f"✅ Inserted [{idx}] {title}")
+            insert_article(item, full_article)
+            story_index.remember_story('times_of_india', item)
+            print(f"✅ Inserted [{idx}] {item['title']}")
 
             time.sleep(1)  # delay to avoid being blocked
 
@@ -172,5 +197,10 @@ def scrape_and_insert_news():
 # RUN SCRIPT
 # ==========================================
 if __name__ == "__main__":
+    metrics.maybe_start_http_server()
     scrape_and_insert_news()
-    CONN.close()
+    story_index.save_story_index()
+    storage.close_all()
+
+    json_path, prom_path = metrics.export('times_of_india')
+    print(f"📈 Metrics written to {json_path} and {prom_path}")
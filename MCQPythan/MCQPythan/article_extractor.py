@@ -0,0 +1,229 @@
+﻿# article_extractor.py - Single-pass article body extraction with per-source boilerplate rules
+import json
+import os
+import re
+import urllib.parse
+from html.parser import HTMLParser
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'article_boilerplate.json')
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_WHITESPACE = re.compile(r"\s+")
+
+# ==================== RULES ====================
+def _combine(patterns):
+    """Compile a list of regexes into one alternation so each text is scanned once"""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+
+class ExtractionRules:
+    """Where a source keeps its article body and which boilerplate to remove from it"""
+
+    def __init__(self, container=None, block_tags=(), skip_tags=(), author=(), strip=(), drop_blocks=()):
+        self.container_tag = container["tag"] if container else None
+        self.container_class = re.compile(container["class"]) if container and container.get("class") else None
+        self.block_tags = frozenset(block_tags)
+        self.skip_tags = frozenset(skip_tags)
+        self.author_rules = [(rule["tag"], re.compile(rule["class"]) if rule.get("class") else None, rule.get("child"))
+                             for rule in author]
+        self.strip_pattern = _combine(strip)
+        self.drop_pattern = _combine(drop_blocks)
+
+    def is_container(self, tag, attrs):
+        if tag != self.container_tag:
+            return False
+        return self.container_class is None or bool(self.container_class.search(attrs.get("class") or ""))
+
+    def clean(self, text):
+        """Strip boilerplate phrases and collapse whitespace; '' if the block is boilerplate"""
+        if self.strip_pattern is not None:
+            text = self.strip_pattern.sub("", text)
+        text = _WHITESPACE.sub(" ", text).strip()
+        if text and self.drop_pattern is not None and self.drop_pattern.search(text):
+            return ""
+        return text
+
+_rules_cache = {}
+
+def load_rules(path=None):
+    """{host: ExtractionRules} from the JSON config, with '' holding the defaults (cached per path)"""
+    path = path or DEFAULT_RULES_PATH
+    if path not in _rules_cache:
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        default = config.get("default", {})
+        rules = {"": ExtractionRules(**default)}
+        for host, source in config.get("sources", {}).items():
+            rules[host.lower()] = ExtractionRules(**{**default, **source})
+        _rules_cache[path] = rules
+    return _rules_cache[path]
+
+def rules_for(url, path=None):
+    """Rules for the URL's host (or a parent domain of it), else the defaults"""
+    rules = load_rules(path)
+    host = urllib.parse.urlparse(url).netloc.lower() if url else ""
+    while host:
+        if host in rules:
+            return rules[host]
+        host = host.partition(".")[2]
+    return rules[""]
+
+# ==================== EXTRACTOR ====================
+class ArticleExtractor(HTMLParser):
+    """
+    Streaming extractor: one pass over the HTML with no tree built.
+
+    Text inside the body container is buffered until the next block boundary
+    (p, div, br, li, ...) and then emitted once as a cleaned block, so nested
+    inline tags like <strong> or <a> never duplicate text. Title, meta
+    description/keywords and the author are picked up on the same pass.
+    """
+
+    def __init__(self, rules):
+        super().__init__(convert_charrefs=True)
+        self.rules = rules
+        self.blocks = []
+        self.title = ""
+        self.meta = {}
+        self.author = None
+
+        self._buffer = []
+        self._container_depth = 0 if rules.container_tag else 1
+        self._skip_tag = None
+        self._skip_depth = 0
+        self._in_title = False
+        self._title_parts = []
+        self._author_rule = None
+        self._author_depth = 0
+        self._author_in_child = False
+        self._author_parts = []
+
+    # ---------- blocks ----------
+    def _flush(self):
+        if self._buffer:
+            text = self.rules.clean("".join(self._buffer))
+            self._buffer.clear()
+            if text:
+                self.blocks.append(text)
+
+    # ---------- events ----------
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            name = (attrs.get("name") or "").lower()
+            if name and "content" in attrs and name not in self.meta:
+                self.meta[name] = (attrs["content"] or "").strip()
+            return
+        if tag == "title" and not self.title:
+            self._in_title = True
+            return
+
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag in self.rules.skip_tags and tag not in VOID_TAGS:
+            self._skip_tag, self._skip_depth = tag, 1
+            return
+
+        if self.author is None:
+            self._start_author(tag, attrs)
+
+        if self._container_depth:
+            if tag == self.rules.container_tag:
+                self._container_depth += 1
+            if tag in self.rules.block_tags:
+                self._flush()
+        elif self.rules.container_tag and self.rules.is_container(tag, dict(attrs)):
+            self._container_depth = 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/> and friends: a boundary, never a nesting level
+        if self._container_depth and self._skip_tag is None and tag in self.rules.block_tags:
+            self._flush()
+        elif tag == "meta":
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self.title = _WHITESPACE.sub(" ", "".join(self._title_parts)).strip()
+            return
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if not self._skip_depth:
+                    self._skip_tag = None
+            return
+
+        if self._author_rule is not None:
+            self._end_author(tag)
+
+        if self._container_depth and self.rules.container_tag:
+            if tag in self.rules.block_tags:
+                self._flush()
+            if tag == self.rules.container_tag:
+                self._container_depth -= 1
+        elif self._container_depth and tag in self.rules.block_tags:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+            return
+        if self._skip_tag is not None:
+            return
+        if self._author_rule is not None and (self._author_in_child or not self._author_rule[2]):
+            self._author_parts.append(data)
+        if self._container_depth:
+            self._buffer.append(data)
+
+    # ---------- author ----------
+    def _start_author(self, tag, attrs):
+        if self._author_rule is None:
+            for rule in self.rules.author_rules:
+                rule_tag, rule_class, _ = rule
+                if tag == rule_tag and (rule_class is None or rule_class.search(dict(attrs).get("class") or "")):
+                    self._author_rule, self._author_depth = rule, 1
+                    return
+        else:
+            if tag == self._author_rule[0]:
+                self._author_depth += 1
+            if tag == self._author_rule[2]:
+                self._author_in_child = True
+
+    def _end_author(self, tag):
+        rule_tag, _, child = self._author_rule
+        if child and tag == child and self._author_in_child:
+            self._author_in_child = False
+            self._finish_author()
+        elif tag == rule_tag:
+            self._author_depth -= 1
+            if not self._author_depth:
+                self._finish_author()
+
+    def _finish_author(self):
+        text = _WHITESPACE.sub(" ", "".join(self._author_parts)).strip()
+        self._author_parts.clear()
+        self._author_rule = None
+        self._author_in_child = False
+        if text:
+            self.author = text
+
+    def close(self):
+        super().close()
+        self._flush()
+
+def extract_article(html, url=None, rules=None):
+    """Body blocks, body text, title, meta tags and author of one article page"""
+    extractor = ArticleExtractor(rules or rules_for(url))
+    extractor.feed(html)
+    extractor.close()
+    return {
+        "blocks": extractor.blocks,
+        "body": "\n".join(extractor.blocks),
+        "title": extractor.title,
+        "meta": extractor.meta,
+        "author": extractor.author,
+    }
@@ -0,0 +1,284 @@
+﻿# article_store.py - Compressed off-row storage for news article bodies
+#
+#   python article_store.py stats
+#   python article_store.py train --source times_of_india
+#   python article_store.py migrate [--column FullDescription] [--batch 500]
+#   python article_store.py show <slug>
+#
+# Bodies live zstd-compressed in Tbl_NewsBodies, keyed by the SHA-256 of the
+# text; the Tbl_News row keeps only the reference "zbody:<sha256>" in its
+# FullDescription/Content column. Each source gets its own trained zstd
+# dictionary (Tbl_NewsBodyDicts): news bodies are short and share a lot of
+# phrasing, which a dictionary captures and plain zstd cannot.
+import argparse
+import hashlib
+import sys
+import threading
+
+import storage
+from metrics import metrics
+
+# zstandard (require_zstd) is imported on first compress/decompress
+zstd = None
+
+# ==============================
+# Configuration
+# ==============================
+REF_PREFIX = "zbody:"
+MIN_BODY_CHARS = 300          # shorter bodies stay inline; the reference would save nothing
+COMPRESSION_LEVEL = 10
+DICT_SIZE = 32 * 1024         # bytes per trained dictionary
+TRAIN_SAMPLES = 200           # bodies collected before a source's first dictionary is trained
+MIGRATE_BATCH = 500
+
+BODY_COLUMNS = ("FullDescription", "Content")
+
+
+def require_zstd():
+    global zstd
+    if zstd is None:
+        try:
+            import zstandard
+        except ImportError:  # only needed for off-row bodies
+            raise RuntimeError("zstandard is required for compressed article bodies (pip install zstandard)")
+        zstd = zstandard
+
+
+def body_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def is_reference(value):
+    return isinstance(value, str) and value.startswith(REF_PREFIX)
+
+
+# ==============================
+# Store
+# ==============================
+class ArticleStore:
+    """
+    Writes and reads compressed bodies through a storage repository.
+
+    Writes are not committed here: they belong to the transaction of the
+    Tbl_News insert that stores the reference, and commit with it. A source
+    whose samples are complete gets its dictionary from train_pending(),
+    which callers run after that commit.
+    """
+
+    def __init__(self, repository, level=COMPRESSION_LEVEL):
+        self.repository = repository
+        self.level = level
+        self._dicts = {}                 # dict_id -> ZstdCompressionDict
+        self._source_dicts = None        # source -> newest dict_id
+        self._samples = {}               # source -> bodies kept for training
+        self._local = threading.local()  # zstd (de)compressors are not thread-safe
+        self._lock = threading.RLock()
+
+    # ---------- dictionaries ----------
+    def _load_dicts(self):
+        if self._source_dicts is None:
+            self._source_dicts = self.repository.latest_body_dicts()
+        return self._source_dicts
+
+    def dictionary(self, dict_id):
+        if dict_id not in self._dicts:
+            require_zstd()
+            data = self.repository.body_dict(dict_id)
+            if data is None:
+                raise KeyError(f"zstd dictionary {dict_id} is missing from {storage.DICTS_TABLE}")
+            self._dicts[dict_id] = zstd.ZstdCompressionDict(data)
+        return self._dicts[dict_id]
+
+    def _compressor(self, dict_id):
+        cache = self._local.__dict__.setdefault('compressors', {})
+        if dict_id not in cache:
+            dict_data = self.dictionary(dict_id) if dict_id else None
+            cache[dict_id] = zstd.ZstdCompressor(level=self.level, dict_data=dict_data)
+        return cache[dict_id]
+
+    def _decompressor(self, dict_id):
+        cache = self._local.__dict__.setdefault('decompressors', {})
+        if dict_id not in cache:
+            dict_data = self.dictionary(dict_id) if dict_id else None
+            cache[dict_id] = zstd.ZstdDecompressor(dict_data=dict_data)
+        return cache[dict_id]
+
+    def train(self, source, samples):
+        """Train and save (and commit) a dictionary for source from sample bodies; returns its DictId"""
+        require_zstd()
+        encoded = [text.encode("utf-8") for text in samples if text]
+        with metrics.timer('train_dictionary', source=source):
+            trained = zstd.train_dictionary(DICT_SIZE, encoded, level=self.level)
+        dict_id = self.repository.insert_body_dict(source, trained.as_bytes(), len(encoded))
+        self.repository.commit()
+        with self._lock:
+            self._dicts[dict_id] = trained
+            self._load_dicts()[source] = dict_id
+        print(f"📚 Trained {len(trained.as_bytes()) // 1024} KB zstd dictionary {dict_id} for {source} from {len(encoded)} bodies")
+        return dict_id
+
+    def _collect_sample(self, source, text):
+        """Keep bodies of a source without a dictionary, starting from those stored by earlier runs"""
+        samples = self._samples.get(source)
+        if samples is None:
+            # One-shot scripts store a few dozen bodies per run; the table lets them add up to TRAIN_SAMPLES
+            samples = self._samples[source] = self.samples_from_table(source, TRAIN_SAMPLES)
+        samples.append(text)
+
+    def train_pending(self):
+        """Train the dictionaries of sources with TRAIN_SAMPLES bodies; run after committing the rows that stored them"""
+        with self._lock:
+            due = [source for source, samples in self._samples.items() if len(samples) >= TRAIN_SAMPLES]
+            due = [(source, self._samples.pop(source)) for source in due]
+        for source, samples in due:
+            try:
+                self.train(source, samples)
+            except Exception as e:   # zstd refuses too little or too uniform data; plain zstd still works
+                metrics.inc('dictionary_errors_total', source=source)
+                print(f"⚠️ Could not train a dictionary for {source}: {e}")
+                with self._lock:
+                    self._samples[source] = []   # collect a fresh set rather than retrying on every article
+
+    # ---------- bodies ----------
+    def store(self, source, text):
+        """Compress text into the body table and return the reference for the row (short text is returned as is)"""
+        if not text or len(text) < MIN_BODY_CHARS:
+            return text
+        require_zstd()
+        digest = body_hash(text)
+        with self._lock:
+            dict_id = self._load_dicts().get(source)
+            if dict_id is None:
+                self._collect_sample(source, text)   # before the insert, so the table read does not see this body
+            raw = text.encode("utf-8")
+            with metrics.timer('compress', source=source):
+                blob = self._compressor(dict_id).compress(raw)
+            self.repository.insert_body(digest, source, dict_id, len(raw), blob)
+            metrics.inc('body_bytes_raw_total', len(raw), source=source)
+            metrics.inc('body_bytes_stored_total', len(blob), source=source)
+        return REF_PREFIX + digest
+
+    def load(self, value):
+        """Body text for a row's column value; values that are not references are returned unchanged"""
+        if not is_reference(value):
+            return value
+        return self.load_many([value])[value]
+
+    def load_many(self, values):
+        """{value: body text} for the column values of a page of rows, in one query"""
+        result = {value: value for value in values if not is_reference(value)}
+        digests = {value[len(REF_PREFIX):]: value for value in values if is_reference(value)}
+        if not digests:
+            return result
+        require_zstd()
+        with self._lock:
+            rows = self.repository.bodies(digests)
+            with metrics.timer('decompress'):
+                for digest, dict_id, blob in rows:
+                    result[digests[digest.strip()]] = self._decompressor(dict_id).decompress(bytes(blob)).decode("utf-8")
+        for value in digests.values():
+            result.setdefault(value, None)   # reference to a body that is gone
+        return result
+
+    # ---------- maintenance ----------
+    def samples_from_table(self, source, limit=TRAIN_SAMPLES * 5):
+        """Decompressed bodies of a source already in the body table"""
+        refs = [REF_PREFIX + digest for digest in self.repository.recent_body_hashes(source, limit)]
+        return [text for text in self.load_many(refs).values() if text]
+
+    def migrate(self, column, source="legacy", batch=MIGRATE_BATCH):
+        """Move inline bodies of existing Tbl_News rows into the body table; returns rows moved"""
+        if column not in BODY_COLUMNS:
+            raise ValueError(f"column must be one of {BODY_COLUMNS}")
+        moved = 0
+        last_slug = ""
+        while True:
+            rows = self.repository.inline_bodies(column, last_slug, MIN_BODY_CHARS, batch)
+            if not rows:
+                break
+            for slug, text in rows:
+                self.repository.update_news_column(column, slug, self.store(source, text))
+            self.repository.commit()
+            self.train_pending()
+            moved += len(rows)
+            last_slug = rows[-1][0]
+            print(f"📦 {column}: {moved} bodies moved")
+        return moved
+
+    def stats(self):
+        """(source, bodies, raw bytes, stored bytes) per source"""
+        return self.repository.body_stats()
+
+
+# ==============================
+# Shared store
+# ==============================
+_store = None
+_store_lock = threading.Lock()
+
+def get_article_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArticleStore(storage.get_repository("NASolution"))
+    return _store
+
+def store_body(source, text):
+    """Reference to put in the Tbl_News body column for text (commits with the row insert)"""
+    return get_article_store().store(source, text)
+
+def train_pending():
+    """Train the dictionaries that became due; call after committing the rows whose bodies were stored"""
+    if _store is not None:
+        _store.train_pending()
+
+def read_body(value):
+    """Body text for a Tbl_News FullDescription/Content value, decompressed on demand"""
+    return get_article_store().load(value)
+
+
+# ==============================
+# Main Execution
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compressed off-row storage for Tbl_News article bodies")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="compression per source")
+    train = sub.add_parser("train", help="(re)train a source's dictionary from its stored bodies")
+    train.add_argument("--source", required=True)
+    migrate = sub.add_parser("migrate", help="move existing inline bodies into the body table")
+    migrate.add_argument("--column", choices=BODY_COLUMNS, action="append")
+    migrate.add_argument("--source", default="legacy", help="dictionary group for the migrated bodies")
+    migrate.add_argument("--batch", type=int, default=MIGRATE_BATCH)
+    show = sub.add_parser("show", help="print the body of one article")
+    show.add_argument("slug")
+    args = parser.parse_args(argv)
+
+    store = get_article_store()
+    try:
+        if args.command == "stats":
+            for source, count, raw, stored in store.stats():
+                ratio = raw / stored if stored else 0
+                print(f"{source:<20} {count:>7} bodies  {raw / 1e6:8.1f} MB -> {stored / 1e6:7.1f} MB  ({ratio:.1f}x)")
+        elif args.command == "train":
+            samples = store.samples_from_table(args.source)
+            if len(samples) < 10:
+                print(f"❌ Only {len(samples)} stored bodies for {args.source}; not enough to train")
+                return 1
+            store.train(args.source, samples)
+        elif args.command == "migrate":
+            for column in args.column or BODY_COLUMNS:
+                store.migrate(column, args.source, args.batch)
+        elif args.command == "show":
+            row = store.repository.news_bodies(args.slug)
+            if row is None:
+                print(f"❌ No article with slug {args.slug}")
+                return 1
+            print(read_body(row[0] or row[1]))
+    finally:
+        storage.close_all()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
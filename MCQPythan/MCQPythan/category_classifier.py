@@ -0,0 +1,107 @@
+﻿# category_classifier.py - Single-pass keyword classifier for scraped Q&A categories
+import json
+import os
+import re
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'category_taxonomy.json')
+
+# ==================== PATTERN COMPILATION ====================
+def _build_trie(keyword_priorities):
+    """Build a character trie whose terminal nodes hold the keyword's category priority"""
+    trie = {}
+    for keyword, priority in keyword_priorities.items():
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[''] = min(priority, node.get('', priority))
+    return trie
+
+def _trie_to_regex(node):
+    """Turn a trie into a regex that matches the longest keyword at the current position"""
+    branches = [re.escape(ch) + _trie_to_regex(child) for ch, child in sorted(node.items()) if ch != '']
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        body = f'(?:{body})?'
+    return body
+
+def _best_priorities(trie):
+    """Map every keyword to the best priority among itself and the keywords that prefix it"""
+    best = {}
+    stack = [(trie, '', None)]
+    while stack:
+        node, prefix, inherited = stack.pop()
+        if '' in node:
+            inherited = node[''] if inherited is None else min(inherited, node[''])
+            best[prefix] = inherited
+        for ch, child in node.items():
+            if ch != '':
+                stack.append((child, prefix + ch, inherited))
+    return best
+
+# ==================== CLASSIFIER ====================
+class CategoryClassifier:
+    """
+    Keyword taxonomy compiled once into a trie-shaped regex.
+
+    Each text is scanned a single time; at every position the longest keyword is
+    captured and mapped to the best category it implies. Categories keep the
+    priority order of the taxonomy file, so the first listed category wins when
+    several match, exactly like the original keyword loops.
+    """
+
+    def __init__(self, categories, default_category='General Law'):
+        self.categories = [name for name, _ in categories]
+        self.default_category = default_category
+
+        keyword_priorities = {}
+        for priority, (_, keywords) in enumerate(categories):
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword:
+                    keyword_priorities[keyword] = min(priority, keyword_priorities.get(keyword, priority))
+
+        trie = _build_trie(keyword_priorities)
+        self.keyword_priority = _best_priorities(trie)
+        self.pattern = re.compile(f'(?=({_trie_to_regex(trie)}))') if keyword_priorities else None
+
+    @classmethod
+    def from_config(cls, path=None):
+        """Load the taxonomy from a JSON config file"""
+        with open(path or DEFAULT_TAXONOMY_PATH, encoding='utf-8') as f:
+            config = json.load(f)
+        categories = [(entry['name'], entry.get('keywords', [])) for entry in config['categories']]
+        return cls(categories, config.get('default_category', 'General Law'))
+
+    def best_priority(self, text):
+        """Return the best category priority found in text, or None if nothing matches"""
+        if not text or self.pattern is None:
+            return None
+        best = None
+        for match in self.pattern.finditer(text.lower()):
+            priority = self.keyword_priority[match.group(1)]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return best
+
+    def classify(self, url, question):
+        """Classify a single Q&A pair from its URL and question text"""
+        return self.classify_batch([(url, question)])[0]
+
+    def classify_batch(self, items):
+        """Classify an iterable of (url, question) pairs, scanning each distinct URL once"""
+        url_priorities = {}
+        results = []
+        for url, question in items:
+            if url not in url_priorities:
+                url_priorities[url] = self.best_priority(url)
+            best = url_priorities[url]
+            if best != 0:
+                question_best = self.best_priority(question)
+                if question_best is not None and (best is None or question_best < best):
+                    best = question_best
+            results.append(self.default_category if best is None else self.categories[best])
+        return results
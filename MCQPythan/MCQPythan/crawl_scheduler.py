@@ -0,0 +1,130 @@
+﻿# crawl_scheduler.py - Per-domain polite crawl scheduling with cross-domain concurrency
+import logging
+import random
+import time
+import urllib.parse
+import urllib.robotparser
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# ==================== DEFAULTS ====================
+DEFAULT_CONCURRENCY = 4        # domains crawled at the same time
+DEFAULT_MIN_DELAY = 2.0        # seconds between requests to one domain
+DEFAULT_MAX_DELAY = 30.0       # upper bound for the adaptive delay
+LATENCY_FACTOR = 2.0           # wait this many times the observed response time
+LATENCY_SMOOTHING = 0.3        # weight of the newest sample in the latency average
+JITTER = 0.5                   # up to +50% random spread on every delay
+
+
+class DomainState:
+    """Politeness bookkeeping for one domain"""
+
+    def __init__(self, domain, crawl_delay=None):
+        self.domain = domain
+        self.crawl_delay = crawl_delay
+        self.avg_latency = None
+        self.next_allowed = 0.0
+
+    def observe(self, latency):
+        """Fold a new response time into the moving average"""
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.avg_latency
+
+    def delay(self, min_delay, max_delay):
+        """Spacing before the next request: crawl-delay, adaptive latency and a floor, plus jitter"""
+        delay = max(min_delay, self.crawl_delay or 0, LATENCY_FACTOR * (self.avg_latency or 0))
+        delay = min(delay, max(max_delay, self.crawl_delay or 0))
+        return delay * random.uniform(1, 1 + JITTER)
+
+
+class DomainScheduler:
+    """
+    Queue URLs per domain and crawl the domains concurrently.
+
+    URLs of the same domain run one after another, spaced by the robots.txt
+    crawl-delay and the domain's observed latency. Different domains run in
+    parallel up to max_concurrency, so total time tracks the slowest domain
+    rather than the sum of all of them.
+    """
+
+    def __init__(self, session=None, max_concurrency=DEFAULT_CONCURRENCY,
+                 min_delay=DEFAULT_MIN_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 user_agent='*', logger=None):
+        self.session = session
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.user_agent = user_agent
+        self.logger = logger or logging.getLogger(__name__)
+
+    @staticmethod
+    def domain_of(url):
+        return urllib.parse.urlparse(url).netloc.lower()
+
+    def group_by_domain(self, urls):
+        """Split URLs into per-domain queues, keeping their original order"""
+        queues = OrderedDict()
+        for url in urls:
+            queues.setdefault(self.domain_of(url), []).append(url)
+        return queues
+
+    def get_crawl_delay(self, url):
+        """Read Crawl-delay for our user agent from the domain's robots.txt"""
+        if self.session is None:
+            return None
+        parts = urllib.parse.urlparse(url)
+        robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+        try:
+            response = self.session.get(robots_url, timeout=10)
+            if response.status_code != 200:
+                return None
+            parser = urllib.robotparser.RobotFileParser()
+            parser.parse(response.text.splitlines())
+            delay = parser.crawl_delay(self.user_agent)
+            return float(delay) if delay is not None else None
+        except Exception as e:
+            self.logger.debug(f"Could not read {robots_url}: {e}")
+            return None
+
+    def crawl_domain(self, domain, urls, task):
+        """Run task over one domain's URLs sequentially with adaptive spacing"""
+        state = DomainState(domain, self.get_crawl_delay(urls[0]))
+        if state.crawl_delay:
+            self.logger.info(f"🤖 {domain}: robots.txt crawl-delay {state.crawl_delay}s")
+
+        results = []
+        for url in urls:
+            wait = state.next_allowed - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            started = time.monotonic()
+            try:
+                results.append((url, task(url)))
+            except Exception as e:
+                self.logger.error(f"❌ Task failed for {url}: {e}")
+                results.append((url, None))
+            finished = time.monotonic()
+
+            state.observe(finished - started)
+            state.next_allowed = finished + state.delay(self.min_delay, self.max_delay)
+        return results
+
+    def run(self, urls, task):
+        """Crawl all URLs and return (url, result) pairs grouped by domain"""
+        queues = self.group_by_domain(urls)
+        if not queues:
+            return []
+
+        workers = min(self.max_concurrency, len(queues))
+        self.logger.info(f"🗂️ Scheduling {len(urls)} URLs across {len(queues)} domains ({workers} concurrent)")
+
+        results = []
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='crawl') as executor:
+            futures = [executor.submit(self.crawl_domain, domain, domain_urls, task)
+                       for domain, domain_urls in queues.items()]
+            for future in futures:
+                results.extend(future.result())
+        return results
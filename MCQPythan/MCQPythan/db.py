@@ -0,0 +1,103 @@
+﻿# db.py - Lazily opened, cached SQL Server connections shared by the scripts
+import threading
+
+# ==============================
+# Connection Strings
+# ==============================
+SERVER_SETTINGS = (
+    "DRIVER={ODBC Driver 17 for SQL Server};"
+    "SERVER=.;"
+    "UID=sa;"
+    "PWD=123456;"
+)
+
+def connection_string(database):
+    return f"{SERVER_SETTINGS}DATABASE={database};"
+
+_connections = {}
+_lock = threading.Lock()
+
+def get_connection(database="MCQ"):
+    """Open the connection to a database on first use and reuse it afterwards"""
+    with _lock:
+        conn = _connections.get(database)
+        if conn is None:
+            import pyodbc
+            conn = _connections[database] = pyodbc.connect(connection_string(database))
+        return conn
+
+def close_connection(database):
+    with _lock:
+        conn = _connections.pop(database, None)
+    if conn is not None:
+        conn.close()
+
+def close_all():
+    for database in list(_connections):
+        close_connection(database)
+
+# ==============================
+# Lazy Stand-ins
+# ==============================
+class LazyConnection:
+    """
+    Module-level stand-in for a pyodbc connection.
+
+    Scripts keep their `conn = ...` globals, but nothing is opened until the
+    first attribute is used, so importing a module never touches the server.
+    """
+
+    def __init__(self, database="MCQ", on_connect=None):
+        self.database = database
+        self.on_connect = on_connect
+        self._conn = None
+
+    @property
+    def connected(self):
+        return self._conn is not None
+
+    def _get(self):
+        if self._conn is None:
+            self._conn = get_connection(self.database)
+            if self.on_connect is not None:
+                self.on_connect(self._conn)
+        return self._conn
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def close(self):
+        """Close only if it was ever opened"""
+        if self._conn is not None:
+            self._conn = None
+            close_connection(self.database)
+
+
+class LazyCursor:
+    """Module-level stand-in for a cursor of a LazyConnection"""
+
+    def __init__(self, connection):
+        object.__setattr__(self, '_connection', connection)
+        object.__setattr__(self, '_cursor', None)
+
+    def _get(self):
+        if self._cursor is None:
+            object.__setattr__(self, '_cursor', self._connection.cursor())
+        return self._cursor
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get(), name, value)
+
+    def close(self):
+        if self._cursor is not None:
+            self._cursor.close()
+            object.__setattr__(self, '_cursor', None)
+
+
+def lazy_connection(database="MCQ", on_connect=None):
+    """(conn, cursor) stand-ins that connect on first use"""
+    conn = LazyConnection(database, on_connect)
+    return conn, LazyCursor(conn)
@@ -0,0 +1,196 @@
+﻿# feed_discovery.py - Article discovery from RSS/Atom feeds and news sitemaps with streaming XML parsing
+import html
+import re
+import threading
+import urllib.parse
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from fetch_middleware import ResilientFetcher
+from metrics import metrics
+
+MAX_ENTRIES = 100          # newest entries taken from one feed
+CHUNK_SIZE = 16 * 1024     # bytes fed to the XML parser at a time
+
+# One discovered article; only url is guaranteed
+FeedEntry = namedtuple('FeedEntry', ['url', 'title', 'published', 'summary', 'image_url'], defaults=(None, None, None, None))
+
+_TAGS = re.compile(r"<[^>]+>")
+_WHITESPACE = re.compile(r"\s+")
+
+# Elements that hold one article in each format (namespaces stripped)
+_ENTRY_TAGS = {"item", "entry", "url"}
+
+_fetcher = None
+_validators = {}           # feed url -> (etag, last_modified, entries) for conditional GETs
+_validators_lock = threading.Lock()
+
+# ==================== PARSING ====================
+def _local(tag):
+    return tag.rpartition("}")[2]
+
+def _text(element):
+    return (element.text or "").strip() if element is not None else ""
+
+def parse_date(value):
+    """RFC 822 (RSS) or ISO 8601 (Atom, sitemaps) date as naive local time (like the listing dates), or None"""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def plain_text(value):
+    """Feed descriptions often carry HTML; keep the text"""
+    return _WHITESPACE.sub(" ", html.unescape(_TAGS.sub(" ", value or ""))).strip()
+
+def entry_from_element(element):
+    """FeedEntry from an RSS <item>, Atom <entry> or sitemap <url>, or None without a link"""
+    url = title = published = summary = image_url = None
+    for child in element.iter():
+        if child is element:
+            continue
+        tag = _local(child.tag)
+        if tag == "link":
+            # Atom: <link rel="alternate" href=...>; RSS: <link>url</link>
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate":
+                url = url or href
+            elif _text(child):
+                url = url or _text(child)
+        elif tag == "loc" and url is None:
+            url = _text(child)
+        elif tag == "guid" and url is None and child.get("isPermaLink", "true") == "true" and _text(child).startswith("http"):
+            url = _text(child)
+        elif tag == "title" and title is None:
+            title = plain_text(child.text)
+        elif tag in ("pubDate", "published", "updated", "publication_date", "lastmod", "date") and published is None:
+            published = parse_date(_text(child))
+        elif child.get("url") is not None:
+            # <enclosure>, <media:content>, <media:thumbnail>
+            if image_url is None and (child.get("type") or child.get("medium") or "image").startswith("image"):
+                image_url = child.get("url")
+        elif tag in ("description", "summary", "content", "encoded") and summary is None:
+            summary = plain_text(child.text)
+    if not url:
+        return None
+    if image_url is None:
+        image_loc = next((c for c in element.iter() if _local(c.tag) == "loc" and c is not element and _text(c) != url), None)
+        image_url = _text(image_loc) or None
+    return FeedEntry(url, title, published, summary, image_url)
+
+def iter_feed_entries(chunks, max_entries=MAX_ENTRIES):
+    """
+    Stream entries out of RSS, Atom or sitemap XML given as byte chunks.
+
+    An incremental (iterparse-style) pull parser is fed chunk by chunk;
+    each finished entry element is converted and cleared, so memory stays
+    at one entry and parsing stops as soon as max_entries are read.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    depth_in_entry = 0
+    count = 0
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            tag = _local(element.tag)
+            if event == "start":
+                if tag in _ENTRY_TAGS:
+                    depth_in_entry += 1
+                continue
+            if tag not in _ENTRY_TAGS:
+                continue
+            depth_in_entry -= 1
+            if depth_in_entry:
+                continue       # e.g. <url> nested inside an <image:image> block
+            entry = entry_from_element(element)
+            element.clear()
+            if entry is not None:
+                yield entry
+                count += 1
+                if count >= max_entries:
+                    return
+    parser.close()
+
+# ==================== FETCHING ====================
+def get_fetcher():
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = ResilientFetcher()
+    return _fetcher
+
+def read_feed(feed_url, fetcher=None, max_entries=MAX_ENTRIES, scraper='feed'):
+    """Entries of one feed; unchanged feeds (304) return the entries of the last read"""
+    fetcher = fetcher or get_fetcher()
+    headers = {}
+    with _validators_lock:
+        cached = _validators.get(feed_url)
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    with metrics.timer('discover', scraper=scraper):
+        response = fetcher.get(feed_url, headers=headers, stream=True)
+        try:
+            if response.status_code == 304 and cached:
+                metrics.inc('feed_not_modified_total', scraper=scraper)
+                return cached[2]
+            response.raise_for_status()
+            received = [0]
+
+            def chunks():
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    received[0] += len(chunk)
+                    yield chunk
+
+            entries = list(iter_feed_entries(chunks(), max_entries))
+        finally:
+            response.close()
+    metrics.inc('bytes_fetched_total', received[0], scraper=scraper, page='feed')
+
+    with _validators_lock:
+        _validators[feed_url] = (response.headers.get('ETag'), response.headers.get('Last-Modified'), entries)
+    return entries
+
+def discover(feed_urls, fetcher=None, path_prefix=None, max_entries=MAX_ENTRIES, scraper='feed'):
+    """
+    Entries from the first of feed_urls that can be read, newest first, or
+    None when none of them can (the caller then scrapes its HTML listing).
+    path_prefix keeps only article URLs under that path, for site-wide sitemaps.
+    """
+    for feed_url in feed_urls:
+        try:
+            entries = read_feed(feed_url, fetcher, max_entries, scraper)
+        except (requests.RequestException, ET.ParseError) as e:
+            metrics.inc('feed_errors_total', scraper=scraper)
+            print(f"⚠️ Feed unavailable {feed_url}: {e}")
+            continue
+        if path_prefix:
+            entries = [e for e in entries if urllib.parse.urlparse(e.url).path.startswith(path_prefix)]
+        return sorted(entries, key=lambda e: e.published.timestamp() if e.published else 0, reverse=True)
+    return None
+
+def entry_to_item(entry):
+    """Listing item (as built by the news scrapers) for a feed entry"""
+    return {
+        'title': entry.title or "",
+        'slug': urllib.parse.urlparse(entry.url).path,
+        'url': entry.url,
+        'image_url': entry.image_url,
+        'short_desc': entry.summary or "",
+        'published_date': entry.published,
+    }
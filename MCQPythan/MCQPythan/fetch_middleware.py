@@ -0,0 +1,290 @@
+﻿# fetch_middleware.py - Retries, per-host circuit breaker and negative-result cache for HTTP fetches
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+
+import requests
+
+import http_client
+from near_duplicate import file_lock
+
+DEFAULT_NEGATIVE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fetch_failures.json')
+
+DEFAULT_TIMEOUT = http_client.DEFAULT_TIMEOUT  # (connect, read) seconds when the caller passes none
+MAX_RETRIES = 3                    # extra attempts for transient errors
+BACKOFF_BASE = 0.5                 # seconds; doubled on every retry
+BACKOFF_CAP = 30.0                 # longest single backoff sleep
+BREAKER_FAILURE_THRESHOLD = 5      # consecutive failures that open a host's circuit
+BREAKER_RESET_SECONDS = 120        # how long an open circuit rejects requests before a trial
+NEGATIVE_TTL_SECONDS = 24 * 3600   # how long a permanent failure is remembered
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+PERMANENT_STATUS_CODES = {404, 410}
+
+
+class HostUnavailableError(requests.RequestException):
+    """Raised without touching the network when a host or URL is known to be failing"""
+    permanent = False
+
+class CircuitOpenError(HostUnavailableError):
+    """The host's circuit breaker is open after repeated failures"""
+
+class KnownFailureError(HostUnavailableError):
+    """The host or URL failed permanently within the negative-cache TTL"""
+    permanent = True
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open trial after a cool-down"""
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half-open' and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class FailureRegistry:
+    """
+    Circuit breakers and negative cache of one cache file, shared by every
+    fetcher in the process (each scraper module builds its own fetcher).
+
+    save() re-reads the file under a lock file and merges it, so processes
+    that share fetch_failures.json keep each other's entries.
+    """
+
+    def __init__(self, cache_path, logger=None):
+        self.cache_path = cache_path
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.breakers = {}
+        self.forgotten = set()     # keys dropped by forget(), removed from the file on the next save
+        self.negative_cache = self._read()
+
+    def _read(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {key: entry for key, entry in entries.items() if entry.get('expires', 0) > now}
+
+    def save(self):
+        """Merge with the file and write it atomically; call with self.lock held"""
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with file_lock(self.cache_path + '.lock'):
+                merged = self._read()
+                merged.update(self.negative_cache)
+                for key in self.forgotten:
+                    merged.pop(key, None)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(merged, f, indent=2)
+                os.replace(tmp_path, self.cache_path)
+            self.negative_cache = merged
+            self.forgotten.clear()
+        except OSError as e:
+            self.logger.debug(f"Could not persist negative cache: {e}")
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_failure_registry(cache_path=DEFAULT_NEGATIVE_CACHE_PATH):
+    """The process-wide breakers and negative cache for a cache file"""
+    with _registries_lock:
+        registry = _registries.get(cache_path)
+        if registry is None:
+            registry = _registries[cache_path] = FailureRegistry(cache_path)
+        return registry
+
+
+class ResilientFetcher:
+    """
+    GET wrapper shared by all scrapers.
+
+    Transient errors (timeouts, connection resets, 429/5xx) are retried with
+    full-jitter exponential backoff. Every host has a circuit breaker, and
+    permanent failures (expired certificates, 404/410) are written to a small
+    TTL cache on disk, so a dead host costs one attempt per TTL window across
+    runs instead of one per URL per run. Breakers and cache live in the
+    FailureRegistry of the cache file, so all fetchers of a process share them.
+    """
+
+    def __init__(self, session=None, headers=None, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_cap=BACKOFF_CAP,
+                 failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS,
+                 negative_ttl=NEGATIVE_TTL_SECONDS, cache_path=DEFAULT_NEGATIVE_CACHE_PATH, logger=None):
+        # The shared pooled session unless the caller brings its own; extra
+        # headers are sent per request so the shared session is not changed
+        self._session = session
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.negative_ttl = negative_ttl
+        self.cache_path = cache_path
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._registry = get_failure_registry(cache_path)
+        self._lock = self._registry.lock
+        self._breakers = self._registry.breakers
+
+    @property
+    def session(self):
+        return self._session or http_client.get_session()
+
+    # ---------- negative cache ----------
+    def _remember_failure(self, key, reason, status_code=None):
+        with self._lock:
+            self._registry.negative_cache[key] = {
+                'reason': reason[:300],
+                'status_code': status_code,
+                'expires': time.time() + self.negative_ttl,
+            }
+            self._registry.forgotten.discard(key)
+            self._registry.save()
+
+    def _known_failure(self, host, url):
+        now = time.time()
+        with self._lock:
+            for key in (f'host:{host}', f'url:{url}'):
+                entry = self._registry.negative_cache.get(key)
+                if entry and entry['expires'] > now:
+                    return entry
+                if entry:
+                    del self._registry.negative_cache[key]
+        return None
+
+    def forget(self, url_or_host):
+        """Drop cached failures for a URL or host, e.g. after fixing a certificate"""
+        with self._lock:
+            for key in (f'url:{url_or_host}', f'host:{url_or_host}'):
+                self._registry.negative_cache.pop(key, None)
+                self._registry.forgotten.add(key)
+            self._registry.save()
+
+    # ---------- circuit breakers ----------
+    def _breaker(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+            return breaker
+
+    def _backoff(self, attempt, response=None):
+        """Full-jitter exponential backoff, honouring a numeric Retry-After header"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    # ---------- requests ----------
+    def get(self, url, **kwargs):
+        """GET a URL through the negative cache, circuit breaker and retry policy"""
+        host = urllib.parse.urlparse(url).netloc.lower()
+        known = self._known_failure(host, url)
+        if known:
+            raise KnownFailureError(f"Skipping {url}: cached failure ({known['reason']})", known.get('status_code'))
+
+        breaker = self._breaker(host)
+        kwargs.setdefault('timeout', self.timeout)
+        if self.headers:
+            kwargs['headers'] = {**self.headers, **(kwargs.get('headers') or {})}
+
+        attempt = 0
+        while True:
+            with self._lock:
+                allowed = breaker.allow()
+            if not allowed:
+                raise CircuitOpenError(f"Circuit open for {host} after {breaker.failures} consecutive failures")
+
+            try:
+                response = self.session.get(url, **kwargs)
+            except requests.exceptions.SSLError as e:
+                # Certificate problems do not fix themselves between retries
+                with self._lock:
+                    breaker.record_failure()
+                self._remember_failure(f'host:{host}', f'SSL error: {e}')
+                raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                with self._lock:
+                    breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                self.logger.warning(f"🔁 {type(e).__name__} for {url}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except requests.RequestException:
+                # TooManyRedirects, InvalidURL, ChunkedEncodingError...: not retried, but a
+                # half-open trial must still end, or the host would be refused for good
+                with self._lock:
+                    breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUS_CODES:
+                with self._lock:
+                    breaker.record_failure()
+                if attempt >= self.max_retries:
+                    return response
+                delay = self._backoff(attempt, response)
+                self.logger.warning(f"🔁 HTTP {response.status_code} for {url}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            # The host answered, so it is healthy even if this URL is gone
+            with self._lock:
+                breaker.record_success()
+            if response.status_code in PERMANENT_STATUS_CODES:
+                self._remember_failure(f'url:{url}', f'HTTP {response.status_code}', response.status_code)
+            return response
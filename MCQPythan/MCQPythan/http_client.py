@@ -0,0 +1,204 @@
+﻿# http_client.py - One pooled, keep-alive HTTP client shared by every scraper
+#
+# Connection setup (DNS, TCP, TLS) is paid once per host per process instead
+# of once per page. Responses are decoded for every Accept-Encoding we
+# advertise (br only when brotli is installed), every request has a
+# (connect, read) timeout and DNS answers are cached for DNS_TTL_SECONDS.
+# Set SCRAPER_HTTP2=1 to use HTTP/2 through httpx when it is installed.
+import atexit
+import importlib.util
+import os
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+
+# ==============================
+# Configuration
+# ==============================
+CONNECT_TIMEOUT = 5                # seconds to establish a connection
+READ_TIMEOUT = 15                  # seconds between bytes of the response
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+POOL_CONNECTIONS = 20              # hosts whose pools are kept alive
+POOL_MAXSIZE = 10                  # keep-alive connections per host
+HOST_POOL_SIZES = {                # per-host overrides of POOL_MAXSIZE
+    "economictimes.indiatimes.com": 4,
+    "timesofindia.indiatimes.com": 4,
+    "www.businesstoday.in": 4,
+}
+
+DNS_TTL_SECONDS = 300
+
+USE_HTTP2 = os.environ.get("SCRAPER_HTTP2") == "1"
+
+# DEFAULT_ACCEPT_ENCODING lists only the encodings urllib3 can decode here
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': DEFAULT_ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# ==============================
+# DNS Cache
+# ==============================
+_real_getaddrinfo = socket.getaddrinfo
+_dns_cache = {}
+_dns_lock = threading.Lock()
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    """socket.getaddrinfo with a TTL cache; failures are never cached"""
+    key = (host, port, family, type, proto, flags)
+    now = time.monotonic()
+    entry = _dns_cache.get(key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    result = _real_getaddrinfo(host, port, family, type, proto, flags)
+    with _dns_lock:
+        _dns_cache[key] = (now + DNS_TTL_SECONDS, result)
+    return result
+
+def install_dns_cache():
+    socket.getaddrinfo = _cached_getaddrinfo
+
+def clear_dns_cache():
+    with _dns_lock:
+        _dns_cache.clear()
+
+# ==============================
+# requests (HTTP/1.1) Session
+# ==============================
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """Pooled adapter that applies DEFAULT_TIMEOUT when the caller passes none"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+def mount_host(session, host, pool_size):
+    """Give one host its own pool of pool_size connections"""
+    adapter = TimeoutHTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    for scheme in ("https://", "http://"):
+        session.mount(f"{scheme}{host}/", adapter)
+
+def build_session():
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = TimeoutHTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    for host, pool_size in HOST_POOL_SIZES.items():
+        mount_host(session, host, pool_size)
+    return session
+
+# ==============================
+# Optional HTTP/2 (httpx)
+# ==============================
+class Http2Session:
+    """
+    requests-compatible wrapper around an HTTP/2 httpx.Client.
+
+    Returns requests.Response objects and raises requests exceptions, so the
+    fetch middleware and the scrapers work unchanged.
+    """
+
+    def __init__(self):
+        import httpx
+        self._httpx = httpx
+        self.headers = CaseInsensitiveDict(DEFAULT_HEADERS)
+        self.headers.pop('Connection')   # not allowed in HTTP/2
+        self.headers.pop('Accept-Encoding')  # httpx advertises what it can decode
+        limits = httpx.Limits(max_connections=POOL_CONNECTIONS * POOL_MAXSIZE, max_keepalive_connections=POOL_CONNECTIONS)
+        self.client = httpx.Client(http2=True, limits=limits, headers=dict(self.headers))
+
+    def _timeout(self, timeout):
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return self._httpx.Timeout(read, connect=connect)
+        return self._httpx.Timeout(timeout)
+
+    def get(self, url, params=None, headers=None, timeout=None, allow_redirects=True, **kwargs):
+        httpx = self._httpx
+        try:
+            response = self.client.get(url, params=params, headers=headers, timeout=self._timeout(timeout),
+                                       follow_redirects=allow_redirects)
+        except httpx.TimeoutException as e:
+            if isinstance(e, httpx.ConnectTimeout):
+                raise requests.exceptions.ConnectTimeout(str(e)) from e
+            raise requests.exceptions.ReadTimeout(str(e)) from e
+        except httpx.ConnectError as e:
+            if "CERTIFICATE" in str(e) or "SSL" in str(e):
+                raise requests.exceptions.SSLError(str(e)) from e
+            raise requests.ConnectionError(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.RequestException(str(e)) from e
+        return self._to_requests_response(response)
+
+    @staticmethod
+    def _to_requests_response(response):
+        converted = requests.Response()
+        converted.status_code = response.status_code
+        converted.reason = response.reason_phrase
+        converted.headers = CaseInsensitiveDict(response.headers)
+        converted.url = str(response.url)
+        converted.encoding = response.encoding
+        converted._content = response.content
+        converted._content_consumed = True    # body is already read; iter_content() slices it
+        converted.elapsed = response.elapsed
+        return converted
+
+    def close(self):
+        self.client.close()
+
+def http2_available():
+    """httpx with its h2 extra is installed (probed without importing either)"""
+    return all(importlib.util.find_spec(name) is not None for name in ("httpx", "h2"))
+
+# ==============================
+# Shared Client
+# ==============================
+_session = None
+_session_lock = threading.Lock()
+
+def get_session(http2=None):
+    """The process-wide session, created on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                install_dns_cache()
+                http2 = USE_HTTP2 if http2 is None else http2
+                if http2 and not http2_available():
+                    print("⚠️ SCRAPER_HTTP2 is set but httpx[http2] is not installed, using HTTP/1.1")
+                    http2 = False
+                _session = Http2Session() if http2 else build_session()
+    return _session
+
+def get(url, **kwargs):
+    """GET through the shared session (pooled, keep-alive, default timeouts)"""
+    return get_session().get(url, **kwargs)
+
+def close_session():
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+atexit.register(close_session)
@@ -0,0 +1,324 @@
+﻿# image_store.py - Content-addressed local store for article images with concurrent, deduplicated fetching
+#
+#   store = image_store.get_image_store()
+#   future = store.submit(item['image_url'])     # starts the download in the background
+#   image = future.result()                      # StoredImage or None
+#
+# Each distinct URL is downloaded once (concurrent requests share one future,
+# finished ones are remembered in an LRU map) and each distinct image content
+# is resized and written once, under the SHA-256 of its bytes.
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+
+from fetch_middleware import ResilientFetcher
+from metrics import metrics
+
+# Pillow (require_pillow) is imported on the first resize
+Image = None
+
+# ==============================
+# Configuration
+# ==============================
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+
+IMAGE_WORKERS = 8                  # concurrent downloads
+MAX_IMAGE_BYTES = 5 * 1024 * 1024  # larger downloads are abandoned
+MAX_PIXELS = 40_000_000            # refuse decompression bombs
+THUMB_SIZE = (480, 320)            # thumbnails fit inside this box, aspect kept
+THUMB_QUALITY = 80
+CACHE_SIZE = 20000                 # URL -> content hash entries kept (LRU), also what is persisted
+CHUNK_SIZE = 64 * 1024
+
+# Optional public base for the stored thumbnails (e.g. a CDN or static site).
+# When set, news rows get ImageUrl = base + thumbnail path instead of the hot-linked URL.
+PUBLIC_BASE_URL = os.environ.get('NEWS_IMAGE_BASE_URL', '').rstrip('/')
+
+NOT_AN_IMAGE = ""                  # digest recorded for URLs that are too large or not decodable, so they are not retried
+
+StoredImage = namedtuple('StoredImage', ['digest', 'path', 'thumb_path', 'width', 'height', 'size'])
+
+
+def require_pillow():
+    global Image
+    if Image is None:
+        try:
+            from PIL import Image as pil_image
+        except ImportError:  # only needed for thumbnails
+            raise RuntimeError("Pillow is required for image thumbnails (pip install pillow)")
+        pil_image.MAX_IMAGE_PIXELS = MAX_PIXELS
+        Image = pil_image
+
+
+class ImageTooLargeError(Exception):
+    pass
+
+
+# ==============================
+# Store
+# ==============================
+class ImageStore:
+    """
+    Images on disk under their content hash:
+
+        images/ab/abcdef....img         original bytes as downloaded
+        images/thumbs/ab/abcdef....jpg  JPEG thumbnail within THUMB_SIZE
+
+    The URL -> digest map is an LRU of CACHE_SIZE entries saved to
+    images/index.json, so URLs seen on earlier runs are not fetched again.
+    """
+
+    def __init__(self, root=None, workers=IMAGE_WORKERS, cache_size=CACHE_SIZE, fetcher=None):
+        self.root = root or DEFAULT_STORE_DIR
+        self.index_path = os.path.join(self.root, 'index.json')
+        self.cache_size = cache_size
+        self.fetcher = fetcher or ResilientFetcher()
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._by_url = OrderedDict()     # url -> digest
+        self._images = {}                # digest -> StoredImage, for images handled in this process
+        self._in_flight = {}             # url -> Future, shared by concurrent callers
+        self._processing = {}            # digest -> Lock, so one content is resized once
+        self._pillow_missing = None
+        self.dirty = False
+        self._load_index()
+
+    # ---------- index ----------
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable image index {self.index_path}: {e}")
+            return
+        for url, digest in entries[-self.cache_size:]:
+            self._by_url[url] = digest
+
+    def save(self):
+        """Persist the URL -> digest map (oldest first, so LRU order survives)"""
+        with self._lock:
+            if not self.dirty:
+                return
+            entries = list(self._by_url.items())
+            self.dirty = False
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _remember(self, url, digest):
+        with self._lock:
+            self._by_url[url] = digest
+            self._by_url.move_to_end(url)
+            while len(self._by_url) > self.cache_size:
+                self._by_url.popitem(last=False)
+            self.dirty = True
+
+    # ---------- paths ----------
+    def original_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest + '.img')
+
+    def thumb_path(self, digest):
+        return os.path.join(self.root, 'thumbs', digest[:2], digest + '.jpg')
+
+    def public_url(self, image):
+        """Public URL of the thumbnail if NEWS_IMAGE_BASE_URL is set, else None"""
+        if not PUBLIC_BASE_URL or image is None or not image.thumb_path:
+            return None
+        return PUBLIC_BASE_URL + '/' + os.path.relpath(image.thumb_path, self.root).replace(os.sep, '/')
+
+    # ---------- fetching ----------
+    def can_store(self):
+        """Whether Pillow is installed; without it images are not fetched (or remembered) at all"""
+        if self._pillow_missing is None:
+            try:
+                require_pillow()
+                self._pillow_missing = False
+            except RuntimeError as e:
+                print(f"⚠️ {e}; article images stay hot-linked")
+                self._pillow_missing = True
+        return not self._pillow_missing
+
+    def submit(self, url):
+        """Future of the StoredImage for url (None on failure); each URL is fetched once"""
+        if not url or not url.startswith(('http://', 'https://')) or not self.can_store():
+            done = Future()
+            done.set_result(None)
+            return done
+        with self._lock:
+            digest = self._by_url.get(url)
+            if digest is not None:
+                self._by_url.move_to_end(url)
+            future = self._in_flight.get(url)
+            if future is None and digest is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image')
+                future = self._executor.submit(self._fetch, url)
+                self._in_flight[url] = future
+                future.add_done_callback(lambda _, url=url: self._finish(url))
+            elif future is not None:
+                metrics.inc('image_cache_hits_total', kind='in_flight')
+        if future is not None:
+            return future
+
+        metrics.inc('image_cache_hits_total', kind='url')
+        done = Future()
+        done.set_result(self._stored(digest))
+        return done
+
+    def _finish(self, url):
+        with self._lock:
+            self._in_flight.pop(url, None)
+
+    def get(self, url):
+        """StoredImage for url, fetching it now if needed"""
+        return self.submit(url).result()
+
+    def fetch_many(self, urls):
+        """{url: StoredImage or None}, downloading the distinct URLs concurrently"""
+        futures = {url: self.submit(url) for url in dict.fromkeys(urls)}
+        return {url: future.result() for url, future in futures.items()}
+
+    def _download(self, url):
+        with metrics.timer('image_fetch'):
+            response = self.fetcher.get(url, stream=True)
+            try:
+                response.raise_for_status()
+                declared = int(response.headers.get('Content-Length') or 0)
+                if declared > MAX_IMAGE_BYTES:
+                    raise ImageTooLargeError(f"{declared} bytes")
+                body = bytearray()
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    body += chunk
+                    if len(body) > MAX_IMAGE_BYTES:
+                        raise ImageTooLargeError(f"over {MAX_IMAGE_BYTES} bytes")
+            finally:
+                response.close()
+        metrics.inc('bytes_fetched_total', len(body), scraper='images')
+        return bytes(body)
+
+    def _fetch(self, url):
+        try:
+            data = self._download(url)
+        except ImageTooLargeError as e:
+            metrics.inc('image_errors_total', kind='too_large')
+            print(f"⏭️ Skipping image {url}: {e}")
+            self._remember(url, NOT_AN_IMAGE)
+            return None
+        except requests.RequestException as e:
+            metrics.inc('image_errors_total', kind='network')
+            print(f"⚠️ Image download failed {url}: {e}")
+            return None
+        metrics.inc('images_fetched_total')
+
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            image = self._store(digest, data)
+        except (Image.UnidentifiedImageError, Image.DecompressionBombError) as e:
+            metrics.inc('image_errors_total', kind='decode')
+            print(f"⚠️ Not a usable image {url}: {e}")
+            self._remember(url, NOT_AN_IMAGE)
+            return None
+        except OSError as e:   # truncated download or a failed write: worth another try on a later poll
+            metrics.inc('image_errors_total', kind='store')
+            print(f"⚠️ Could not store image {url}: {e}")
+            return None
+        self._remember(url, digest)
+        return image
+
+    # ---------- processing ----------
+    def _stored(self, digest):
+        """StoredImage for a digest already on disk (or None if the files are gone)"""
+        if digest == NOT_AN_IMAGE:
+            return None
+        image = self._images.get(digest)
+        if image is not None:
+            return image
+        path = self.original_path(digest)
+        if not os.path.exists(path):
+            return None
+        thumb = self.thumb_path(digest)
+        image = StoredImage(digest, path, thumb if os.path.exists(thumb) else None, None, None, os.path.getsize(path))
+        self._images[digest] = image
+        return image
+
+    def _store(self, digest, data):
+        """Write the original and its thumbnail once per distinct content"""
+        with self._lock:
+            content_lock = self._processing.setdefault(digest, threading.Lock())
+        try:
+            return self._store_once(digest, data, content_lock)
+        finally:
+            with self._lock:
+                self._processing.pop(digest, None)
+
+    def _store_once(self, digest, data, content_lock):
+        with content_lock:
+            existing = self._stored(digest)
+            if existing is not None:
+                metrics.inc('image_cache_hits_total', kind='content')
+                return existing
+
+            with metrics.timer('image_resize'):
+                require_pillow()
+                with Image.open(io.BytesIO(data)) as img:
+                    width, height = img.size
+                    img.draft('RGB', THUMB_SIZE)   # JPEG: decode straight at reduced scale
+                    img.thumbnail(THUMB_SIZE)
+                    if img.mode not in ('RGB', 'L'):
+                        img = img.convert('RGB')
+                    thumb = io.BytesIO()
+                    img.save(thumb, 'JPEG', quality=THUMB_QUALITY, optimize=True)
+
+            path = self.original_path(digest)
+            thumb_path = self.thumb_path(digest)
+            _write_atomic(path, data)
+            _write_atomic(thumb_path, thumb.getvalue())
+            metrics.inc('images_stored_total')
+            image = StoredImage(digest, path, thumb_path, width, height, len(data))
+            self._images[digest] = image
+        return image
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.save()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# ==============================
+# Shared store
+# ==============================
+_store = None
+_store_lock = threading.Lock()
+
+def get_image_store():
+    """The process-wide image store, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ImageStore()
+    return _store
+
+def close_image_store():
+    if _store is not None:
+        _store.close()
@@ -0,0 +1,61 @@
+﻿# main.py - Single entry point for the scrapers, generators and tools
+#
+#   python main.py <command> [args...]
+#
+# Only the chosen module is imported. Database connections, HTTP sessions,
+# Selenium and pyarrow are all opened/imported on first use inside it.
+import importlib
+import runpy
+import sys
+
+# ==============================
+# Commands
+# ==============================
+# command -> (module, entry function or None to run the module as __main__, description)
+COMMANDS = {
+    "scc": ("scc_scraper", None, "crawl the SCC question sites (interactive menu)"),
+    "ssc": ("ssc", "cli", "generate or import SSC MCQs (--count, --batch, --workers, --pdf, ...)"),
+    "gktoday": ("MCQPythan", None, "scrape GKToday MCQs with Selenium"),
+    "examveda": ("test", None, "scrape Examveda MCQs with Selenium"),
+    "indian-express": ("IndianExpress", None, "scrape the tech listing into Tbl_News"),
+    "business-today": ("BusinessToday", None, "scrape Business Today enterprise tech into Tbl_News"),
+    "times-of-india": ("Times_Of_india", None, "scrape Economic Times IT news into Tbl_News"),
+    "news": ("news_service", "main", "poll all news sources with adaptive intervals (--once for a single round)"),
+    "export": ("mcq_exporter", None, "Parquet export/import of the SSC MCQ bank (export | import)"),
+    "article-store": ("article_store", "main", "compressed news bodies: stats | train | migrate | show"),
+    "startup-benchmark": ("startup_benchmark", "main", "check import time and time-to-first-work budgets"),
+}
+
+def usage():
+    lines = ["usage: python main.py <command> [args...]", "", "commands:"]
+    width = max(len(name) for name in COMMANDS)
+    for name, (_, _, description) in COMMANDS.items():
+        lines.append(f"  {name:<{width}}  {description}")
+    return "\n".join(lines)
+
+def run(command, args):
+    """Run one command with args as its command line"""
+    module_name, entry, _ = COMMANDS[command]
+    sys.argv = [f"main.py {command}"] + list(args)
+    if entry is not None:
+        # Imported normally so worker processes can find its functions
+        return getattr(importlib.import_module(module_name), entry)(list(args))
+    runpy.run_module(module_name, run_name="__main__", alter_sys=True)
+    return None
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0
+    command, args = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"❌ Unknown command: {command}\n")
+        print(usage())
+        return 2
+    result = run(command, args)
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
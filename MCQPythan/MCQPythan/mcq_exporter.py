@@ -0,0 +1,127 @@
+﻿# mcq_exporter.py - Columnar (Parquet) export and bulk import of the SSC MCQ bank
+import argparse
+import glob
+import time
+
+import storage
+
+# pyarrow (require_pyarrow) is imported on first use; the database opens on export/import
+pa = pq = None
+
+# ==============================
+# Configuration
+# ==============================
+TABLE = "SSC_MCQ_Questions"
+MCQ_COLUMNS = ["Question", "OptionA", "OptionB", "OptionC", "OptionD", "Answer", "Categoery", "Course", "CREATEDDATE", "Subject"]
+
+FETCH_SIZE = 50000          # rows per fetchmany / row group
+IMPORT_BATCH_SIZE = 50000   # rows per executemany on import
+COMPRESSION = "zstd"
+
+# ==============================
+# Arrow Helpers
+# ==============================
+def require_pyarrow():
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:  # only needed for columnar export/import
+            raise RuntimeError("pyarrow is required for Parquet export/import (pip install pyarrow)")
+        pa, pq = pyarrow, pyarrow.parquet
+
+def mcq_schema():
+    require_pyarrow()
+    return pa.schema([(name, pa.timestamp("ms") if name == "CREATEDDATE" else pa.string()) for name in MCQ_COLUMNS])
+
+def columns_to_table(columns):
+    """Build an Arrow table from one list per MCQ column"""
+    schema = mcq_schema()
+    return pa.Table.from_arrays(
+        [pa.array(values, type=schema.field(name).type) for name, values in zip(MCQ_COLUMNS, columns)],
+        schema=schema,
+    )
+
+def rows_to_table(rows):
+    """Arrow table from database rows in MCQ_COLUMNS order"""
+    return columns_to_table([list(column) for column in zip(*rows)])
+
+def write_rows_parquet(rows, path):
+    """Write rows in MCQ_COLUMNS order (as generated by ssc.py) to one compressed Parquet file"""
+    require_pyarrow()
+    pq.write_table(rows_to_table(rows), path, compression=COMPRESSION)
+
+# ==============================
+# Export
+# ==============================
+def export_questions(path, fetch_size=FETCH_SIZE, repository=None):
+    """
+    Stream SSC_MCQ_Questions into a Parquet file.
+
+    The SELECT runs on a forward-only cursor and rows are pulled with
+    fetchmany, so each batch becomes one row group and memory stays at one
+    batch no matter how large the table is.
+    """
+    require_pyarrow()
+    repository = repository or storage.get_repository("MCQ")
+    started = time.perf_counter()
+    total = 0
+    with pq.ParquetWriter(path, mcq_schema(), compression=COMPRESSION) as writer:
+        for rows in repository.iter_rows(TABLE, MCQ_COLUMNS, fetch_size):
+            writer.write_table(rows_to_table(rows))
+            total += len(rows)
+            print(f"Exported {total:,} rows...")
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Exported {total:,} rows to {path} in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/sec)")
+    return total
+
+# ==============================
+# Import
+# ==============================
+def import_questions(paths, batch_size=IMPORT_BATCH_SIZE, repository=None):
+    """Bulk-load Parquet files (exported or generated) into SSC_MCQ_Questions"""
+    require_pyarrow()
+    repository = repository or storage.get_repository("MCQ")
+    started = time.perf_counter()
+    total = 0
+    for path in paths:
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=MCQ_COLUMNS):
+            rows = list(zip(*(batch.column(name).to_pylist() for name in MCQ_COLUMNS)))
+            try:
+                repository.insert_mcqs(MCQ_COLUMNS, rows)
+                repository.commit()
+            except storage.StorageError as e:
+                print(f"❌ Failed to import a batch of {len(rows):,} rows from {path}: {e}")
+                raise
+            total += len(rows)
+        print(f"Imported {path} (Total: {total:,})")
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Imported {total:,} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/sec)")
+    return total
+
+# ==============================
+# Main Execution
+# ==============================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export/import the SSC MCQ bank as Parquet")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="dump SSC_MCQ_Questions to a Parquet file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--fetch-size", type=int, default=FETCH_SIZE)
+
+    import_parser = subparsers.add_parser("import", help="bulk-load Parquet files into SSC_MCQ_Questions")
+    import_parser.add_argument("paths", nargs="+", help="files or glob patterns")
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_questions(args.path, args.fetch_size)
+    else:
+        paths = sorted(path for pattern in args.paths for path in glob.glob(pattern))
+        import_questions(paths, args.batch_size)
+    storage.close_all()
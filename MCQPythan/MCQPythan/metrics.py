@@ -0,0 +1,240 @@
+﻿# metrics.py - Lightweight timers, counters and latency histograms shared by the scrapers
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency buckets in seconds (Prometheus style, cumulative on export)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Set to a port number to serve live metrics while a scraper runs
+METRICS_PORT_ENV = 'SCRAPER_METRICS_PORT'
+
+METRIC_PREFIX = 'scraper_'
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(label_key, extra=None):
+    pairs = list(label_key) + (extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+class Histogram:
+    """Count, sum, min/max and bucket counts of observed values"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Approximate quantile from the bucket boundaries"""
+        if not self.count:
+            return None
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.bucket_counts):
+            running += count
+            if running >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.total, 6),
+            'avg': round(self.total / self.count, 6) if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe collection of counters, gauges and histograms for one process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._server = None
+
+    # ---------- recording ----------
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """Time a block into the stage_duration_seconds histogram"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_duration_seconds', time.perf_counter() - started, stage=stage, **labels)
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    # ---------- export ----------
+    def _derived_gauges(self):
+        """Run duration plus a per-second rate for every *_total counter"""
+        elapsed = max(time.time() - self.started, 1e-9)
+        derived = {('run_duration_seconds', ()): round(elapsed, 3)}
+        for (name, labels), value in self.counters.items():
+            if name.endswith('_total'):
+                derived[(name[:-len('_total')] + '_per_second', labels)] = round(value / elapsed, 3)
+        return derived
+
+    def snapshot(self):
+        with self._lock:
+            gauges = dict(self.gauges)
+            gauges.update(self._derived_gauges())
+
+            def flatten(items, convert=lambda v: v):
+                return [{'name': name, 'labels': dict(labels), 'value': convert(value)} for (name, labels), value in sorted(items)]
+
+            return {
+                'started': self.started,
+                'counters': flatten(self.counters.items()),
+                'gauges': flatten(gauges.items()),
+                'histograms': flatten(self.histograms.items(), Histogram.to_dict),
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            gauges = dict(self.gauges)
+            gauges.update(self._derived_gauges())
+
+            for kind, items in (('counter', self.counters), ('gauge', gauges)):
+                declared = set()
+                for (name, labels), value in sorted(items.items()):
+                    full_name = METRIC_PREFIX + name
+                    if full_name not in declared:
+                        lines.append(f'# TYPE {full_name} {kind}')
+                        declared.add(full_name)
+                    lines.append(f'{full_name}{_format_labels(labels)} {value}')
+
+            declared = set()
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                full_name = METRIC_PREFIX + name
+                if full_name not in declared:
+                    lines.append(f'# TYPE {full_name} histogram')
+                    declared.add(full_name)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{full_name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{full_name}_bucket{_format_labels(labels, [("le", "+Inf")])} {histogram.count}')
+                lines.append(f'{full_name}_sum{_format_labels(labels)} {histogram.total}')
+                lines.append(f'{full_name}_count{_format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, name, directory='.'):
+        """Write <name>_metrics.json and <name>_metrics.prom and return their paths"""
+        json_path = os.path.join(directory, f'{name}_metrics.json')
+        prom_path = os.path.join(directory, f'{name}_metrics.prom')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+        with open(prom_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        return json_path, prom_path
+
+    def summary_lines(self):
+        """Short human-readable per-stage timing summary"""
+        lines = []
+        with self._lock:
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                stats = histogram.to_dict()
+                label_text = ', '.join(f'{k}={v}' for k, v in labels)
+                lines.append(f"  {label_text or name}: {stats['count']}x, total {stats['sum']:.2f}s, "
+                             f"avg {stats['avg']:.3f}s, p95 <= {stats['p95']:.3f}s")
+        return lines
+
+    # ---------- live endpoint ----------
+    def start_http_server(self, port, host='127.0.0.1'):
+        """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread"""
+        if self._server is not None:
+            return self._server
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics.json'):
+                    body, content_type = registry.to_json(), 'application/json'
+                elif self.path.startswith('/metrics'):
+                    body, content_type = registry.to_prometheus(), 'text/plain; version=0.0.4'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        return self._server
+
+    def maybe_start_http_server(self):
+        """Start the live endpoint if SCRAPER_METRICS_PORT is set"""
+        port = os.environ.get(METRICS_PORT_ENV)
+        if port:
+            self.start_http_server(int(port))
+            print(f"📈 Live metrics on http://127.0.0.1:{port}/metrics")
+
+
+# Process-wide registry used by all scrapers
+metrics = MetricsRegistry()
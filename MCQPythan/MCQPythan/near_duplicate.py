@@ -0,0 +1,234 @@
+﻿# near_duplicate.py - MinHash/LSH index for corpus-wide near-duplicate question detection
+import os
+import pickle
+import random
+import re
+import threading
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+    import fcntl
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'near_duplicates.lsh')
+
+NUM_PERM = 64          # MinHash signature length
+BANDS = 16             # LSH bands (NUM_PERM / BANDS rows per band)
+SHINGLE_SIZE = 3       # words per shingle
+THRESHOLD = 0.7        # estimated Jaccard similarity that counts as a duplicate
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_QUESTION_NUMBER = re.compile(r'^\s*(?:q(?:uestion)?\.?\s*)?\d+\s*[.):-]?\s*', re.I)
+_NON_WORD = re.compile(r'[^\w\s]+')
+
+LOCK_POLL_SECONDS = 0.05
+
+# ==================== TEXT PREPARATION ====================
+def normalize_text(text):
+    """Lowercase, drop leading question numbers like 'Q.12' and punctuation"""
+    text = _QUESTION_NUMBER.sub('', (text or '').lower())
+    return _NON_WORD.sub(' ', text).split()
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """32-bit hashes of the word shingles of a text"""
+    words = normalize_text(text)
+    if len(words) <= size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))}
+    return {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)}
+
+# ==================== LSH INDEX ====================
+class NearDuplicateIndex:
+    """
+    MinHash signatures bucketed by LSH bands.
+
+    Signatures are kept in one flat array('I') so the index stays compact in
+    memory and on disk; the band buckets are rebuilt from it on load. A query
+    hashes the candidate once, looks up its bands and compares signatures only
+    for the few documents that share a bucket.
+
+    Several scripts share the file: save() merges with what is on disk under
+    a lock file instead of overwriting it, and `seeded` records which tables
+    have already been indexed from the database.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, threshold=THRESHOLD, path=None, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.path = path or DEFAULT_INDEX_PATH
+        self.seed = seed
+
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+
+        self.keys = []
+        self.signatures = array('I')
+        self.buckets = [{} for _ in range(bands)]
+        self.seeded = set()        # source tables whose existing rows are in the index
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def empty_copy(self):
+        """New empty index with compatible signatures, e.g. for checks within one page"""
+        return NearDuplicateIndex(self.num_perm, self.bands, self.threshold, self.path, self.seed)
+
+    # ---------- signatures ----------
+    def signature(self, text):
+        """MinHash signature of a text as a tuple of num_perm 32-bit ints"""
+        hashes = shingle_hashes(text)
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [hash(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def _stored_signature(self, doc_id):
+        start = doc_id * self.num_perm
+        return self.signatures[start:start + self.num_perm]
+
+    # ---------- queries ----------
+    def query_signature(self, signature):
+        """Return (key, similarity) of the closest indexed document above threshold, or None"""
+        with self._lock:
+            candidates = set()
+            for bucket, band_key in zip(self.buckets, self._band_keys(signature)):
+                doc_ids = bucket.get(band_key)
+                if doc_ids:
+                    candidates.update(doc_ids)
+
+            best = None
+            for doc_id in candidates:
+                stored = self._stored_signature(doc_id)
+                similarity = sum(1 for x, y in zip(stored, signature) if x == y) / self.num_perm
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (self.keys[doc_id], similarity)
+            return best
+
+    def query(self, text):
+        """Return the key of a near-duplicate of text already in the index, or None"""
+        match = self.query_signature(self.signature(text))
+        return match[0] if match else None
+
+    # ---------- updates ----------
+    def add_signature(self, key, signature):
+        with self._lock:
+            doc_id = len(self.keys)
+            self.keys.append(key)
+            self.signatures.extend(signature)
+            for bucket, band_key in zip(self.buckets, self._band_keys(signature)):
+                bucket.setdefault(band_key, []).append(doc_id)
+            self.dirty = True
+
+    def add(self, key, text):
+        self.add_signature(key, self.signature(text))
+
+    def check_and_add(self, key, text):
+        """Add text unless a near-duplicate exists; return the existing key in that case"""
+        signature = self.signature(text)
+        match = self.query_signature(signature)
+        if match:
+            return match[0]
+        self.add_signature(key, signature)
+        return None
+
+    def mark_seeded(self, table):
+        with self._lock:
+            self.seeded.add(table)
+            self.dirty = True
+
+    def _rebuild_buckets(self):
+        self.buckets = [{} for _ in range(self.bands)]
+        for doc_id in range(len(self.keys)):
+            for bucket, band_key in zip(self.buckets, self._band_keys(tuple(self._stored_signature(doc_id)))):
+                bucket.setdefault(band_key, []).append(doc_id)
+
+    # ---------- persistence ----------
+    def _merge_from(self, payload):
+        """Add the entries of a saved payload whose keys this index does not have"""
+        known = set(self.keys)
+        stored = array('I')
+        stored.frombytes(payload['signatures'])
+        added = False
+        for doc_id, key in enumerate(payload['keys']):
+            if key not in known:
+                known.add(key)
+                self.keys.append(key)
+                self.signatures.extend(stored[doc_id * self.num_perm:(doc_id + 1) * self.num_perm])
+                added = True
+        self.seeded |= set(payload.get('seeded', ()))
+        if added:
+            self._rebuild_buckets()
+
+    def save(self, path=None):
+        """Merge with the file as other processes left it, then write atomically; buckets are rebuilt on load"""
+        path = path or self.path
+        with file_lock(path + '.lock'), self._lock:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    self._merge_from(pickle.load(f))
+            payload = {
+                'num_perm': self.num_perm, 'bands': self.bands, 'threshold': self.threshold, 'seed': self.seed,
+                'keys': self.keys, 'signatures': self.signatures.tobytes(), 'seeded': sorted(self.seeded),
+            }
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path=None):
+        """Load an index from disk, or start an empty one if the file does not exist"""
+        path = path or DEFAULT_INDEX_PATH
+        if not os.path.exists(path):
+            return cls(path=path)
+
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+        index = cls(num_perm=payload['num_perm'], bands=payload['bands'], threshold=payload['threshold'],
+                    path=path, seed=payload['seed'])
+        index.keys = payload['keys']
+        index.signatures.frombytes(payload['signatures'])
+        index.seeded = set(payload.get('seeded', ()))
+        index._rebuild_buckets()
+        return index
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Exclusive lock on lock_path between processes (msvcrt on Windows, flock elsewhere)"""
+    with open(lock_path, 'a+b') as f:
+        if msvcrt is not None:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(LOCK_POLL_SECONDS)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,339 @@
+﻿# news_service.py - Long-running news poller with adaptive per-source refresh intervals
+#
+#   python news_service.py [--once] [--source times_of_india ...]
+#
+# Each registered source module exposes scrape_listing() -> items,
+# fetch_article(item) -> article or None and insert_article(item, article).
+# Listings are polled concurrently; only items not seen before are fetched
+# in full. A source's poll interval follows its observed story arrival rate.
+# Images of new items are downloaded into the local image store meanwhile.
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import image_store
+import storage
+import story_index
+from metrics import metrics
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'news_service_state.json')
+
+# ==============================
+# Configuration
+# ==============================
+# name -> module implementing the source
+SOURCES = {
+    "indian_express": "IndianExpress",
+    "business_today": "BusinessToday",
+    "times_of_india": "Times_Of_india",
+}
+
+MIN_INTERVAL = 120             # seconds; never poll a listing faster than this
+MAX_INTERVAL = 3600            # seconds; quiet sources are still checked hourly
+INITIAL_INTERVAL = 600         # until an arrival rate has been measured
+TARGET_NEW_PER_POLL = 2        # aim for about this many new stories per poll
+RATE_SMOOTHING = 0.3           # EWMA weight of the latest poll's arrival rate
+IDLE_BACKOFF = 1.5             # interval growth while no story has arrived yet, or after a failed listing fetch
+INTERVAL_JITTER = 0.1          # +/- fraction so sources do not poll in lockstep
+ARTICLE_DELAY_SECONDS = 1.0    # pause between article fetches of one source
+MAX_SEEN_PER_SOURCE = 5000     # remembered item URLs per source
+MAX_ITEM_ATTEMPTS = 3          # give up on an item that keeps failing
+
+
+# ==============================
+# Sources
+# ==============================
+class NewsSource:
+    """One news module plus its poll schedule and the item URLs it has already handled"""
+
+    def __init__(self, name, module_name, state=None):
+        state = state or {}
+        self.name = name
+        self.module_name = module_name
+        self._module = None
+        self.interval = state.get('interval', INITIAL_INTERVAL)
+        self.rate = state.get('rate')              # new stories per second (EWMA)
+        self.last_poll = state.get('last_poll')    # epoch seconds of the last successful poll
+        self.seen = dict.fromkeys(state.get('seen', []))
+        self.attempts = {}
+        self.lock = threading.Lock()   # seen/attempts are saved from the main thread while a poll runs
+
+    @property
+    def module(self):
+        """The scraper module, imported on first poll"""
+        if self._module is None:
+            self._module = importlib.import_module(self.module_name)
+        return self._module
+
+    def new_items(self, items):
+        """Listing items whose URL has not been handled yet, in listing order"""
+        new = {}
+        for item in items:
+            if item['url'] not in self.seen and item['url'] not in new:
+                new[item['url']] = item
+        return list(new.values())
+
+    def mark_seen(self, url):
+        with self.lock:
+            self.attempts.pop(url, None)
+            self.seen[url] = None
+            while len(self.seen) > MAX_SEEN_PER_SOURCE:
+                del self.seen[next(iter(self.seen))]
+
+    def record_failure(self, url):
+        """Count a failed item; after MAX_ITEM_ATTEMPTS it is marked seen and dropped"""
+        with self.lock:
+            self.attempts[url] = self.attempts.get(url, 0) + 1
+            gave_up = self.attempts[url] >= MAX_ITEM_ATTEMPTS
+        if gave_up:
+            self.mark_seen(url)
+        return gave_up
+
+    def update_interval(self, new_count, polled_at):
+        """
+        Fold this poll's arrival rate into the EWMA and aim the next poll at
+        TARGET_NEW_PER_POLL new stories. Empty polls decay the rate, so the
+        interval stretches on its own when a source goes quiet.
+        """
+        if self.last_poll is not None:
+            elapsed = max(polled_at - self.last_poll, 1.0)
+            observed = new_count / elapsed
+            self.rate = observed if self.rate is None else RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * self.rate
+            if self.rate > 0:
+                self.interval = TARGET_NEW_PER_POLL / self.rate
+            else:
+                self.interval *= IDLE_BACKOFF
+        self.interval = min(MAX_INTERVAL, max(MIN_INTERVAL, self.interval))
+        self.last_poll = polled_at
+
+    def record_poll_failure(self):
+        self.interval = min(MAX_INTERVAL, self.interval * IDLE_BACKOFF)
+
+    def next_delay(self):
+        return self.interval * random.uniform(1 - INTERVAL_JITTER, 1 + INTERVAL_JITTER)
+
+    def to_state(self):
+        with self.lock:
+            seen = list(self.seen)
+        return {'interval': round(self.interval, 1), 'rate': self.rate, 'last_poll': self.last_poll, 'seen': seen}
+
+
+# ==============================
+# Service
+# ==============================
+class NewsService:
+    """Polls every source on its own schedule; article inserts share one DB lock"""
+
+    def __init__(self, sources=None, state_path=DEFAULT_STATE_PATH, logger=None):
+        self.state_path = state_path
+        self.logger = logger or logging.getLogger(__name__)
+        state = self.load_state()
+        self.sources = [NewsSource(name, module_name, state.get(name))
+                        for name, module_name in (sources or SOURCES).items()]
+        # The scrapers share one database connection, which must not be used from two threads at once
+        self.db_lock = threading.RLock()
+        self.state_lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    # ---------- state ----------
+    def load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return json.load(f).get('sources', {})
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"⚠️ Ignoring unreadable state file {self.state_path}: {e}")
+            return {}
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        with self.state_lock:
+            state = {'sources': {source.name: source.to_state() for source in self.sources}}
+            tmp_path = self.state_path + '.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.state_path)
+            except OSError as e:
+                self.logger.warning(f"⚠️ Could not save state: {e}")
+
+    # ---------- polling ----------
+    def poll_source(self, source):
+        """Read one listing, fetch and insert its new items; returns the number inserted"""
+        polled_at = time.time()
+        try:
+            with metrics.timer('poll', scraper=source.name):
+                items = source.module.scrape_listing()
+        except Exception as e:
+            source.record_poll_failure()
+            metrics.inc('poll_errors_total', scraper=source.name)
+            self.logger.warning(f"⚠️ {source.name}: listing failed: {e}")
+            return 0
+
+        new_items = source.new_items(items)
+        fresh_count = sum(1 for item in new_items if item['url'] not in source.attempts)
+        metrics.inc('polls_total', scraper=source.name)
+        metrics.inc('new_items_total', fresh_count, scraper=source.name)
+        self.logger.info(f"🔍 {source.name}: {len(items)} listed, {len(new_items)} new")
+
+        # Image downloads run in the background while the articles are fetched;
+        # stories already stored under another URL are linked, so their images are not needed
+        images = image_store.get_image_store()
+        image_futures = {
+            item['url']: images.submit(item.get('image_url'))
+            for item in new_items if story_index.find_duplicate(item) is None
+        }
+
+        inserted = 0
+        fetched = 0
+        for item in new_items:
+            if self.stop_event.is_set():
+                break
+            url = item['url']
+            try:
+                # Same story already stored from another source: link it instead of fetching it again
+                if self.link_if_duplicate(source, item):
+                    source.mark_seen(url)
+                    continue
+
+                if fetched:
+                    self.stop_event.wait(ARTICLE_DELAY_SECONDS)
+                fetched += 1
+                article = source.module.fetch_article(item)
+                if article is None:
+                    if source.record_failure(url):
+                        self.logger.info(f"⏭️ {source.name}: giving up on {url}")
+                    continue
+                image_future = image_futures.get(url) or images.submit(item.get('image_url'))
+                stored_url = images.public_url(image_future.result())
+                if stored_url:
+                    item['image_url'] = stored_url
+                with self.db_lock:
+                    # Another source may have stored the story while this one was fetching
+                    saved = not self.link_if_duplicate(source, item) and source.module.insert_article(item, article)
+                    if saved:
+                        story_index.remember_story(source.name, item)
+            except Exception as e:
+                metrics.inc('item_errors_total', scraper=source.name)
+                self.logger.warning(f"⚠️ {source.name}: {url}: {e}")
+                source.record_failure(url)
+                continue
+            source.mark_seen(url)
+            if saved:
+                inserted += 1
+                self.logger.info(f"✅ {source.name}: {item['title']}")
+
+        source.update_interval(fresh_count, polled_at)
+        metrics.set_gauge('poll_interval_seconds', round(source.interval, 1), scraper=source.name)
+        return inserted
+
+    def link_if_duplicate(self, source, item):
+        """Record a link and return True if the story is already stored under another URL"""
+        match = story_index.find_duplicate(item)
+        if match is None:
+            return False
+        with self.db_lock:
+            story_index.link_duplicate(source.name, item, match)
+        return True
+
+    def first_due(self, source, now):
+        """Resume the persisted schedule: due one interval after the last poll"""
+        if source.last_poll is None:
+            return now
+        return now + max(0.0, source.last_poll + source.interval - time.time())
+
+    def run(self, once=False):
+        """Poll until stopped (or each source once with once=True)"""
+        now = time.monotonic()
+        due = {source.name: now if once else self.first_due(source, now) for source in self.sources}
+        in_flight = {}
+        finished = set()
+
+        with ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix='news-poll') as executor:
+            try:
+                while not self.stop_event.is_set():
+                    now = time.monotonic()
+                    for source in self.sources:
+                        if source.name not in in_flight and source.name not in finished and due[source.name] <= now:
+                            in_flight[source.name] = (source, executor.submit(self.poll_source, source))
+
+                    for name, (source, future) in list(in_flight.items()):
+                        if not future.done():
+                            continue
+                        del in_flight[name]
+                        try:
+                            future.result()
+                        except Exception as e:
+                            self.logger.error(f"❌ {name}: poll crashed: {e}")
+                        storage.commit_all()   # rows first, then the state that says they are stored
+                        self.save_state()
+                        story_index.save_story_index()
+                        image_store.get_image_store().save()
+                        if once:
+                            finished.add(name)
+                            continue
+                        delay = source.next_delay()
+                        due[name] = time.monotonic() + delay
+                        self.logger.info(f"⏱️ {name}: next poll in {delay / 60:.1f} min")
+
+                    if once and len(finished) == len(self.sources):
+                        break
+                    waiting = [due[s.name] for s in self.sources if s.name not in in_flight and s.name not in finished]
+                    timeout = min(waiting, default=now + 1.0) - time.monotonic()
+                    self.stop_event.wait(min(max(timeout, 0.05), 1.0))
+            except KeyboardInterrupt:
+                self.logger.info("🛑 Stopping, waiting for in-flight polls...")
+                self.stop_event.set()
+
+        storage.commit_all()
+        self.save_state()
+        story_index.save_story_index()
+        image_store.close_image_store()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+# ==============================
+# Main Execution
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Poll the news sources with adaptive refresh intervals")
+    parser.add_argument("--once", action="store_true", help="poll every source once and exit")
+    parser.add_argument("--source", action="append", choices=sorted(SOURCES), help="only poll these sources")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="schedule and seen-items state file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('news_service.log', encoding='utf-8'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    metrics.maybe_start_http_server()
+
+    sources = {name: SOURCES[name] for name in args.source} if args.source else SOURCES
+    service = NewsService(sources, args.state)
+    print(f"📰 News service: {', '.join(sources)}")
+    try:
+        service.run(once=args.once)
+    finally:
+        storage.close_all()
+        json_path, prom_path = metrics.export('news_service')
+        print(f"📈 Metrics written to {json_path} and {prom_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,25 @@
 ﻿# scc_web_scraper.py - Complete All-in-One Solution with SQL Server
 import requests
 from bs4 import BeautifulSoup
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, func, select
+from sqlalchemy import create_engine, event, Column, Integer, String, Text, DateTime, func, select, update, delete
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import declarative_base, Session
-from datetime import datetime
-import time
+from datetime import datetime, timedelta
+import atexit
 import logging
 import sys
 import re
-import random
+import hashlib
+import threading
 import urllib.parse
+from category_classifier import CategoryClassifier
+from crawl_scheduler import DomainScheduler
+from fetch_middleware import ResilientFetcher, HostUnavailableError
+import http_client
+import storage
+from near_duplicate import NearDuplicateIndex
+from metrics import metrics
 
 # ==================== DATABASE SETUP (SQLAlchemy 2.0 + SQL Server) ====================
 Base = declarative_base()
@@ -27,64 +37,231 @@ class QuestionAnswer(Base):
     def __repr__(self):
         return f"<QuestionAnswer(question='{self.question[:50]}...')>"
 
+class QAStat(Base):
+    """Running record counts per dimension, maintained alongside inserts"""
+    __tablename__ = 'questions_answers_stats'
+
+    dimension = Column(String(20), primary_key=True)   # 'total', 'category', 'domain' or 'meta'
+    stat_key = Column(String(200), primary_key=True)
+    record_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<QAStat({self.dimension}:{self.stat_key}={self.record_count})>"
+
+class CrawlState(Base):
+    """Outcome of the last fetch of every URL, including ones that yielded nothing"""
+    __tablename__ = 'crawl_state'
+
+    url_hash = Column(String(64), primary_key=True)   # sha256 of the URL
+    url = Column(String(500), nullable=False)
+    status = Column(String(20), nullable=False, index=True)   # 'ok', 'empty', 'dead' or 'error'
+    http_code = Column(Integer)
+    content_hash = Column(String(64))
+    last_fetched = Column(DateTime, index=True)
+    row_yield = Column(Integer, default=0)
+    failure_count = Column(Integer, default=0)
+
+    def __repr__(self):
+        return f"<CrawlState({self.status} {self.http_code} {self.url[:50]})>"
+
+# How long to wait before fetching a URL again, by its last crawl status
+RECRAWL_POLICY = {
+    'ok': timedelta(days=30),      # produced rows; a recrawl only re-parses if the content changed
+    'empty': timedelta(days=7),    # fetched fine but no Q&A pairs found
+    'dead': timedelta(days=30),    # 404/410 or certificate errors
+    'error': timedelta(hours=1),   # transient failures, backed off exponentially
+}
+MAX_ERROR_BACKOFF = timedelta(days=7)
+
+# HTTP codes that mark a URL as dead rather than temporarily failing
+DEAD_HTTP_CODES = {400, 401, 403, 404, 410, 451}
+
+def url_hash(url):
+    """Stable key for crawl_state lookups"""
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+def recrawl_interval(status, failure_count=0):
+    """Time to wait after a fetch with the given status"""
+    interval = RECRAWL_POLICY.get(status, RECRAWL_POLICY['error'])
+    if status == 'error' and failure_count:
+        interval = min(interval * (2 ** (failure_count - 1)), MAX_ERROR_BACKOFF)
+    return interval
+
+# How often the stats table is rebuilt from questions_answers to correct drift
+STATS_RECONCILE_INTERVAL = timedelta(hours=24)
+
+# Number of domains crawled at the same time by run_scraper
+CRAWL_CONCURRENCY = 4
+
+# MCQ database on the configured storage backend (SQL Server, or SQLite with STORAGE_BACKEND=sqlite)
+DEFAULT_DATABASE_URL = storage.get_repository("MCQ").sqlalchemy_url()
+
+# Connection pool tuning for the long-lived engine
+POOL_SIZE = 5
+POOL_MAX_OVERFLOW = 10
+POOL_RECYCLE_SECONDS = 1800
+
+def get_domain(url):
+    """Return the host part of a source URL"""
+    if not url:
+        return 'Unknown'
+    return urllib.parse.urlparse(url).netloc or 'Unknown'
+
+# ==================== PROCESS-WIDE CONTEXT ====================
+_engines = {}
+_engines_lock = threading.Lock()
+_logging_configured = False
+_scraper = None
+
+def get_engine(database_url, logger=None):
+    """Return the pooled engine for database_url, connecting and verifying the schema only once per process"""
+    with _engines_lock:
+        engine = _engines.get(database_url)
+        if engine is not None:
+            return engine
+
+        logger = logger or logging.getLogger(__name__)
+        try:
+            if make_url(database_url).get_backend_name() == 'sqlite':
+                engine = create_engine(database_url, pool_pre_ping=True)
+                event.listen(engine, "connect", lambda dbapi_conn, _: storage.apply_sqlite_pragmas(dbapi_conn))
+            else:
+                engine = create_engine(
+                    database_url,
+                    pool_size=POOL_SIZE,
+                    max_overflow=POOL_MAX_OVERFLOW,
+                    pool_recycle=POOL_RECYCLE_SECONDS,
+                    pool_pre_ping=True
+                )
+
+            # Test connection
+            with engine.connect():
+                logger.info(f"✅ Successfully connected to the {engine.dialect.name} database")
+
+            # Create tables if they don't exist
+            Base.metadata.create_all(engine)
+            logger.info("✅ Database tables verified/created")
+
+        except Exception as e:
+            logger.error(f"❌ Database connection failed: {e}")
+            logger.info("💡 Troubleshooting tips:")
+            logger.info("1. Make sure SQL Server is running")
+            logger.info("2. Check if ODBC Driver 17 for SQL Server is installed")
+            logger.info("3. Verify username/password and database name")
+            raise
+
+        _engines[database_url] = engine
+        return engine
+
+def dispose_engine(database_url):
+    """Close all pooled connections of an engine and forget it"""
+    with _engines_lock:
+        engine = _engines.pop(database_url, None)
+    if engine is not None:
+        engine.dispose()
+
+def get_scraper(database_url=None):
+    """Return the process-wide scraper so menu actions reuse one engine, session and index"""
+    global _scraper
+    if _scraper is None or _scraper.database_url != (database_url or DEFAULT_DATABASE_URL):
+        if _scraper is not None:
+            _scraper.close()
+        _scraper = SCCWebScraper(database_url)
+    return _scraper
+
+def close_scraper():
+    """Close the process-wide scraper, if one was created"""
+    global _scraper
+    if _scraper is not None:
+        _scraper.close()
+        _scraper = None
+
 # ==================== WEB SCRAPER CLASS ====================
 class SCCWebScraper:
     def __init__(self, database_url=None):
+        self._fetched = {}                     # url -> (http code, content hash) until its rows are saved
+        self._fetched_lock = threading.Lock()
         self.setup_logging()
         self.setup_database(database_url)
         self.setup_session()
+        self.setup_classifier()
+        self.setup_dedupe_index()
         self.logger.info("SCC Web Scraper initialized successfully")
     
     def setup_logging(self):
-        """Setup logging configuration"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('scc_scraping.log', encoding='utf-8'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        """Setup logging configuration once per process"""
+        global _logging_configured
+        if not _logging_configured:
+            logging.basicConfig(
+                level=logging.INFO,
+                format='%(asctime)s - %(levelname)s - %(message)s',
+                handlers=[
+                    logging.FileHandler('scc_scraping.log', encoding='utf-8'),
+                    logging.StreamHandler(sys.stdout)
+                ]
+            )
+            _logging_configured = True
         self.logger = logging.getLogger(__name__)
     
     def setup_database(self, database_url):
-        """Setup SQL Server database connection"""
-        try:
-            # Use provided database URL or create default for SQL Server
-            if database_url is None:
-                # SQL Server connection string for your database
-                database_url = "mssql+pyodbc://sa:123456@./MCQ?driver=ODBC+Driver+17+for+SQL+Server"
-            
-            self.engine = create_engine(database_url)
-            
-            # Test connection
-            with self.engine.connect() as conn:
-                self.logger.info("✅ Successfully connected to SQL Server database")
-            
-            # Create tables if they don't exist
-            Base.metadata.create_all(self.engine)
-            self.logger.info("✅ Database tables verified/created")
-            
-        except Exception as e:
-            self.logger.error(f"❌ Database connection failed: {e}")
-            self.logger.info("💡 Troubleshooting tips:")
-            self.logger.info("1. Make sure SQL Server is running")
-            self.logger.info("2. Check if ODBC Driver 17 for SQL Server is installed")
-            self.logger.info("3. Verify username/password and database name")
-            raise
+        """Remember the database URL; the pooled engine is created and verified on first use"""
+        self.database_url = database_url or DEFAULT_DATABASE_URL
+        self._engine = None
+        self._engine_lock = threading.Lock()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    engine = get_engine(self.database_url, self.logger)
+                    self.seed_dedupe_index(engine)
+                    self._engine = engine
+        return self._engine
     
+    def connect(self):
+        """Connect now rather than on the first query, so a down database fails before any crawling"""
+        return self.engine
+
     def setup_session(self):
-        """Setup requests session with headers"""
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
-    
+        """Use the shared pooled session (browser headers, keep-alive, timeouts)"""
+        self.session = http_client.get_session()
+        self.fetcher = ResilientFetcher(self.session, logger=self.logger)
+
+    def setup_classifier(self, taxonomy_path=None):
+        """Compile the category taxonomy from its config file"""
+        self.classifier = CategoryClassifier.from_config(taxonomy_path)
+
+    def setup_dedupe_index(self, index_path=None):
+        """Load the corpus-wide near-duplicate index (seeded from the database on first connect)"""
+        self.dedupe_index = NearDuplicateIndex.load(index_path)
+
+    def seed_dedupe_index(self, engine):
+        """Index the stored Q&A pairs once per index file, whatever other scripts have already added to it"""
+        table = QuestionAnswer.__tablename__
+        if table in self.dedupe_index.seeded:
+            return
+
+        known = set(self.dedupe_index.keys)
+        added = 0
+        session = Session(engine)
+        try:
+            rows = session.execute(
+                select(QuestionAnswer.id, QuestionAnswer.question, QuestionAnswer.answer)
+                .execution_options(yield_per=1000)
+            )
+            for qa_id, question, answer in rows:
+                key = f"qa:{qa_id}"
+                if key not in known:
+                    self.dedupe_index.add(key, f"{question} {answer}")
+                    added += 1
+        finally:
+            session.close()
+        self.dedupe_index.mark_seeded(table)
+        self.dedupe_index.save()
+        self.logger.info(f"🧬 Near-duplicate index seeded with {added} stored Q&A pairs")
+
     def scrape_website(self, url, selectors=None):
         """
         Main method to scrape questions and answers from a URL
@@ -97,15 +274,27 @@ class SCCWebScraper:
         
         try:
             # Fetch the webpage
-            response = self.session.get(url, timeout=15)
+            with metrics.timer('fetch', scraper='scc'):
+                response = self.fetcher.get(url, timeout=15)
+            metrics.inc('pages_fetched_total', scraper='scc', status=response.status_code)
+            metrics.inc('bytes_fetched_total', len(response.content), scraper='scc')
             response.raise_for_status()
-            
+
+            # Skip parsing when the page is byte-for-byte what we saw last time
+            content_hash = hashlib.sha256(response.content).hexdigest()
+            previous = self.get_crawl_states([url]).get(url)
+            if previous and previous.content_hash == content_hash and previous.status in ('ok', 'empty'):
+                self.logger.info(f"♻️ Content unchanged since last crawl: {url}")
+                self.record_crawl_state(url, previous.status, response.status_code, content_hash, previous.row_yield)
+                return []
+
             # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
+            with metrics.timer('parse', scraper='scc'):
+                soup = BeautifulSoup(response.content, 'html.parser')
+
+                # Remove script and style elements
+                for script in soup(["script", "style", "nav", "footer", "header"]):
+                    script.decompose()
             
             # Try different scraping strategies
             strategies = [
@@ -117,22 +306,57 @@ class SCCWebScraper:
             
             all_qa_data = []
             for strategy in strategies:
-                qa_data = strategy(soup, selectors or {}, url)
+                with metrics.timer('strategy', scraper='scc', strategy=strategy.__name__):
+                    qa_data = strategy(soup, selectors or {}, url)
+                metrics.inc('qa_pairs_found_total', len(qa_data), scraper='scc', strategy=strategy.__name__)
                 if qa_data:
                     all_qa_data.extend(qa_data)
                     self.logger.info(f"Strategy {strategy.__name__} found {len(qa_data)} Q&A pairs")
             
             # Remove duplicates
-            unique_qa_data = self.remove_duplicates(all_qa_data)
+            with metrics.timer('dedupe', scraper='scc'):
+                unique_qa_data = self.remove_duplicates(all_qa_data)
             self.logger.info(f"✅ Total unique Q&A pairs found: {len(unique_qa_data)}")
-            
+
+            # Categorize the whole page in one batch
+            with metrics.timer('classify', scraper='scc'):
+                categories = self.classifier.classify_batch((qa['source_url'], qa['question']) for qa in unique_qa_data)
+            for qa, category in zip(unique_qa_data, categories):
+                qa['category'] = category
+
+            if unique_qa_data:
+                # Recorded by finish_crawl once the rows are saved, so a failed save is retried
+                with self._fetched_lock:
+                    self._fetched[url] = (response.status_code, content_hash)
+            else:
+                self.record_crawl_state(url, 'empty', response.status_code, content_hash)
             return unique_qa_data
-            
+
+        except HostUnavailableError as e:
+            metrics.inc('fetch_errors_total', scraper='scc', kind='skipped')
+            self.logger.warning(f"⏭️ {e}")
+            http_code = getattr(e, 'status_code', None)
+            self.record_crawl_state(url, 'dead' if e.permanent else 'error', http_code)
+            return []
+        except requests.HTTPError as e:
+            metrics.inc('fetch_errors_total', scraper='scc', kind='http')
+            self.logger.error(f"❌ Network error scraping {url}: {e}")
+            http_code = e.response.status_code if e.response is not None else None
+            self.record_crawl_state(url, 'dead' if http_code in DEAD_HTTP_CODES else 'error', http_code)
+            return []
+        except requests.exceptions.SSLError as e:
+            metrics.inc('fetch_errors_total', scraper='scc', kind='ssl')
+            self.logger.error(f"❌ Network error scraping {url}: {e}")
+            self.record_crawl_state(url, 'dead')
+            return []
         except requests.RequestException as e:
+            metrics.inc('fetch_errors_total', scraper='scc', kind='network')
             self.logger.error(f"❌ Network error scraping {url}: {e}")
+            self.record_crawl_state(url, 'error')
             return []
         except Exception as e:
             self.logger.error(f"❌ Unexpected error scraping {url}: {e}")
+            self.record_crawl_state(url, 'error')
             return []
     
     def strategy_container_based(self, soup, selectors, url):
@@ -155,10 +379,7 @@ class SCCWebScraper:
                 for container in containers:
                     qa_pair = self.extract_from_container(container)
                     if qa_pair:
-                        qa_pair.update({
-                            'source_url': url,
-                            'category': self.detect_category(url, qa_pair['question'])
-                        })
+                        qa_pair['source_url'] = url
                         qa_data.append(qa_pair)
                 break  # Use first successful selector
         
@@ -183,8 +404,7 @@ class SCCWebScraper:
                         qa_data.append({
                             'question': question_text,
                             'answer': answer_text,
-                            'source_url': url,
-                            'category': self.detect_category(url, question_text)
+                            'source_url': url
                         })
         
         return qa_data
@@ -208,8 +428,7 @@ class SCCWebScraper:
                     qa_data.append({
                         'question': question_text,
                         'answer': answer_text,
-                        'source_url': url,
-                        'category': self.detect_category(url, question_text)
+                        'source_url': url
                     })
         
         return qa_data
@@ -231,8 +450,7 @@ class SCCWebScraper:
                         qa_data.append({
                             'question': question_text,
                             'answer': answer_text,
-                            'source_url': url,
-                            'category': self.detect_category(url, question_text)
+                            'source_url': url
                         })
         
         return qa_data
@@ -324,26 +542,8 @@ class SCCWebScraper:
     
     def detect_category(self, url, question):
         """Detect category from URL or question content"""
-        url_lower = url.lower()
-        question_lower = question.lower()
-        
-        categories = {
-            'Contract Law': ['contract', 'agreement', 'lease', 'offer', 'acceptance', 'consideration'],
-            'Constitutional Law': ['constitution', 'fundamental', 'rights', 'article', 'amendment'],
-            'Criminal Law': ['criminal', 'penal', 'offense', 'crime', 'arrest', 'bail'],
-            'Civil Law': ['civil', 'tort', 'negligence', 'damages', 'compensation'],
-            'Property Law': ['property', 'land', 'real estate', 'ownership', 'possession'],
-            'Labor Law': ['labor', 'employment', 'worker', 'wages', 'termination'],
-            'Family Law': ['marriage', 'divorce', 'custody', 'adoption', 'maintenance'],
-            'Tax Law': ['tax', 'income tax', 'gst', 'assessment', 'deduction']
-        }
-        
-        for category, keywords in categories.items():
-            if any(keyword in url_lower for keyword in keywords) or any(keyword in question_lower for keyword in keywords):
-                return category
-        
-        return 'General Law'
-    
+        return self.classifier.classify(url, question)
+
     def clean_text(self, text):
         """Clean and normalize text"""
         if not text:
@@ -361,79 +561,269 @@ class SCCWebScraper:
         return text.strip()
     
     def remove_duplicates(self, qa_list):
-        """Remove duplicate Q&A pairs"""
+        """Remove duplicate Q&A pairs, including near-duplicates already stored from any site"""
         seen = set()
+        page_index = self.dedupe_index.empty_copy()
         unique_list = []
+        near_duplicates = 0
         
         for qa in qa_list:
             # Create a signature based on first 50 chars of question
             signature = qa['question'][:50].lower()
-            if signature not in seen:
-                seen.add(signature)
-                unique_list.append(qa)
-        
+            if signature in seen:
+                continue
+            seen.add(signature)
+
+            # MinHash over question + answer, checked against this page and the whole corpus
+            minhash = self.dedupe_index.signature(f"{qa['question']} {qa['answer']}")
+            match = self.dedupe_index.query_signature(minhash) or page_index.query_signature(minhash)
+            if match:
+                near_duplicates += 1
+                self.logger.debug(f"Near-duplicate of {match[0]} ({match[1]:.0%}): {qa['question'][:60]}")
+                continue
+
+            page_index.add_signature(signature, minhash)
+            qa['minhash'] = minhash
+            unique_list.append(qa)
+
+        if near_duplicates:
+            self.logger.info(f"🧬 Skipped {near_duplicates} near-duplicate Q&A pairs")
         return unique_list
     
     def save_to_database(self, questions_data):
-        """Save scraped data to SQL Server database"""
+        """Save scraped data to the database; returns the rows saved, or None if the save failed"""
         if not questions_data:
             self.logger.warning("No data to save to database")
             return 0
         
         saved_count = 0
+        stat_deltas = {}
+        new_rows = []
         session = Session(self.engine)
-        
+
         try:
-            for data in questions_data:
-                # Check if similar question already exists
-                stmt = select(QuestionAnswer).where(
-                    QuestionAnswer.question.ilike(f"%{data['question'][:30]}%")
-                )
-                existing = session.scalar(stmt)
-                
-                if not existing:
-                    qa = QuestionAnswer(
-                        question=data['question'],
-                        answer=data['answer'],
-                        source_url=data['source_url'],
-                        category=data.get('category', 'General Law')
+            with metrics.timer('db_write', scraper='scc'):
+                for data in questions_data:
+                    # Check if similar question already exists
+                    stmt = select(QuestionAnswer).where(
+                        QuestionAnswer.question.ilike(f"%{data['question'][:30]}%")
                     )
-                    session.add(qa)
-                    saved_count += 1
-            
-            session.commit()
+                    existing = session.scalar(stmt)
+                
+                    if not existing:
+                        qa = QuestionAnswer(
+                            question=data['question'],
+                            answer=data['answer'],
+                            source_url=data['source_url'],
+                            category=data.get('category', 'General Law')
+                        )
+                        session.add(qa)
+                        new_rows.append((qa, data))
+                        saved_count += 1
+
+                        for stat in (('total', 'all'), ('category', qa.category), ('domain', get_domain(qa.source_url))):
+                            stat_deltas[stat] = stat_deltas.get(stat, 0) + 1
+
+                # Stats are updated in the same transaction as the inserts
+                self.increment_stats(session, stat_deltas)
+                session.flush()
+                index_entries = [(f"qa:{qa.id}", data) for qa, data in new_rows]
+                session.commit()
+            metrics.inc('rows_saved_total', saved_count, scraper='scc')
             self.logger.info(f"💾 Saved {saved_count} new records to SQL Server database")
+
+            # Make the new rows visible to near-duplicate checks of later pages
+            for key, data in index_entries:
+                minhash = data.get('minhash') or self.dedupe_index.signature(f"{data['question']} {data['answer']}")
+                self.dedupe_index.add_signature(key, minhash)
             
         except Exception as e:
             session.rollback()
             self.logger.error(f"❌ Error saving to database: {e}")
-            saved_count = 0
+            saved_count = None
         finally:
             session.close()
         
         return saved_count
-    
-    def get_existing_urls(self):
-        """Get list of already scraped URLs"""
+
+    def increment_stats(self, session, stat_deltas):
+        """Apply per-dimension count deltas to the stats table within the caller's transaction"""
+        now = datetime.utcnow()
+        for (dimension, stat_key), delta in stat_deltas.items():
+            result = session.execute(
+                update(QAStat)
+                .where(QAStat.dimension == dimension, QAStat.stat_key == stat_key)
+                .values(record_count=QAStat.record_count + delta, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                session.add(QAStat(dimension=dimension, stat_key=stat_key, record_count=delta, updated_at=now))
+
+    def stats_need_reconcile(self, session):
+        """Check whether the stats table has never been built or is older than the reconcile interval"""
+        marker = session.get(QAStat, ('meta', 'reconciled'))
+        return marker is None or datetime.utcnow() - marker.updated_at > STATS_RECONCILE_INTERVAL
+
+    def reconcile_stats(self):
+        """Rebuild the stats table from questions_answers to correct any drift"""
         session = Session(self.engine)
         try:
-            stmt = select(QuestionAnswer.source_url).distinct()
-            result = session.execute(stmt)
-            urls = [row[0] for row in result if row[0]]
-            return set(urls)
+            expected = {('total', 'all'): session.query(func.count(QuestionAnswer.id)).scalar() or 0}
+
+            category_stats = session.query(
+                QuestionAnswer.category,
+                func.count(QuestionAnswer.id)
+            ).group_by(QuestionAnswer.category).all()
+            for category, count in category_stats:
+                key = ('category', category or 'General Law')
+                expected[key] = expected.get(key, 0) + count
+
+            source_stats = session.query(
+                QuestionAnswer.source_url,
+                func.count(QuestionAnswer.id)
+            ).group_by(QuestionAnswer.source_url).all()
+            for source, count in source_stats:
+                key = ('domain', get_domain(source))
+                expected[key] = expected.get(key, 0) + count
+
+            current = {
+                (stat.dimension, stat.stat_key): stat.record_count
+                for stat in session.query(QAStat).filter(QAStat.dimension != 'meta')
+            }
+            drifted = sum(1 for key in set(expected) | set(current) if expected.get(key) != current.get(key))
+
+            now = datetime.utcnow()
+            session.execute(delete(QAStat))
+            for (dimension, stat_key), count in expected.items():
+                session.add(QAStat(dimension=dimension, stat_key=stat_key, record_count=count, updated_at=now))
+            session.add(QAStat(dimension='meta', stat_key='reconciled', record_count=drifted, updated_at=now))
+            session.commit()
+
+            self.logger.info(f"🔄 Statistics reconciled ({drifted} drifted entries corrected)")
+            return drifted
+
         except Exception as e:
-            self.logger.error(f"Error getting existing URLs: {e}")
-            return set()
+            session.rollback()
+            self.logger.error(f"❌ Error reconciling statistics: {e}")
+            return 0
         finally:
             session.close()
-    
+
+    def get_crawl_states(self, urls):
+        """Look up crawl_state rows for the given URLs by their indexed hash"""
+        hashes = {url_hash(url): url for url in urls}
+        if not hashes:
+            return {}
+        session = Session(self.engine)
+        try:
+            states = session.scalars(select(CrawlState).where(CrawlState.url_hash.in_(list(hashes))))
+            return {hashes[state.url_hash]: state for state in states}
+        except Exception as e:
+            self.logger.error(f"Error reading crawl state: {e}")
+            return {}
+        finally:
+            session.close()
+
+    def backfill_crawl_state(self):
+        """Seed crawl_state once from URLs that already produced rows"""
+        session = Session(self.engine)
+        try:
+            if session.scalar(select(CrawlState.url_hash).limit(1)) is not None:
+                return 0
+            rows = session.execute(
+                select(QuestionAnswer.source_url, func.count(QuestionAnswer.id), func.max(QuestionAnswer.created_at))
+                .group_by(QuestionAnswer.source_url)
+            ).all()
+            for source_url, count, last_created in rows:
+                if source_url:
+                    session.add(CrawlState(
+                        url_hash=url_hash(source_url), url=source_url, status='ok',
+                        last_fetched=last_created or datetime.utcnow(), row_yield=count, failure_count=0
+                    ))
+            session.commit()
+            if rows:
+                self.logger.info(f"🗃️ Crawl state seeded with {len(rows)} previously scraped URLs")
+            return len(rows)
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Error seeding crawl state: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def filter_due_urls(self, urls):
+        """Return the URLs whose recrawl policy says they should be fetched now"""
+        self.backfill_crawl_state()
+        states = self.get_crawl_states(urls)
+        now = datetime.utcnow()
+
+        due_urls = []
+        for url in urls:
+            state = states.get(url)
+            if state is None or state.last_fetched is None:
+                due_urls.append(url)
+                continue
+            next_fetch = state.last_fetched + recrawl_interval(state.status, state.failure_count)
+            if next_fetch <= now:
+                due_urls.append(url)
+            elif state.status == 'dead':
+                self.logger.info(f"⛔ Skipping dead URL (HTTP {state.http_code or 'n/a'}) until {next_fetch:%Y-%m-%d %H:%M}: {url}")
+            else:
+                self.logger.info(f"⏭️ URL already scraped ({state.status}, {state.row_yield} rows), next crawl {next_fetch:%Y-%m-%d %H:%M}: {url}")
+        return due_urls
+
+    def finish_crawl(self, url, saved_count):
+        """Record a scraped URL after its save: 'ok' with the rows saved, or 'error' so it is retried"""
+        with self._fetched_lock:
+            http_code, content_hash = self._fetched.pop(url, (None, None))
+        if saved_count is None:
+            self.record_crawl_state(url, 'error', http_code)
+        else:
+            self.record_crawl_state(url, 'ok', http_code, content_hash, saved_count)
+
+    def record_crawl_state(self, url, status, http_code=None, content_hash=None, row_yield=0):
+        """Upsert the outcome of fetching a URL into crawl_state"""
+        session = Session(self.engine)
+        try:
+            key = url_hash(url)
+            state = session.get(CrawlState, key)
+            if state is None:
+                state = CrawlState(url_hash=key, url=url[:500], failure_count=0)
+                session.add(state)
+
+            if status in ('ok', 'empty'):
+                state.failure_count = 0
+            else:
+                state.failure_count = (state.failure_count or 0) + 1
+
+            state.status = status
+            state.http_code = http_code
+            if content_hash is not None:
+                state.content_hash = content_hash
+            state.row_yield = row_yield
+            state.last_fetched = datetime.utcnow()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Error recording crawl state for {url}: {e}")
+        finally:
+            session.close()
+
+    def save_dedupe_index(self):
+        """Persist the near-duplicate index if it changed"""
+        if self.dedupe_index.dirty:
+            self.dedupe_index.save()
+
     def close(self):
         """Close database connection"""
-        self.engine.dispose()
+        self.save_dedupe_index()
+        if self._engine is not None:
+            dispose_engine(self.database_url)
+            self._engine = None
         self.logger.info("Database connection closed")
 
 # ==================== MAIN FUNCTIONS ====================
-def run_scraper():
+def run_scraper(max_concurrency=CRAWL_CONCURRENCY, scraper=None):
     """Main function to run the SCC scraper"""
     
     # REPLACE THESE WITH ACTUAL SCC WEBSITE URLs
@@ -443,33 +833,56 @@ def run_scraper():
        
     ]
     
-    # Initialize scraper with SQL Server connection
-    scraper = SCCWebScraper()
+    # Reuse the process-wide scraper with its pooled SQL Server connection
+    scraper = scraper or get_scraper()
+    scraper.connect()
     
     try:
-        total_saved = 0
-        existing_urls = scraper.get_existing_urls()
-        
-        for url in scc_urls:
-            if url in existing_urls:
-                scraper.logger.info(f"⏭️ URL already scraped: {url}")
-                continue
-            
+        # Skip known-dead and recently crawled URLs using the indexed crawl_state table
+        pending_urls = scraper.filter_due_urls(scc_urls)
+
+        write_lock = threading.Lock()
+
+        def scrape_and_save(url):
             # Scrape the website
             qa_data = scraper.scrape_website(url)
-            
-            # Save to database
+
+            # Save to database (writes are serialized so stats rows are never inserted twice)
             if qa_data:
-                saved_count = scraper.save_to_database(qa_data)
-                total_saved += saved_count
-            else:
-                scraper.logger.warning(f"⚠️ No Q&A data found at: {url}")
-            
-            # Respectful delay between requests
-            time.sleep(random.uniform(2, 5))
+                with write_lock:
+                    saved = scraper.save_to_database(qa_data)
+                scraper.finish_crawl(url, saved)
+                return saved
+            scraper.logger.warning(f"⚠️ No Q&A data found at: {url}")
+            return 0
+
+        # Domains are crawled concurrently; each domain keeps a respectful delay between requests
+        scheduler = DomainScheduler(
+            session=scraper.session,
+            max_concurrency=max_concurrency,
+            user_agent=scraper.session.headers.get('User-Agent', '*'),
+            logger=scraper.logger
+        )
+        results = scheduler.run(pending_urls, scrape_and_save)
+        total_saved = sum(saved or 0 for _, saved in results)
         
         scraper.logger.info(f"🎉 Scraping completed! Total new records saved: {total_saved}")
-        
+
+        # Per-stage timings for tuning
+        json_path, prom_path = metrics.export('scc')
+        scraper.logger.info(f"📈 Metrics written to {json_path} and {prom_path}")
+        for line in metrics.summary_lines():
+            scraper.logger.info(line)
+
+        # Periodic reconciliation of the incremental statistics
+        session = Session(scraper.engine)
+        try:
+            needs_reconcile = scraper.stats_need_reconcile(session)
+        finally:
+            session.close()
+        if needs_reconcile:
+            scraper.reconcile_stats()
+
         # Display database statistics
         display_database_stats(scraper)
         
@@ -477,14 +890,28 @@ def run_scraper():
         scraper.logger.error(f"💥 Scraping failed: {e}")
     
     finally:
-        scraper.close()
+        scraper.save_dedupe_index()
 
 def display_database_stats(scraper):
     """Display database statistics"""
     session = Session(scraper.engine)
     try:
-        # Total records
-        total_records = session.query(QuestionAnswer).count()
+        # Build the stats table on first use
+        if session.get(QAStat, ('meta', 'reconciled')) is None:
+            scraper.reconcile_stats()
+
+        # All counts come from the incrementally maintained stats table
+        stats = session.query(QAStat).filter(QAStat.dimension != 'meta').all()
+        total_records = sum(stat.record_count for stat in stats if stat.dimension == 'total')
+        category_stats = sorted(
+            ((stat.stat_key, stat.record_count) for stat in stats if stat.dimension == 'category' and stat.record_count),
+            key=lambda item: item[0]
+        )
+        domain_stats = sorted(
+            ((stat.stat_key, stat.record_count) for stat in stats if stat.dimension == 'domain' and stat.record_count),
+            key=lambda item: item[1], reverse=True
+        )
+
         print(f"\n{'='*50}")
         print(f"📊 SQL SERVER DATABASE STATISTICS")
         print(f"{'='*50}")
@@ -493,24 +920,13 @@ def display_database_stats(scraper):
         print(f"Total Q&A records: {total_records}")
         
         # Records by category
-        category_stats = session.query(
-            QuestionAnswer.category,
-            func.count(QuestionAnswer.id)
-        ).group_by(QuestionAnswer.category).all()
-        
         print(f"\n📁 Records by Category:")
         for category, count in category_stats:
             print(f"  {category}: {count}")
-        
+
         # Records by source
-        source_stats = session.query(
-            QuestionAnswer.source_url,
-            func.count(QuestionAnswer.id)
-        ).group_by(QuestionAnswer.source_url).all()
-        
         print(f"\n🌐 Records by Source:")
-        for source, count in source_stats[:5]:  # Show top 5
-            domain = source.split('//')[-1].split('/')[0] if source else 'Unknown'
+        for domain, count in domain_stats[:5]:  # Show top 5
             print(f"  {domain}: {count}")
         
         # Show sample records
@@ -526,71 +942,70 @@ def display_database_stats(scraper):
     finally:
         session.close()
 
-def search_database():
+def search_database(scraper=None):
     """Search the database for specific questions"""
-    scraper = SCCWebScraper()
+    scraper = scraper or get_scraper()
     
-    try:
-        while True:
-            print(f"\n{'='*50}")
-            print(f"🔍 SEARCH DATABASE")
-            print(f"{'='*50}")
-            search_term = input("Enter search term (or 'quit' to exit): ").strip()
-            
-            if search_term.lower() == 'quit':
-                break
+    while True:
+        print(f"\n{'='*50}")
+        print(f"🔍 SEARCH DATABASE")
+        print(f"{'='*50}")
+        search_term = input("Enter search term (or 'quit' to exit): ").strip()
+        
+        if search_term.lower() == 'quit':
+            break
+        
+        if not search_term:
+            continue
+        
+        session = Session(scraper.engine)
+        try:
+            # Search in questions and answers
+            results = session.query(QuestionAnswer).filter(
+                QuestionAnswer.question.ilike(f'%{search_term}%') |
+                QuestionAnswer.answer.ilike(f'%{search_term}%')
+            ).all()
             
-            if not search_term:
-                continue
+            print(f"\n📖 Found {len(results)} results for '{search_term}':")
             
-            session = Session(scraper.engine)
-            try:
-                # Search in questions and answers
-                results = session.query(QuestionAnswer).filter(
-                    QuestionAnswer.question.ilike(f'%{search_term}%') |
-                    QuestionAnswer.answer.ilike(f'%{search_term}%')
-                ).all()
-                
-                print(f"\n📖 Found {len(results)} results for '{search_term}':")
+            for i, result in enumerate(results, 1):
+                print(f"\n--- Result {i} ---")
+                print(f"Question: {result.question}")
+                print(f"Answer: {result.answer[:200]}...")
+                print(f"Category: {result.category}")
+                print(f"Source: {result.source_url}")
+                print(f"Added: {result.created_at.date()}")
                 
-                for i, result in enumerate(results, 1):
-                    print(f"\n--- Result {i} ---")
-                    print(f"Question: {result.question}")
-                    print(f"Answer: {result.answer[:200]}...")
-                    print(f"Category: {result.category}")
-                    print(f"Source: {result.source_url}")
-                    print(f"Added: {result.created_at.date()}")
-                    
-            finally:
-                session.close()
-                
-    finally:
-        scraper.close()
+        finally:
+            session.close()
+            
 
-def test_database_connection():
+def test_database_connection(scraper=None):
     """Test SQL Server database connection"""
     print("🔧 Testing SQL Server connection...")
     try:
-        scraper = SCCWebScraper()
+        scraper = scraper or get_scraper()
+        session = Session(scraper.engine)
         print("✅ Database connection successful!")
         
         # Test basic operations
-        session = Session(scraper.engine)
         count = session.query(QuestionAnswer).count()
         print(f"✅ Table access successful! Current records: {count}")
         session.close()
-        scraper.close()
         return True
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
-        print("\n💡 Troubleshooting steps:")
-        print("1. Make sure SQL Server is running")
-        print("2. Install ODBC Driver 17 for SQL Server")
-        print("3. Check if database 'MCQ' exists")
-        print("4. Verify username 'sa' and password '123456'")
-        print("5. Check if SQL Server allows mixed authentication")
+        print_troubleshooting()
         return False
 
+def print_troubleshooting():
+    print("\n💡 Troubleshooting steps:")
+    print("1. Make sure SQL Server is running")
+    print("2. Install ODBC Driver 17 for SQL Server")
+    print("3. Check if database 'MCQ' exists")
+    print("4. Verify username 'sa' and password '123456'")
+    print("5. Check if SQL Server allows mixed authentication")
+
 # ==================== COMMAND LINE INTERFACE ====================
 if __name__ == "__main__":
     print(f"{'='*60}")
@@ -599,34 +1014,42 @@ if __name__ == "__main__":
     print(f"📊 Database: MCQ | Server: . | User: sa")
     print(f"{'='*60}")
     
-    # First test database connection
-    if not test_database_connection():
-        print("❌ Cannot continue without database connection.")
-        sys.exit(1)
-    
+    # Optional live metrics endpoint (SCRAPER_METRICS_PORT)
+    metrics.maybe_start_http_server()
+
+    # The database is connected and verified lazily by the first action that needs it
+    atexit.register(close_scraper)
+
     while True:
         print(f"\nOptions:")
         print(f"1. Run Scraper")
         print(f"2. Search Database")
         print(f"3. View Statistics")
         print(f"4. Test Connection")
-        print(f"5. Exit")
-        
-        choice = input("\nEnter your choice (1-5): ").strip()
-        
-        if choice == '1':
-            print(f"\n🚀 Starting web scraper...")
-            run_scraper()
-        elif choice == '2':
-            search_database()
-        elif choice == '3':
-            scraper = SCCWebScraper()
-            display_database_stats(scraper)
-            scraper.close()
-        elif choice == '4':
-            test_database_connection()
-        elif choice == '5':
-            print(f"👋 Thank you for using SCC Web Scraper!")
-            break
-        else:
-            print(f"❌ Invalid choice. Please try again.")
\ No newline at end of file
+        print(f"5. Reconcile Statistics")
+        print(f"6. Exit")
+        
+        choice = input("\nEnter your choice (1-6): ").strip()
+        
+        try:
+            if choice == '1':
+                print(f"\n🚀 Starting web scraper...")
+                run_scraper()
+            elif choice == '2':
+                search_database()
+            elif choice == '3':
+                display_database_stats(get_scraper())
+            elif choice == '4':
+                test_database_connection()
+            elif choice == '5':
+                get_scraper().reconcile_stats()
+            elif choice == '6':
+                close_scraper()
+                print(f"👋 Thank you for using SCC Web Scraper!")
+                break
+            else:
+                print(f"❌ Invalid choice. Please try again.")
+        except (SQLAlchemyError, ImportError) as e:
+            # The database is only connected when an action first needs it
+            print(f"❌ Database connection failed: {e}")
+            print_troubleshooting()
\ No newline at end of file
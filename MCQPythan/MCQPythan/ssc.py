@@ -1,652 +1,1225 @@
-﻿import requests
-import pdfplumber
-import pyodbc
+﻿import argparse
 import re
+import json
+import hashlib
+import itertools
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import os
+import queue
 import random
+import threading
+import time
+
+# numpy is only needed for batch mode and is imported on first use
+np = None
+
+def require_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("NumPy is required for batch mode (pip install numpy)")
+        np = numpy
+    return np
+
+import storage
 
 # ==============================
 # Database Connection
 # ==============================
-try:
-    conn = pyodbc.connect(
-        "DRIVER={ODBC Driver 17 for SQL Server};"
-        "SERVER=.;"
-        "DATABASE=MCQ;"
-        "UID=sa;"
-        "PWD=123456;"
-    )
-    cursor = conn.cursor()
-    print("Database connection successful")
-    
-    # Check if Subject column exists, if not add it
-    try:
-        cursor.execute("SELECT Subject FROM SSC_MCQ_Questions WHERE 1=0")
-    except:
-        print("Adding Subject column to the table...")
-        cursor.execute("ALTER TABLE SSC_MCQ_Questions ADD Subject NVARCHAR(100)")
-        conn.commit()
-        print("Subject column added successfully")
-        
-except Exception as e:
-    print(f"Database connection failed: {e}")
-    exit()
+# Opened on first use, so generation-only runs and worker processes never connect.
+# SQL Server adds the Subject column to older tables on the first insert; see storage.py
+mcq_db = storage.get_repository("MCQ")
+
+# ==============================
+# Precompiled Question Template Bank
+# ==============================
+class QuestionTemplate:
+    """One question pattern: fixed text and answer, or a format string filled from random parameters"""
+    __slots__ = ('body', 'answer', 'params', 'answer_fn')
+
+    def __init__(self, body, answer=None, params=(), answer_fn=None):
+        self.body = body
+        self.answer = answer
+        self.params = params          # ((name, low, high), ...) drawn with randint
+        self.answer_fn = answer_fn    # computes the answer from the drawn parameters
+
+    def render(self, q_id, rng=random):
+        """Fill in this template only; parameters are drawn here, not when the bank is built"""
+        if not self.params:
+            return f"Q.{q_id} {self.body}", self.answer
+        values = {name: rng.randint(low, high) for name, low, high in self.params}
+        return f"Q.{q_id} " + self.body.format(**values), self.answer_fn(**values)
+
+
+def _product(x, y):
+    return str(x * y)
+
+def compile_templates(raw_bank):
+    """Turn {key: [(body, answer) | QuestionTemplate]} into {key: (QuestionTemplate, ...)}"""
+    return {
+        key: tuple(t if isinstance(t, QuestionTemplate) else QuestionTemplate(*t) for t in templates)
+        for key, templates in raw_bank.items()
+    }
+
+MATH_TEMPLATES = {
+    "Easy": [
+        QuestionTemplate("What is {x} + {y}?", params=(("x", 100, 1000), ("y", 50, 500)), answer_fn=lambda x, y: str(x + y)),
+        QuestionTemplate("Calculate: {x} × {y}", params=(("x", 20, 100), ("y", 5, 20)), answer_fn=_product),
+        QuestionTemplate("Calculate: {x} × {y}", params=(("x", 200, 1000), ("y", 5, 20)), answer_fn=_product),
+        QuestionTemplate("Calculate: {x} × {y}", params=(("x", 40, 900), ("y", 5, 20)), answer_fn=_product),
+        QuestionTemplate("Calculate: {x} × {y}", params=(("x", 50, 200), ("y", 5, 20)), answer_fn=_product),
+        ("Find 25% of 200", "50"),
+    ],
+    "Medium": [
+        ("Solve for x: 2x + 5 = 15", "5"),
+        ("What is the area of a circle with radius 7cm? (π=22/7)", "154"),
+        ("If a train covers 300 km in 5 hours, what is its speed?", "60 km/h"),
+        ("Find simple interest on ₹1000 at 5% per annum for 2 years", "100"),
+        ("A man walks 3 km North, then 4 km East. Find the distance from starting point.", "5 km"),
+        ("What is the HCF of 36 and 48?", "12"),
+        ("What is the LCM of 12, 15, and 20?", "60"),
+        ("If 12 pens cost ₹96, what is the cost of 1 pen?", "8"),
+        ("Find the perimeter of a square with side 14 cm.", "56"),
+        ("Solve: x/3 = 6", "18"),
+    ],
+    "Hard": [
+        ("Find the value of sin60° × cos30°", "0.433"),
+        ("If log₁₀2 = 0.3010, what is log₁₀8?", "0.9030"),
+        ("Solve: x² - 5x + 6 = 0", "2,3"),
+        ("If a² + b² = 25 and ab = 12, find a² + b² - 2ab", "1"),
+        ("A cone has a radius 3 cm and height 4 cm. Find volume. (π=3.14)", "37.68"),
+        ("A and B together can do a work in 10 days. A alone does it in 15 days. In how many days can B do it alone?", "30"),
+        ("Solve: √(x + 9) = 5", "16"),
+        ("A boat can travel 30 km downstream in 2 hours and 18 km upstream in 3 hours. Find speed of boat in still water.", "12 km/h"),
+        ("If 5x + 3y = 30 and x + y = 6, find x and y.", "x=3, y=3"),
+        ("If x + 1/x = 5, find x² + 1/x²", "23"),
+    ]
+}
+
+# Reasoning questions are keyed by category instead of difficulty
+REASONING_TEMPLATES = {
+    "Analogies": [
+        ("Pen : Write :: Knife : ?", "Cut"),
+        ("Doctor : Hospital :: Teacher : ?", "School"),
+        ("Eyes : See :: Ears : ?", "Hear"),
+        ("Bird : Nest :: Bee : ?", "Hive"),
+        ("Fire : Heat :: Ice : ?", "Cold"),
+        ("Book : Reading :: Fork : ?", "Eating"),
+        ("Car : Road :: Train : ?", "Track"),
+        ("Knife : Sharpness :: Pen : ?", "Ink"),
+    ],
+    "Number Series": [
+        ("2, 6, 12, 20, ?", "30"),
+        ("3, 7, 15, 31, ?", "63"),
+        ("5, 10, 20, 40, ?", "80"),
+        ("1, 4, 9, 16, 25, ?", "36"),
+        ("21, 18, 15, 12, ?", "9"),
+        ("2, 3, 5, 8, 12, 17, ?", "23"),
+        ("8, 6, 9, 23, 87, ?", "445"),
+    ],
+    "Coding-Decoding": [
+        ("If 'APPLE' is coded as 'BQQMF', how is 'ORANGE' coded?", "PSBOHF"),
+        ("If 'TABLE' is coded as 'UZCMF', how is 'CHAIR' coded?", "DIBJS"),
+        ("If 'DOG' is 4157, 'CAT' is 3120, then what is 'COT'?", "3170"),
+        ("If 'BIRD' = 'CJSE', then 'FISH' = ?", "GJTI"),
+        ("In a code, TREE is written as USFF. How is LEAF written?", "MFBG"),
+    ],
+    "Blood Relations": [
+        ("A is B's brother. C is A's mother. How is C related to B?", "Mother"),
+        ("P is the brother of Q. Q is the sister of R. R is the son of S. How is S related to P?", "Father or Mother"),
+        ("M is the daughter of K. K is the wife of D. D is the father of R. How is R related to M?", "Brother"),
+        ("A is the son of B. C is B's sister. D is C's mother. How is D related to A?", "Grandmother"),
+        ("X is the father of Y. Y is the mother of Z. How is X related to Z?", "Grandfather"),
+    ],
+    "Direction Sense": [
+        ("Rohan walks 10m South, then turns left and walks 25m. In which direction is he from start?", "South-East"),
+        ("A person walks 5m North, turns right and walks 3m. Which direction is he facing now?", "East"),
+        ("P walks 10m East, turns left and walks 10m, again turns left and walks 10m. Final direction?", "West"),
+        ("She moves 12m North, then 5m East. What is her shortest distance from start?", "13m"),
+        ("He walks 6m South, then 8m West. Direction from start?", "South-West"),
+    ]
+}
+
+ENGLISH_TEMPLATES = {
+    "Easy": [
+        ("Choose the correct synonym of 'Benevolent'", "Kind"),
+        ("What is the past tense of 'go'?", "Went"),
+        ("Identify the correct spelling:", "Beautiful"),
+        ("Fill in the blank: She ____ to school every day.", "Goes"),
+        ("Choose the antonym of 'Happy'", "Sad"),
+        ("What is the plural of 'Child'?", "Children"),
+        ("Choose the correct article: He bought ___ umbrella.", "An"),
+        ("Which word is a noun: run, blue, beauty, quickly?", "Beauty"),
+    ],
+    "Medium": [
+        ("Identify the error: 'Neither of the students have completed their homework'", "Have"),
+        ("What is the antonym of 'Ephemeral'?", "Permanent"),
+        ("Fill in the blank: Hardly ____ she entered when the phone rang.", "Had"),
+        ("Choose the correct passive voice: 'She writes a letter.'", "A letter is written by her."),
+        ("Spot the error: 'He did not knew the answer.'", "Knew"),
+        ("Choose the correct indirect speech: She said, 'I am tired.'", "She said that she was tired."),
+        ("Select the correct preposition: He is afraid ___ the dark.", "Of"),
+        ("Which word is closest in meaning to 'Scrutinize'?", "Examine"),
+    ],
+    "Hard": [
+        ("'Procrustean' means:", "Enforcing conformity"),
+        ("Identify the figure of speech: 'The stars danced playfully'", "Personification"),
+        ("Choose the correct sentence:", "Had I known, I would have helped you."),
+        ("What is the meaning of 'Hobson's Choice'?", "No real choice at all"),
+        ("Choose the grammatically correct sentence:", "Each of the boys was given a prize."),
+        ("Identify the mood: 'If I were you, I would resign.'", "Subjunctive"),
+        ("Fill in: The more he earns, the ___ he spends.", "More"),
+        ("Meaning of idiom: 'To turn a deaf ear'", "To ignore someone"),
+    ]
+}
+
+HISTORY_TEMPLATES = {
+    "Easy": [
+        ("Who is known as the Father of the Indian Constitution?", "Dr. B.R. Ambedkar"),
+        ("When did India get independence?", "1947"),
+        ("Who was the first Prime Minister of India?", "Jawaharlal Nehru"),
+        ("Who was the first President of India?", "Dr. Rajendra Prasad"),
+        ("Which freedom fighter is known as 'Netaji'?", "Subhas Chandra Bose"),
+        ("Which movement was led by Mahatma Gandhi in 1942?", "Quit India Movement"),
+        ("Who gave the slogan 'Give me blood and I will give you freedom'?", "Subhas Chandra Bose"),
+        ("In which year did the Jallianwala Bagh massacre happen?", "1919"),
+    ],
+    "Medium": [
+        ("The Battle of Plassey was fought in which year?", "1757"),
+        ("Who founded the Indian National Congress?", "A.O. Hume"),
+        ("Who was the Viceroy during the partition of Bengal in 1905?", "Lord Curzon"),
+        ("In which session was 'Purna Swaraj' declared by INC?", "Lahore Session, 1929"),
+        ("Who led the Revolt of 1857 in Kanpur?", "Nana Sahib"),
+        ("Which reform act is also known as Montagu-Chelmsford Reforms?", "Government of India Act, 1919"),
+        ("Who was the first Governor-General of independent India?", "Lord Mountbatten"),
+        ("Who introduced Permanent Settlement in Bengal?", "Lord Cornwallis"),
+    ],
+    "Hard": [
+        ("The 'Doctrine of Lapse' was introduced by?", "Lord Dalhousie"),
+        ("Who wrote 'Kitab-ul-Hind'?", "Al-Biruni"),
+        ("In which year was the Simon Commission appointed?", "1927"),
+        ("Who was the founder of the Maurya Empire?", "Chandragupta Maurya"),
+        ("Which Mughal emperor built the Red Fort?", "Shah Jahan"),
+        ("Who was the last ruler of the Mughal Empire?", "Bahadur Shah II"),
+        ("The capital of King Ashoka's empire was?", "Pataliputra"),
+        ("The Treaty of Seringapatam was signed in?", "1792"),
+    ]
+}
+
+GEOGRAPHY_TEMPLATES = {
+    "Easy": [
+        ("Which is the longest river in India?", "Ganga"),
+        ("What is the capital of Maharashtra?", "Mumbai"),
+        ("Which is the southernmost point of India?", "Indira Point"),
+        ("How many Union Territories are there in India (as of 2025)?", "8"),
+        ("In which state is the Thar Desert located?", "Rajasthan"),
+        ("What is the capital of Kerala?", "Thiruvananthapuram"),
+        ("Mount Everest lies in which mountain range?", "Himalayas"),
+        ("Which Indian river is known as 'Dakshin Ganga'?", "Godavari"),
+    ],
+    "Medium": [
+        ("Which state has the longest coastline in India?", "Gujarat"),
+        ("Which is the largest freshwater lake in India?", "Wular Lake"),
+        ("Which city is known as the 'Silicon Valley of India'?", "Bengaluru"),
+        ("Which Indian state shares its border with maximum states?", "Uttar Pradesh"),
+        ("Tropic of Cancer passes through how many Indian states?", "8"),
+        ("Which plateau is known as the 'Mineral Belt of India'?", "Chotanagpur Plateau"),
+        ("Which Indian river flows westward and falls into the Arabian Sea?", "Narmada"),
+        ("Name the strait that separates India and Sri Lanka.", "Palk Strait"),
+    ],
+    "Hard": [
+        ("The 'Horn of Africa' includes which countries?", "Somalia, Ethiopia, Eritrea, Djibouti"),
+        ("Which river forms the famous Jog Falls?", "Sharavati"),
+        ("Which is the highest active volcano in the world?", "Ojos del Salado"),
+        ("Name the cold desert in India.", "Ladakh"),
+        ("What is the correct order (south to north) of the Himalayan ranges?", "Siwalik, Lesser Himalayas, Greater Himalayas"),
+        ("In which continent is the Great Rift Valley located?", "Africa"),
+        ("Which Indian state has the highest forest cover by area?", "Madhya Pradesh"),
+        ("Which current is responsible for warming the western coasts of Europe?", "Gulf Stream"),
+    ]
+}
+
+COMPUTER_TEMPLATES = {
+    "Easy": [
+        ("What does CPU stand for?", "Central Processing Unit"),
+        ("Which of these is a programming language?", "Python"),
+        ("What is the full form of RAM?", "Random Access Memory"),
+        ("Which device is used to input data into a computer?", "Keyboard"),
+        ("What does WWW stand for?", "World Wide Web"),
+    ],
+    "Medium": [
+        ("In programming, what does OOP stand for?", "Object Oriented Programming"),
+        ("Which protocol is used for sending emails?", "SMTP"),
+        ("What is the binary equivalent of decimal 10?", "1010"),
+        ("Which language is used for web development?", "HTML"),
+        ("What does SQL stand for?", "Structured Query Language"),
+    ],
+    "Hard": [
+        ("In SQL, which command is used to remove a table?", "DROP TABLE"),
+        ("What does API stand for?", "Application Programming Interface"),
+        ("Which sorting algorithm has worst-case time complexity O(n²)?", "Bubble Sort"),
+        ("What is the purpose of DNS?", "Domain Name System"),
+        ("Which data structure uses LIFO principle?", "Stack"),
+    ]
+}
+
+CURRENT_AFFAIRS_TEMPLATES = {
+    "Easy": [
+        ("Who is the current Prime Minister of India?", "Narendra Modi"),
+        ("Which country hosted the 2023 G20 Summit?", "India"),
+        ("Who is the current President of India?", "Droupadi Murmu"),
+        ("Which city will host the 2032 Summer Olympics?", "Brisbane"),
+        ("What is the currency of Japan?", "Yen"),
+        ("Which country recently launched the Artemis I mission?", "USA"),
+    ],
+    "Medium": [
+        ("The Chandrayaan-3 mission was launched in which year?", "2023"),
+        ("Who won the Nobel Peace Prize 2023?", "Narges Mohammadi"),
+        ("Which country recently became the 195th member of the UN?", "South Sudan"),
+        ("Which Indian state recently became the first to provide free Wi-Fi to all villages?", "Kerala"),
+        ("Name the Indian who won the Booker Prize in 2023.", "Geetanjali Shree"),
+        ("Who is the Chairperson of the Finance Commission of India (2023)?", "N.K. Singh"),
+    ],
+    "Hard": [
+        ("The 'Viksit Bharat' vision aims for India to become developed by which year?", "2047"),
+        ("Which country recently changed its name to Türkiye?", "Turkey"),
+        ("The International Solar Alliance was launched in which year?", "2015"),
+        ("Who is the current Secretary-General of the United Nations?", "António Guterres"),
+        ("Which country hosts the headquarters of the International Criminal Court (ICC)?", "Netherlands"),
+        ("When was the National Education Policy (NEP) 2020 implemented in India?", "2020"),
+    ]
+}
+
+GK_TEMPLATES = {
+    "Easy": [
+        ("How many states are there in India?", "28"),
+        ("Who is known as the Missile Man of India?", "Dr. A.P.J. Abdul Kalam"),
+        ("What is the national animal of India?", "Tiger"),
+        ("Who wrote the Indian National Anthem?", "Rabindranath Tagore"),
+        ("Which planet is known as the Red Planet?", "Mars"),
+        ("What is the currency of India?", "Indian Rupee"),
+    ],
+    "Medium": [
+        ("The Rajya Sabha can have maximum how many members?", "250"),
+        ("Who was the first woman President of India?", "Pratibha Patil"),
+        ("Which is the largest organ in the human body?", "Skin"),
+        ("Which country is the largest producer of tea?", "China"),
+        ("Which element has the chemical symbol 'Fe'?", "Iron"),
+        ("What does GDP stand for?", "Gross Domestic Product"),
+    ],
+    "Hard": [
+        ("The 'Kalinga War' was fought in which year?", "261 BCE"),
+        ("Who was the first Indian to win Nobel Prize?", "Rabindranath Tagore"),
+        ("Which treaty ended the First Anglo-Mysore War?", "Treaty of Madras"),
+        ("What is the half-life of Uranium-238?", "4.468 billion years"),
+        ("Name the author of the book 'Discovery of India'.", "Jawaharlal Nehru"),
+        ("What is the capital of Bhutan?", "Thimphu"),
+    ]
+}
+
+# Compiled once at import; generators only pick and render
+TEMPLATE_BANK = {
+    "Quantitative Aptitude": compile_templates(MATH_TEMPLATES),
+    "General Intelligence & Reasoning": compile_templates(REASONING_TEMPLATES),
+    "English Language": compile_templates(ENGLISH_TEMPLATES),
+    "History": compile_templates(HISTORY_TEMPLATES),
+    "Geography": compile_templates(GEOGRAPHY_TEMPLATES),
+    "Computer Science": compile_templates(COMPUTER_TEMPLATES),
+    "Current Affairs": compile_templates(CURRENT_AFFAIRS_TEMPLATES),
+    "General Awareness": compile_templates(GK_TEMPLATES),
+}
+
+REASONING_CATEGORIES = tuple(REASONING_TEMPLATES)
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+# Define subjects with their weights
+SUBJECTS_WITH_WEIGHTS = [
+    ("Quantitative Aptitude", 20),
+    ("General Intelligence & Reasoning", 25),
+    ("English Language", 15),
+    ("General Awareness", 10),
+    ("History", 10),
+    ("Geography", 10),
+    ("Computer Science", 5),
+    ("Current Affairs", 5)
+]
 
 # ==============================
 # Enhanced Question Data Generator with Realistic SSC Questions
 # ==============================
-def generate_question_data(num_questions=10000):  # Changed to 10,000 questions
+# Create subject list based on weights
+SUBJECT_POOL = [subject for subject, weight in SUBJECTS_WITH_WEIGHTS for _ in range(weight)]
+
+def generate_question_chunk(start_id, count, rng=random):
+    """Generate questions start_id .. start_id + count - 1"""
     questions_data = []
-    
-    # Define subjects with their weights
-    subjects_with_weights = [
-        ("Quantitative Aptitude", 20),
-        ("General Intelligence & Reasoning", 25),
-        ("English Language", 15),
-        ("General Awareness", 10),
-        ("History", 10),
-        ("Geography", 10),
-        ("Computer Science", 5),
-        ("Current Affairs", 5)
-    ]
-    
-    # Create subject list based on weights
-    subject_pool = []
-    for subject, weight in subjects_with_weights:
-        subject_pool.extend([subject] * weight)
-    
-    for i in range(1, num_questions + 1):
-        subject = random.choice(subject_pool)
-        difficulty = random.choice(["Easy", "Medium", "Hard"])
-        
-        # Ensure all generators return proper data
-        if subject == "Quantitative Aptitude":
-            question_data = generate_math_question(i, difficulty)
-        elif subject == "General Intelligence & Reasoning":
-            question_data = generate_reasoning_question(i, difficulty)
-        elif subject == "English Language":
-            question_data = generate_english_question(i, difficulty)
-        elif subject == "History":
-            question_data = generate_history_question(i, difficulty)
-        elif subject == "Geography":
-            question_data = generate_geography_question(i, difficulty)
-        elif subject == "Computer Science":
-            question_data = generate_computer_question(i, difficulty)
-        elif subject == "Current Affairs":
-            question_data = generate_current_affairs_question(i, difficulty)
-        else:  # General Awareness
-            question_data = generate_gk_question(i, difficulty)
-        
-        # Add subject to question data and ensure it's not None
-        if question_data is not None:
-            question_data['subject'] = subject
-            questions_data.append(question_data)
-        else:
-            print(f"Warning: Question {i} returned None for subject {subject}")
-    
+    for i in range(start_id, start_id + count):
+        subject = rng.choice(SUBJECT_POOL)
+        difficulty = rng.choice(DIFFICULTIES)
+
+        question_data = SUBJECT_GENERATORS[subject](i, difficulty, rng)
+        question_data['subject'] = subject
+        questions_data.append(question_data)
+
     return questions_data
 
+def generate_question_data(num_questions=10000, rng=random):  # Changed to 10,000 questions
+    return generate_question_chunk(1, num_questions, rng)
+
 # ==============================
 # COMPLETE QUESTION GENERATORS (No None returns)
 # ==============================
 
-def generate_math_question(q_id, difficulty):
-    math_questions = {
-       "Easy": [
-            (f"Q.{q_id} What is {random.randint(100, 1000)} + {random.randint(50, 500)}?", str(random.randint(100, 1000) + random.randint(50, 500))),
-            (f"Q.{q_id} Calculate: {random.randint(20, 100)} × {random.randint(5, 20)}", str(random.randint(20, 100) * random.randint(5, 20))),
-            (f"Q.{q_id} Calculate: {random.randint(200, 1000)} × {random.randint(5, 20)}", str(random.randint(200, 1000) * random.randint(5, 20))),
-            (f"Q.{q_id} Calculate: {random.randint(40, 900)} × {random.randint(5, 20)}", str(random.randint(40, 900) * random.randint(5, 20))),
-            (f"Q.{q_id} Calculate: {random.randint(50, 200)} × {random.randint(5, 20)}", str(random.randint(50, 200) * random.randint(5, 20))),
-            (f"Q.{q_id} Find 25% of 200", "50")
-        ],
-        "Medium": [
-            (f"Q.{q_id} Solve for x: 2x + 5 = 15", "5"),
-            (f"Q.{q_id} What is the area of a circle with radius 7cm? (π=22/7)", "154"),
-            (f"Q.{q_id} If a train covers 300 km in 5 hours, what is its speed?", "60 km/h"),
-            (f"Q.{q_id} Find simple interest on ₹1000 at 5% per annum for 2 years", "100"),
-            (f"Q.{q_id} A man walks 3 km North, then 4 km East. Find the distance from starting point.", "5 km"),
-            (f"Q.{q_id} What is the HCF of 36 and 48?", "12"),
-            (f"Q.{q_id} What is the LCM of 12, 15, and 20?", "60"),
-            (f"Q.{q_id} If 12 pens cost ₹96, what is the cost of 1 pen?", "8"),
-            (f"Q.{q_id} Find the perimeter of a square with side 14 cm.", "56"),
-            (f"Q.{q_id} Solve: x/3 = 6", "18"),
-        ],
-        "Hard": [
-            (f"Q.{q_id} Find the value of sin60° × cos30°", "0.433"),
-            (f"Q.{q_id} If log₁₀2 = 0.3010, what is log₁₀8?", "0.9030"),
-            (f"Q.{q_id} Solve: x² - 5x + 6 = 0", "2,3"),
-            (f"Q.{q_id} If a² + b² = 25 and ab = 12, find a² + b² - 2ab", "1"),
-            (f"Q.{q_id} A cone has a radius 3 cm and height 4 cm. Find volume. (π=3.14)", "37.68"),
-            (f"Q.{q_id} A and B together can do a work in 10 days. A alone does it in 15 days. In how many days can B do it alone?", "30"),
-            (f"Q.{q_id} Solve: √(x + 9) = 5", "16"),
-            (f"Q.{q_id} A boat can travel 30 km downstream in 2 hours and 18 km upstream in 3 hours. Find speed of boat in still water.", "12 km/h"),
-            (f"Q.{q_id} If 5x + 3y = 30 and x + y = 6, find x and y.", "x=3, y=3"),
-            (f"Q.{q_id} If x + 1/x = 5, find x² + 1/x²", "23"),
-        ]
-    }
-    
-    question_text, correct_answer = random.choice(math_questions[difficulty])
-    options = generate_math_options(correct_answer, difficulty)
-    
+def build_question(question_text, correct_answer, options):
     return {
         'question_text': question_text,
         'optionA': options['A'], 'optionB': options['B'], 'optionC': options['C'], 'optionD': options['D'],
         'answer': correct_answer, 'category': "SSC", 'course': "SSC Exam", 'created_date': datetime.now()
     }
 
-def generate_reasoning_question(q_id, difficulty):
-    reasoning_categories = ["Analogies", "Number Series", "Coding-Decoding", "Blood Relations", "Direction Sense"]
-    category = random.choice(reasoning_categories)
-    
-    reasoning_questions = {
-        "Analogies": [
-            ("Pen : Write :: Knife : ?", "Cut"),
-            ("Doctor : Hospital :: Teacher : ?", "School"),
-            ("Eyes : See :: Ears : ?", "Hear"),
-            ("Bird : Nest :: Bee : ?", "Hive"),
-            ("Fire : Heat :: Ice : ?", "Cold"),
-            ("Book : Reading :: Fork : ?", "Eating"),
-            ("Car : Road :: Train : ?", "Track"),
-            ("Knife : Sharpness :: Pen : ?", "Ink"),
-        ],
-        "Number Series": [
-            ("2, 6, 12, 20, ?", "30"),
-            ("3, 7, 15, 31, ?", "63"),
-            ("5, 10, 20, 40, ?", "80"),
-            ("1, 4, 9, 16, 25, ?", "36"),
-            ("21, 18, 15, 12, ?", "9"),
-            ("2, 3, 5, 8, 12, 17, ?", "23"),
-            ("8, 6, 9, 23, 87, ?", "445"),
-        ],
-        "Coding-Decoding": [
-            ("If 'APPLE' is coded as 'BQQMF', how is 'ORANGE' coded?", "PSBOHF"),
-            ("If 'TABLE' is coded as 'UZCMF', how is 'CHAIR' coded?", "DIBJS"),
-            ("If 'DOG' is 4157, 'CAT' is 3120, then what is 'COT'?", "3170"),
-            ("If 'BIRD' = 'CJSE', then 'FISH' = ?", "GJTI"),
-            ("In a code, TREE is written as USFF. How is LEAF written?", "MFBG"),
-        ],
-        "Blood Relations": [
-            ("A is B's brother. C is A's mother. How is C related to B?", "Mother"),
-            ("P is the brother of Q. Q is the sister of R. R is the son of S. How is S related to P?", "Father or Mother"),
-            ("M is the daughter of K. K is the wife of D. D is the father of R. How is R related to M?", "Brother"),
-            ("A is the son of B. C is B's sister. D is C's mother. How is D related to A?", "Grandmother"),
-            ("X is the father of Y. Y is the mother of Z. How is X related to Z?", "Grandfather"),
-        ],
-        "Direction Sense": [
-            ("Rohan walks 10m South, then turns left and walks 25m. In which direction is he from start?", "South-East"),
-            ("A person walks 5m North, turns right and walks 3m. Which direction is he facing now?", "East"),
-            ("P walks 10m East, turns left and walks 10m, again turns left and walks 10m. Final direction?", "West"),
-            ("She moves 12m North, then 5m East. What is her shortest distance from start?", "13m"),
-            ("He walks 6m South, then 8m West. Direction from start?", "South-West"),
-        ]
-    }
-    
-    question_text, correct_answer = random.choice(reasoning_questions[category])
-    question_text = f"Q.{q_id} {question_text}"
-    options = generate_reasoning_options(correct_answer, category)
-    
-    return {
-        'question_text': question_text,
-        'optionA': options['A'], 'optionB': options['B'], 'optionC': options['C'], 'optionD': options['D'],
-        'answer': correct_answer, 'category': "SSC", 'course': "SSC Exam", 'created_date': datetime.now()
-    }
+def generate_math_question(q_id, difficulty, rng=random):
+    question_text, correct_answer = rng.choice(TEMPLATE_BANK["Quantitative Aptitude"][difficulty]).render(q_id, rng)
+    options = generate_math_options(correct_answer, difficulty, rng)
+    return build_question(question_text, correct_answer, options)
 
-def generate_english_question(q_id, difficulty):
-    english_questions = {
-        "Easy": [
-            (f"Q.{q_id} Choose the correct synonym of 'Benevolent'", "Kind"),
-            (f"Q.{q_id} What is the past tense of 'go'?", "Went"),
-            (f"Q.{q_id} Identify the correct spelling:", "Beautiful"),
-            (f"Q.{q_id} Fill in the blank: She ____ to school every day.", "Goes"),
-            (f"Q.{q_id} Choose the antonym of 'Happy'", "Sad"),
-            (f"Q.{q_id} What is the plural of 'Child'?", "Children"),
-            (f"Q.{q_id} Choose the correct article: He bought ___ umbrella.", "An"),
-            (f"Q.{q_id} Which word is a noun: run, blue, beauty, quickly?", "Beauty"),
-        ],
-        "Medium": [
-            (f"Q.{q_id} Identify the error: 'Neither of the students have completed their homework'", "Have"),
-            (f"Q.{q_id} What is the antonym of 'Ephemeral'?", "Permanent"),
-            (f"Q.{q_id} Fill in the blank: Hardly ____ she entered when the phone rang.", "Had"),
-            (f"Q.{q_id} Choose the correct passive voice: 'She writes a letter.'", "A letter is written by her."),
-            (f"Q.{q_id} Spot the error: 'He did not knew the answer.'", "Knew"),
-            (f"Q.{q_id} Choose the correct indirect speech: She said, 'I am tired.'", "She said that she was tired."),
-            (f"Q.{q_id} Select the correct preposition: He is afraid ___ the dark.", "Of"),
-            (f"Q.{q_id} Which word is closest in meaning to 'Scrutinize'?", "Examine"),
-        ],
-        "Hard": [
-            (f"Q.{q_id} 'Procrustean' means:", "Enforcing conformity"),
-            (f"Q.{q_id} Identify the figure of speech: 'The stars danced playfully'", "Personification"),
-            (f"Q.{q_id} Choose the correct sentence:", "Had I known, I would have helped you."),
-            (f"Q.{q_id} What is the meaning of 'Hobson's Choice'?", "No real choice at all"),
-            (f"Q.{q_id} Choose the grammatically correct sentence:", "Each of the boys was given a prize."),
-            (f"Q.{q_id} Identify the mood: 'If I were you, I would resign.'", "Subjunctive"),
-            (f"Q.{q_id} Fill in: The more he earns, the ___ he spends.", "More"),
-            (f"Q.{q_id} Meaning of idiom: 'To turn a deaf ear'", "To ignore someone"),
-        ]
-    }
-    
-    question_text, correct_answer = random.choice(english_questions[difficulty])
-    options = generate_english_options(correct_answer, difficulty)
-    
-    return {
-        'question_text': question_text,
-        'optionA': options['A'], 'optionB': options['B'], 'optionC': options['C'], 'optionD': options['D'],
-        'answer': correct_answer, 'category': "SSC", 'course': "SSC Exam", 'created_date': datetime.now()
-    }
+def generate_reasoning_question(q_id, difficulty, rng=random):
+    category = rng.choice(REASONING_CATEGORIES)
+    question_text, correct_answer = rng.choice(TEMPLATE_BANK["General Intelligence & Reasoning"][category]).render(q_id, rng)
+    options = generate_reasoning_options(correct_answer, category, rng)
+    return build_question(question_text, correct_answer, options)
 
-def generate_history_question(q_id, difficulty):
-    history_questions = {
-        "Easy": [
-            (f"Q.{q_id} Who is known as the Father of the Indian Constitution?", "Dr. B.R. Ambedkar"),
-            (f"Q.{q_id} When did India get independence?", "1947"),
-            (f"Q.{q_id} Who was the first Prime Minister of India?", "Jawaharlal Nehru"),
-            (f"Q.{q_id} Who was the first President of India?", "Dr. Rajendra Prasad"),
-            (f"Q.{q_id} Which freedom fighter is known as 'Netaji'?", "Subhas Chandra Bose"),
-            (f"Q.{q_id} Which movement was led by Mahatma Gandhi in 1942?", "Quit India Movement"),
-            (f"Q.{q_id} Who gave the slogan 'Give me blood and I will give you freedom'?", "Subhas Chandra Bose"),
-            (f"Q.{q_id} In which year did the Jallianwala Bagh massacre happen?", "1919"),
-        ],
-        "Medium": [
-            (f"Q.{q_id} The Battle of Plassey was fought in which year?", "1757"),
-            (f"Q.{q_id} Who founded the Indian National Congress?", "A.O. Hume"),
-            (f"Q.{q_id} Who was the Viceroy during the partition of Bengal in 1905?", "Lord Curzon"),
-            (f"Q.{q_id} In which session was 'Purna Swaraj' declared by INC?", "Lahore Session, 1929"),
-            (f"Q.{q_id} Who led the Revolt of 1857 in Kanpur?", "Nana Sahib"),
-            (f"Q.{q_id} Which reform act is also known as Montagu-Chelmsford Reforms?", "Government of India Act, 1919"),
-            (f"Q.{q_id} Who was the first Governor-General of independent India?", "Lord Mountbatten"),
-            (f"Q.{q_id} Who introduced Permanent Settlement in Bengal?", "Lord Cornwallis"),
-        ],
-        "Hard": [
-            (f"Q.{q_id} The 'Doctrine of Lapse' was introduced by?", "Lord Dalhousie"),
-            (f"Q.{q_id} Who wrote 'Kitab-ul-Hind'?", "Al-Biruni"),
-            (f"Q.{q_id} In which year was the Simon Commission appointed?", "1927"),
-            (f"Q.{q_id} Who was the founder of the Maurya Empire?", "Chandragupta Maurya"),
-            (f"Q.{q_id} Which Mughal emperor built the Red Fort?", "Shah Jahan"),
-            (f"Q.{q_id} Who was the last ruler of the Mughal Empire?", "Bahadur Shah II"),
-            (f"Q.{q_id} The capital of King Ashoka's empire was?", "Pataliputra"),
-            (f"Q.{q_id} The Treaty of Seringapatam was signed in?", "1792"),
-        ]
-    }
-    
-    question_text, correct_answer = random.choice(history_questions[difficulty])
-    options = generate_history_options(correct_answer, difficulty)
-    
-    return {
-        'question_text': question_text,
-        'optionA': options['A'], 'optionB': options['B'], 'optionC': options['C'], 'optionD': options['D'],
-        'answer': correct_answer, 'category': "SSC", 'course': "SSC Exam", 'created_date': datetime.now()
-    }
+def generate_english_question(q_id, difficulty, rng=random):
+    question_text, correct_answer = rng.choice(TEMPLATE_BANK["English Language"][difficulty]).render(q_id, rng)
+    options = generate_english_options(correct_answer, difficulty, rng)
+    return build_question(question_text, correct_answer, options)
 
-def generate_geography_question(q_id, difficulty):
-    geography_questions = {
-        "Easy": [
-            (f"Q.{q_id} Which is the longest river in India?", "Ganga"),
-            (f"Q.{q_id} What is the capital of Maharashtra?", "Mumbai"),
-            (f"Q.{q_id} Which is the southernmost point of India?", "Indira Point"),
-            (f"Q.{q_id} How many Union Territories are there in India (as of 2025)?", "8"),
-            (f"Q.{q_id} In which state is the Thar Desert located?", "Rajasthan"),
-            (f"Q.{q_id} What is the capital of Kerala?", "Thiruvananthapuram"),
-            (f"Q.{q_id} Mount Everest lies in which mountain range?", "Himalayas"),
-            (f"Q.{q_id} Which Indian river is known as 'Dakshin Ganga'?", "Godavari"),
-        ],
-        "Medium": [
-            (f"Q.{q_id} Which state has the longest coastline in India?", "Gujarat"),
-            (f"Q.{q_id} Which is the largest freshwater lake in India?", "Wular Lake"),
-            (f"Q.{q_id} Which city is known as the 'Silicon Valley of India'?", "Bengaluru"),
-            (f"Q.{q_id} Which Indian state shares its border with maximum states?", "Uttar Pradesh"),
-            (f"Q.{q_id} Tropic of Cancer passes through how many Indian states?", "8"),
-            (f"Q.{q_id} Which plateau is known as the 'Mineral Belt of India'?", "Chotanagpur Plateau"),
-            (f"Q.{q_id} Which Indian river flows westward and falls into the Arabian Sea?", "Narmada"),
-            (f"Q.{q_id} Name the strait that separates India and Sri Lanka.", "Palk Strait"),
-        ],
-        "Hard": [
-            (f"Q.{q_id} The 'Horn of Africa' includes which countries?", "Somalia, Ethiopia, Eritrea, Djibouti"),
-            (f"Q.{q_id} Which river forms the famous Jog Falls?", "Sharavati"),
-            (f"Q.{q_id} Which is the highest active volcano in the world?", "Ojos del Salado"),
-            (f"Q.{q_id} Name the cold desert in India.", "Ladakh"),
-            (f"Q.{q_id} What is the correct order (south to north) of the Himalayan ranges?", "Siwalik, Lesser Himalayas, Greater Himalayas"),
-            (f"Q.{q_id} In which continent is the Great Rift Valley located?", "Africa"),
-            (f"Q.{q_id} Which Indian state has the highest forest cover by area?", "Madhya Pradesh"),
-            (f"Q.{q_id} Which current is responsible for warming the western coasts of Europe?", "Gulf Stream"),
-        ]
-    }
-    
-    question_text, correct_answer = random.choice(geography_questions[difficulty])
-    options = generate_geography_options(correct_answer, difficulty)
-    
-    return {
-        'question_text': question_text,
-        'optionA': options['A'], 'optionB': options['B'], 'optionC': options['C'], 'optionD': options['D'],
-        'answer': correct_answer, 'category': "SSC", 'course': "SSC Exam", 'created_date': datetime.now()
-    }
+def generate_history_question(q_id, difficulty, rng=random):
+    question_text, correct_answer = rng.choice(TEMPLATE_BANK["History"][difficulty]).render(q_id, rng)
+    options = generate_history_options(correct_answer, difficulty, rng)
+    return build_question(question_text, correct_answer, options)
 
-def generate_computer_question(q_id, difficulty):
-    computer_questions = {
-        "Easy": [
-            (f"Q.{q_id} What does CPU stand for?", "Central Processing Unit"),
-            (f"Q.{q_id} Which of these is a programming language?", "Python"),
-            (f"Q.{q_id} What is the full form of RAM?", "Random Access Memory"),
-            (f"Q.{q_id} Which device is used to input data into a computer?", "Keyboard"),
-            (f"Q.{q_id} What does WWW stand for?", "World Wide Web"),
-        ],
-        "Medium": [
-            (f"Q.{q_id} In programming, what does OOP stand for?", "Object Oriented Programming"),
-            (f"Q.{q_id} Which protocol is used for sending emails?", "SMTP"),
-            (f"Q.{q_id} What is the binary equivalent of decimal 10?", "1010"),
-            (f"Q.{q_id} Which language is used for web development?", "HTML"),
-            (f"Q.{q_id} What does SQL stand for?", "Structured Query Language"),
-        ],
-        "Hard": [
-            (f"Q.{q_id} In SQL, which command is used to remove a table?", "DROP TABLE"),
-            (f"Q.{q_id} What does API stand for?", "Application Programming Interface"),
-            (f"Q.{q_id} Which sorting algorithm has worst-case time complexity O(n²)?", "Bubble Sort"),
-            (f"Q.{q_id} What is the purpose of DNS?", "Domain Name System"),
-            (f"Q.{q_id} Which data structure uses LIFO principle?", "Stack"),
-        ]
-    }
-    
-    question_text, correct_answer = random.choice(computer_questions[difficulty])
-    options = generate_computer_options(correct_answer, difficulty)
-    
-    return {
-        'question_text': question_text,
-        'optionA': options['A'], 'optionB': options['B'], 'optionC': options['C'], 'optionD': options['D'],
-        'answer': correct_answer, 'category': "SSC", 'course': "SSC Exam", 'created_date': datetime.now()
-    }
+def generate_geography_question(q_id, difficulty, rng=random):
+    question_text, correct_answer = rng.choice(TEMPLATE_BANK["Geography"][difficulty]).render(q_id, rng)
+    options = generate_geography_options(correct_answer, difficulty, rng)
+    return build_question(question_text, correct_answer, options)
 
-def generate_current_affairs_question(q_id, difficulty):
-    current_affairs = {
-        "Easy": [
-            (f"Q.{q_id} Who is the current Prime Minister of India?", "Narendra Modi"),
-            (f"Q.{q_id} Which country hosted the 2023 G20 Summit?", "India"),
-            (f"Q.{q_id} Who is the current President of India?", "Droupadi Murmu"),
-            (f"Q.{q_id} Which city will host the 2032 Summer Olympics?", "Brisbane"),
-            (f"Q.{q_id} What is the currency of Japan?", "Yen"),
-            (f"Q.{q_id} Which country recently launched the Artemis I mission?", "USA"),
-        ],
-        "Medium": [
-            (f"Q.{q_id} The Chandrayaan-3 mission was launched in which year?", "2023"),
-            (f"Q.{q_id} Who won the Nobel Peace Prize 2023?", "Narges Mohammadi"),
-            (f"Q.{q_id} Which country recently became the 195th member of the UN?", "South Sudan"),
-            (f"Q.{q_id} Which Indian state recently became the first to provide free Wi-Fi to all villages?", "Kerala"),
-            (f"Q.{q_id} Name the Indian who won the Booker Prize in 2023.", "Geetanjali Shree"),
-            (f"Q.{q_id} Who is the Chairperson of the Finance Commission of India (2023)?", "N.K. Singh"),
-        ],
-        "Hard": [
-            (f"Q.{q_id} The 'Viksit Bharat' vision aims for India to become developed by which year?", "2047"),
-            (f"Q.{q_id} Which country recently changed its name to Türkiye?", "Turkey"),
-            (f"Q.{q_id} The International Solar Alliance was launched in which year?", "2015"),
-            (f"Q.{q_id} Who is the current Secretary-General of the United Nations?", "António Guterres"),
-            (f"Q.{q_id} Which country hosts the headquarters of the International Criminal Court (ICC)?", "Netherlands"),
-            (f"Q.{q_id} When was the National Education Policy (NEP) 2020 implemented in India?", "2020"),
-        ]
-    }
-    
-    question_text, correct_answer = random.choice(current_affairs[difficulty])
-    options = generate_current_affairs_options(correct_answer, difficulty)
-    
-    return {
-        'question_text': question_text,
-        'optionA': options['A'], 'optionB': options['B'], 'optionC': options['C'], 'optionD': options['D'],
-        'answer': correct_answer, 'category': "SSC", 'course': "SSC Exam", 'created_date': datetime.now()
-    }
+def generate_computer_question(q_id, difficulty, rng=random):
+    question_text, correct_answer = rng.choice(TEMPLATE_BANK["Computer Science"][difficulty]).render(q_id, rng)
+    options = generate_computer_options(correct_answer, difficulty, rng)
+    return build_question(question_text, correct_answer, options)
 
-def generate_gk_question(q_id, difficulty):
-    gk_questions = {
-        "Easy": [
-            (f"Q.{q_id} How many states are there in India?", "28"),
-            (f"Q.{q_id} Who is known as the Missile Man of India?", "Dr. A.P.J. Abdul Kalam"),
-            (f"Q.{q_id} What is the national animal of India?", "Tiger"),
-            (f"Q.{q_id} Who wrote the Indian National Anthem?", "Rabindranath Tagore"),
-            (f"Q.{q_id} Which planet is known as the Red Planet?", "Mars"),
-            (f"Q.{q_id} What is the currency of India?", "Indian Rupee"),
-        ],
-        "Medium": [
-            (f"Q.{q_id} The Rajya Sabha can have maximum how many members?", "250"),
-            (f"Q.{q_id} Who was the first woman President of India?", "Pratibha Patil"),
-            (f"Q.{q_id} Which is the largest organ in the human body?", "Skin"),
-            (f"Q.{q_id} Which country is the largest producer of tea?", "China"),
-            (f"Q.{q_id} Which element has the chemical symbol 'Fe'?", "Iron"),
-            (f"Q.{q_id} What does GDP stand for?", "Gross Domestic Product"),
-        ],
-        "Hard": [
-            (f"Q.{q_id} The 'Kalinga War' was fought in which year?", "261 BCE"),
-            (f"Q.{q_id} Who was the first Indian to win Nobel Prize?", "Rabindranath Tagore"),
-            (f"Q.{q_id} Which treaty ended the First Anglo-Mysore War?", "Treaty of Madras"),
-            (f"Q.{q_id} What is the half-life of Uranium-238?", "4.468 billion years"),
-            (f"Q.{q_id} Name the author of the book 'Discovery of India'.", "Jawaharlal Nehru"),
-            (f"Q.{q_id} What is the capital of Bhutan?", "Thimphu"),
-        ]
-    }
-    
-    question_text, correct_answer = random.choice(gk_questions[difficulty])
-    options = generate_gk_options(correct_answer, difficulty)
-    
-    return {
-        'question_text': question_text,
-        'optionA': options['A'], 'optionB': options['B'], 'optionC': options['C'], 'optionD': options['D'],
-        'answer': correct_answer, 'category': "SSC", 'course': "SSC Exam", 'created_date': datetime.now()
-    }
+def generate_current_affairs_question(q_id, difficulty, rng=random):
+    question_text, correct_answer = rng.choice(TEMPLATE_BANK["Current Affairs"][difficulty]).render(q_id, rng)
+    options = generate_current_affairs_options(correct_answer, difficulty, rng)
+    return build_question(question_text, correct_answer, options)
 
-# ==============================
-# OPTION GENERATORS
-# ==============================
+def generate_gk_question(q_id, difficulty, rng=random):
+    question_text, correct_answer = rng.choice(TEMPLATE_BANK["General Awareness"][difficulty]).render(q_id, rng)
+    options = generate_gk_options(correct_answer, difficulty, rng)
+    return build_question(question_text, correct_answer, options)
 
-def generate_math_options(correct_answer, difficulty):
-    try:
-        # Handle comma-separated answers
-        if ',' in correct_answer:
-            correct_num = float(correct_answer.split(',')[0])
-        else:
-            correct_num = float(correct_answer) if '.' in correct_answer else int(correct_answer)
-    except:
-        correct_num = random.randint(1, 100)
-    
-    variations = [1, 2, 5, 10] if difficulty == "Easy" else [3, 7, 15, 25]
-    
-    options = [
-        str(correct_num),
-        str(correct_num + random.choice(variations)),
-        str(correct_num - random.choice(variations)),
-        str(correct_num * random.choice([2, 3]))
-    ]
-    random.shuffle(options)
-    
-    return {'A': options[0], 'B': options[1], 'C': options[2], 'D': options[3]}
+SUBJECT_GENERATORS = {
+    "Quantitative Aptitude": generate_math_question,
+    "General Intelligence & Reasoning": generate_reasoning_question,
+    "English Language": generate_english_question,
+    "History": generate_history_question,
+    "Geography": generate_geography_question,
+    "Computer Science": generate_computer_question,
+    "Current Affairs": generate_current_affairs_question,
+    "General Awareness": generate_gk_question,
+}
 
-def generate_reasoning_options(correct_answer, category):
-    wrong_options_map = {
-        "Analogies": ["Eat", "Sharp", "Cook", "Write", "Jump", "Run", "Throw", "Read"],
-        "Number Series": ["28", "32", "35", "40", "45", "50", "55", "60"],
-        "Coding-Decoding": ["PSBOHE", "PSBOHG", "PSBOFG", "PSBOHE", "OSBPEF", "QSBPOG"],
-        "Blood Relations": ["Father", "Sister", "Grandmother", "Aunt", "Uncle", "Cousin"],
-        "Direction Sense": ["North", "South", "West", "North-West", "South-East", "East"],
-    }
-    
-    wrong_options = wrong_options_map.get(category, ["Option1", "Option2", "Option3", "Option4"])
-    options = [correct_answer] + random.sample(wrong_options, 3)
-    random.shuffle(options)
-    
-    return {'A': options[0], 'B': options[1], 'C': options[2], 'D': options[3]}
+# ==============================
+# OPTION GENERATORS (precomputed distractor pools)
+# ==============================
 
-def generate_english_options(correct_answer, difficulty):
-    synonyms = {
+# Hand-picked distractors for specific answers; the answer itself is dropped if listed
+CURATED_DISTRACTORS = {
+    "Quantitative Aptitude": {
+        "2,3": ["1,6", "-2,-3", "3,4"],
+        "x=3, y=3": ["x=2, y=4", "x=4, y=2", "x=1, y=5"],
+    },
+    "English Language": {
         "Kind": ["Benevolent", "Compassionate", "Generous", "Gentle"],
         "Went": ["Gone", "Goed", "Going", "Goes"],
         "Permanent": ["Lasting", "Enduring", "Constant", "Perpetual"],
         "Sad": ["Unhappy", "Depressed", "Miserable", "Sorrowful"],
         "Beautiful": ["Pretty", "Lovely", "Gorgeous", "Stunning"]
-    }
-    
-    if correct_answer in synonyms:
-        options = [correct_answer] + synonyms[correct_answer][:3]
-    else:
-        options = [correct_answer, "Option1", "Option2", "Option3"]
-    
-    random.shuffle(options)
-    return {'A': options[0], 'B': options[1], 'C': options[2], 'D': options[3]}
-
-def generate_history_options(correct_answer, difficulty):
-    historical_options = {
+    },
+    "History": {
         "Dr. B.R. Ambedkar": ["Mahatma Gandhi", "Jawaharlal Nehru", "Sardar Patel", "B.R. Ambedkar"],
         "1947": ["1942", "1950", "1947", "1935"],
         "1757": ["1756", "1761", "1757", "1748"],
         "Jawaharlal Nehru": ["Mahatma Gandhi", "Sardar Patel", "Jawaharlal Nehru", "Subhas Chandra Bose"],
         "1919": ["1918", "1920", "1919", "1921"]
-    }
-    
-    if correct_answer in historical_options:
-        options = historical_options[correct_answer]
-    else:
-        options = [correct_answer, "Option1", "Option2", "Option3"]
-    
-    random.shuffle(options)
-    return {'A': options[0], 'B': options[1], 'C': options[2], 'D': options[3]}
-
-def generate_geography_options(correct_answer, difficulty):
-    geography_options = {
+    },
+    "Geography": {
         "Ganga": ["Yamuna", "Brahmaputra", "Ganga", "Godavari"],
         "Mumbai": ["Pune", "Mumbai", "Nagpur", "Thane"],
         "Gujarat": ["Maharashtra", "Tamil Nadu", "Gujarat", "Kerala"],
         "8": ["7", "9", "8", "10"],
         "Himalayas": ["Western Ghats", "Eastern Ghats", "Himalayas", "Aravalli"]
-    }
-    
-    if correct_answer in geography_options:
-        options = geography_options[correct_answer]
-    else:
-        options = [correct_answer, "Option1", "Option2", "Option3"]
-    
-    random.shuffle(options)
-    return {'A': options[0], 'B': options[1], 'C': options[2], 'D': options[3]}
-
-def generate_computer_options(correct_answer, difficulty):
-    computer_options = {
+    },
+    "Computer Science": {
         "Central Processing Unit": ["Computer Processing Unit", "Central Programming Unit", "Central Processing Unit", "Control Processing Unit"],
         "Python": ["Cobra", "Anaconda", "Python", "Viper"],
         "Object Oriented Programming": ["Object Organized Programming", "Object Oriented Programming", "Objective Oriented Programming", "Object Origin Programming"],
         "SMTP": ["HTTP", "FTP", "SMTP", "TCP"],
         "1010": ["1001", "1100", "1010", "1111"]
-    }
-    
-    if correct_answer in computer_options:
-        options = computer_options[correct_answer]
-    else:
-        options = [correct_answer, "Option1", "Option2", "Option3"]
-    
-    random.shuffle(options)
-    return {'A': options[0], 'B': options[1], 'C': options[2], 'D': options[3]}
-
-def generate_current_affairs_options(correct_answer, difficulty):
-    current_options = {
+    },
+    "Current Affairs": {
         "Narendra Modi": ["Rahul Gandhi", "Narendra Modi", "Amit Shah", "Manmohan Singh"],
         "India": ["USA", "China", "India", "Japan"],
         "2023": ["2022", "2024", "2023", "2025"],
         "Droupadi Murmu": ["Pratibha Patil", "Ram Nath Kovind", "Droupadi Murmu", "APJ Abdul Kalam"],
         "Yen": ["Dollar", "Euro", "Yen", "Yuan"]
-    }
-    
-    if correct_answer in current_options:
-        options = current_options[correct_answer]
-    else:
-        options = [correct_answer, "Option1", "Option2", "Option3"]
-    
-    random.shuffle(options)
-    return {'A': options[0], 'B': options[1], 'C': options[2], 'D': options[3]}
-
-def generate_gk_options(correct_answer, difficulty):
-    gk_options = {
+    },
+    "General Awareness": {
         "28": ["25", "29", "28", "30"],
         "Dr. A.P.J. Abdul Kalam": ["Vikram Sarabhai", "Dr. A.P.J. Abdul Kalam", "Homi Bhabha", "C.V. Raman"],
         "Tiger": ["Lion", "Elephant", "Tiger", "Leopard"],
         "Rabindranath Tagore": ["Bankim Chandra Chatterjee", "Rabindranath Tagore", "Sarojini Naidu", "Mahatma Gandhi"],
         "Mars": ["Venus", "Jupiter", "Mars", "Saturn"]
-    }
-    
-    if correct_answer in gk_options:
-        options = gk_options[correct_answer]
+    },
+}
+
+# Extra distractors shared by every question of a reasoning category
+CATEGORY_DISTRACTORS = {
+    "Analogies": ["Eat", "Sharp", "Cook", "Write", "Jump", "Run", "Throw", "Read"],
+    "Number Series": ["28", "32", "35", "40", "45", "50", "55", "60"],
+    "Coding-Decoding": ["PSBOHE", "PSBOHG", "PSBOFG", "OSBPEF", "QSBPOG"],
+    "Blood Relations": ["Father", "Sister", "Grandmother", "Aunt", "Uncle", "Cousin"],
+    "Direction Sense": ["North", "South", "West", "North-West", "South-East", "East"],
+}
+
+# Numeric answers get perturbed copies: answer ± offset, or a multiple of it
+NUMERIC_OFFSETS = {"Easy": (1, 2, 5, 10), "Medium": (3, 7, 15, 25), "Hard": (3, 7, 15, 25)}
+NUMERIC_MULTIPLIERS = (2, 3)
+MAX_POOL_SIZE = 8  # most relevant candidates kept per answer (8 * 7 * 6 ordered triples)
+_NUMERIC_ANSWER = re.compile(r'^(\d+(?:\.(\d+))?)(\s*[A-Za-z/%].*)?$')
+
+def build_perturbation_table(offsets):
+    """Every choice of three distinct (multiplier, offset) transforms, built once per difficulty"""
+    transforms = [(1, sign * offset) for offset in offsets for sign in (1, -1)]
+    transforms += [(multiplier, 0) for multiplier in NUMERIC_MULTIPLIERS]
+    return tuple(itertools.combinations(transforms, 3))
+
+PERTURBATION_TABLES = {difficulty: build_perturbation_table(offsets) for difficulty, offsets in NUMERIC_OFFSETS.items()}
+
+def parse_numeric_answer(answer):
+    """(value, decimals, suffix) for answers like '154', '0.433' or '60 km/h', else None"""
+    match = _NUMERIC_ANSWER.match(answer)
+    if not match:
+        return None
+    decimals = len(match.group(2) or "")
+    return float(match.group(1)), decimals, match.group(3) or ""
+
+def numeric_distractors(parsed, difficulty, rng=random):
+    value, decimals, suffix = parsed
+    scale = 10 ** -(decimals - 1) if decimals > 1 else 10 ** -decimals
+    table = PERTURBATION_TABLES.get(difficulty, PERTURBATION_TABLES["Medium"])
+    answer = f"{value:.{decimals}f}"
+    for _ in range(4):
+        transforms = table[int(rng.random() * len(table))]
+        picked = {f"{value * multiplier + offset * scale:.{decimals}f}" for multiplier, offset in transforms}
+        picked.discard(answer)
+        if len(picked) == 3 and not any(p.startswith("-") for p in picked):
+            return [p + suffix for p in picked]
+    # Small values: plain additions are always distinct and positive
+    return [f"{value + offset * scale:.{decimals}f}{suffix}" for offset in NUMERIC_OFFSETS["Medium"][:3]]
+
+def build_distractor_pools():
+    """
+    Precompute every ordered distractor triple for each static answer in the bank.
+
+    Curated lists come first; otherwise candidates are other answers of the
+    same difficulty/category, then of the whole subject. Numeric answers are
+    left to the perturbation tables so the distractors stay numbers. Drawing
+    options is then one index into a tuple plus an answer position.
+    """
+    pools = {}
+    numeric = {}
+    for subject, bank in TEMPLATE_BANK.items():
+        curated = CURATED_DISTRACTORS.get(subject, {})
+        static_answers = [t.answer for templates in bank.values() for t in templates if not t.params]
+        subject_text = [a for a in static_answers if parse_numeric_answer(a) is None]
+
+        for key, templates in bank.items():
+            key_text = [t.answer for t in templates if not t.params and parse_numeric_answer(t.answer) is None]
+            for template in templates:
+                if template.params:
+                    continue
+                answer = template.answer
+                parsed = parse_numeric_answer(answer)
+                if answer not in curated and parsed is not None:
+                    numeric[(subject, key, answer)] = parsed
+                    continue
+
+                preferred = curated.get(answer, [])
+                if len([c for c in preferred if c != answer]) < 3:
+                    preferred = preferred + CATEGORY_DISTRACTORS.get(key, []) + key_text
+                candidates = list(dict.fromkeys(c for c in preferred if c != answer))
+                if len(candidates) < 3:
+                    candidates += [c for c in dict.fromkeys(subject_text) if c != answer and c not in candidates]
+                while len(candidates) < 3:
+                    candidates.append("None of these" if "None of these" not in candidates else f"None of these ({len(candidates)})")
+                pools[(subject, key, answer)] = tuple(itertools.permutations(candidates[:MAX_POOL_SIZE], 3))
+    return pools, numeric
+
+DISTRACTOR_POOLS, NUMERIC_ANSWERS = build_distractor_pools()
+
+def draw_options(subject, key, correct_answer, rng=random):
+    """Three distractors from the precomputed pools plus the answer at a random position"""
+    triples = DISTRACTOR_POOLS.get((subject, key, correct_answer))
+    if triples is not None:
+        options = list(triples[int(rng.random() * len(triples))])
     else:
-        options = [correct_answer, "Option1", "Option2", "Option3"]
-    
-    random.shuffle(options)
+        parsed = NUMERIC_ANSWERS.get((subject, key, correct_answer)) or parse_numeric_answer(correct_answer)
+        if parsed is not None:
+            options = numeric_distractors(parsed, key, rng)
+        else:
+            options = ["None of these", "All of these", "Cannot be determined"]
+    options.insert(int(rng.random() * 4), correct_answer)
     return {'A': options[0], 'B': options[1], 'C': options[2], 'D': options[3]}
 
+def generate_math_options(correct_answer, difficulty, rng=random):
+    return draw_options("Quantitative Aptitude", difficulty, correct_answer, rng)
+
+def generate_reasoning_options(correct_answer, category, rng=random):
+    return draw_options("General Intelligence & Reasoning", category, correct_answer, rng)
+
+def generate_english_options(correct_answer, difficulty, rng=random):
+    return draw_options("English Language", difficulty, correct_answer, rng)
+
+def generate_history_options(correct_answer, difficulty, rng=random):
+    return draw_options("History", difficulty, correct_answer, rng)
+
+def generate_geography_options(correct_answer, difficulty, rng=random):
+    return draw_options("Geography", difficulty, correct_answer, rng)
+
+def generate_computer_options(correct_answer, difficulty, rng=random):
+    return draw_options("Computer Science", difficulty, correct_answer, rng)
+
+def generate_current_affairs_options(correct_answer, difficulty, rng=random):
+    return draw_options("Current Affairs", difficulty, correct_answer, rng)
+
+def generate_gk_options(correct_answer, difficulty, rng=random):
+    return draw_options("General Awareness", difficulty, correct_answer, rng)
+
 # ==============================
-# Bulk Insert Function (Updated with Subject)
+# Vectorized Batch Generator (NumPy)
 # ==============================
-def bulk_insert_questions(questions_data):
-    insert_query = """
-    INSERT INTO SSC_MCQ_Questions 
-    (Question, OptionA, OptionB, OptionC, OptionD, Answer, Categoery, Course, CREATEDDATE, Subject)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+OPTION_GENERATORS = {
+    "Quantitative Aptitude": generate_math_options,
+    "General Intelligence & Reasoning": generate_reasoning_options,
+    "English Language": generate_english_options,
+    "History": generate_history_options,
+    "Geography": generate_geography_options,
+    "Computer Science": generate_computer_options,
+    "Current Affairs": generate_current_affairs_options,
+    "General Awareness": generate_gk_options,
+}
+
+BATCH_CHUNK_SIZE = 100000  # questions per vectorized draw and per streamed chunk
+
+_flat_templates = None
+
+def flat_template_table():
+    """Every template in one flat list plus [subject, key] offset/size lookup arrays (built once)"""
+    global _flat_templates
+    if _flat_templates is None:
+        require_numpy()
+        subject_names = [subject for subject, _ in SUBJECTS_WITH_WEIGHTS]
+        max_keys = max(len(TEMPLATE_BANK[subject]) for subject in subject_names)
+        entries = []
+        offsets = np.zeros((len(subject_names), max_keys), dtype=np.int64)
+        sizes = np.ones((len(subject_names), max_keys), dtype=np.int64)
+        for s_idx, subject in enumerate(subject_names):
+            for k_idx, (key, templates) in enumerate(TEMPLATE_BANK[subject].items()):
+                offsets[s_idx, k_idx] = len(entries)
+                sizes[s_idx, k_idx] = len(templates)
+                entries.extend((subject, key, template) for template in templates)
+        _flat_templates = (subject_names, entries, offsets, sizes)
+    return _flat_templates
+
+_option_tables = {}
+
+def numeric_triples(parsed, difficulty):
+    """Every ordered distractor triple numeric_distractors can draw for one fixed answer"""
+    value, decimals, suffix = parsed
+    scale = 10 ** -(decimals - 1) if decimals > 1 else 10 ** -decimals
+    answer = f"{value:.{decimals}f}"
+    triples = []
+    for transforms in PERTURBATION_TABLES.get(difficulty, PERTURBATION_TABLES["Medium"]):
+        picked = {f"{value * multiplier + offset * scale:.{decimals}f}" for multiplier, offset in transforms}
+        picked.discard(answer)
+        if len(picked) == 3 and not any(p.startswith("-") for p in picked):
+            triples.extend(itertools.permutations([p + suffix for p in picked]))
+    return triples or [tuple(f"{value + offset * scale:.{decimals}f}{suffix}" for offset in NUMERIC_OFFSETS["Medium"][:3])]
+
+def option_table(subject, key, answer):
+    """(n, 4) object array of every A-D a fixed answer can get, so a batch draws its options with one index (built on first use)"""
+    table = _option_tables.get((subject, key, answer))
+    if table is None:
+        triples = DISTRACTOR_POOLS.get((subject, key, answer))
+        if triples is None:
+            parsed = NUMERIC_ANSWERS.get((subject, key, answer)) or parse_numeric_answer(answer)
+            triples = numeric_triples(parsed, key) if parsed is not None else [("None of these", "All of these", "Cannot be determined")]
+        table = np.array([triple[:pos] + (answer,) + triple[pos:] for triple in triples for pos in range(4)], dtype=object)
+        _option_tables[(subject, key, answer)] = table
+    return table
+
+def place_answers(distractors, answers, np_rng):
+    """(n, 4) options from (n, 3) distractors with each answer put at a random position"""
+    count = len(answers)
+    positions = np_rng.integers(0, 4, size=count)
+    answers = np.array(answers, dtype=object)
+    options = np.empty((count, 4), dtype=object)
+    row_index = np.arange(count)
+    for slot in range(4):
+        source = np.where(positions < slot, slot - 1, min(slot, 2))
+        options[:, slot] = np.where(positions == slot, answers, distractors[row_index, source])
+    return options
+
+def numeric_options_batch(subject, key, answers, np_rng):
+    """(n, 4) options for a group whose numeric answers differ row by row (parameterized templates)"""
+    parsed = [parse_numeric_answer(answer) for answer in answers]
+    if any(p is None for p in parsed) or len({p[1:] for p in parsed}) > 1:
+        option_rng = random.Random(int(np_rng.integers(0, 2 ** 63)))
+        return np.array([tuple(draw_options(subject, key, answer, option_rng).values()) for answer in answers], dtype=object)
+
+    _, decimals, suffix = parsed[0]
+    scale = 10 ** -(decimals - 1) if decimals > 1 else 10 ** -decimals
+    values = np.array([p[0] for p in parsed])
+    table = np.array(PERTURBATION_TABLES.get(key, PERTURBATION_TABLES["Medium"]), dtype=np.float64)  # (transforms, 3, 2)
+    distractors = values[:, None] + np.array(NUMERIC_OFFSETS["Medium"][:3]) * scale   # fallback, as in numeric_distractors
+    pending = np.arange(len(values))
+    for _ in range(4):
+        picks = table[np_rng.integers(0, len(table), size=pending.size)]
+        candidates = values[pending, None] * picks[:, :, 0] + picks[:, :, 1] * scale
+        rounded = np.round(candidates, decimals)
+        valid = ((candidates >= 0).all(axis=1)
+                 & (rounded != np.round(values[pending], decimals)[:, None]).all(axis=1)
+                 & (rounded[:, 0] != rounded[:, 1]) & (rounded[:, 0] != rounded[:, 2]) & (rounded[:, 1] != rounded[:, 2]))
+        distractors[pending[valid]] = candidates[valid]
+        pending = pending[~valid]
+        if not pending.size:
+            break
+
+    text = np.array([f"{value:.{decimals}f}{suffix}" for value in distractors.ravel().tolist()], dtype=object)
+    return place_answers(text.reshape(-1, 3), answers, np_rng)
+
+def generate_question_batch(start_id, count, np_rng):
     """
-    
-    batch_size = 500  # Increased batch size for better performance
-    total_questions = len(questions_data)
-    inserted_count = 0
-    
-    # Count questions by subject
-    subject_count = {}
-    
-    for i in range(0, total_questions, batch_size):
-        batch = questions_data[i:i + batch_size]
-        
+    Generate questions start_id .. start_id + count - 1 in one vectorized pass.
+
+    Subject, difficulty (or reasoning category), template choice, numeric
+    parameters and options are drawn for the whole batch with NumPy. Rows are
+    grouped by template: a fixed answer takes its options from a precomputed
+    table with one index per row, parameterized answers get their distractors
+    with array arithmetic. Returns row tuples in INSERT_COLUMNS order.
+    """
+    subject_names, entries, offsets, sizes = flat_template_table()
+    weights = np.array([weight for _, weight in SUBJECTS_WITH_WEIGHTS], dtype=np.float64)
+    reasoning_idx = subject_names.index("General Intelligence & Reasoning")
+
+    subjects = np_rng.choice(len(subject_names), size=count, p=weights / weights.sum())
+    keys = np.where(subjects == reasoning_idx,
+                    np_rng.integers(0, len(REASONING_CATEGORIES), size=count),
+                    np_rng.integers(0, len(DIFFICULTIES), size=count))
+    group_sizes = sizes[subjects, keys]
+    flat = offsets[subjects, keys] + np.minimum((np_rng.random(count) * group_sizes).astype(np.int64), group_sizes - 1)
+    created_date = datetime.now()
+
+    order = np.argsort(flat, kind='stable')
+    sorted_flat = flat[order]
+    bounds = np.flatnonzero(np.diff(sorted_flat)) + 1
+    question_col = np.empty(count, dtype=object)
+    answer_col = np.empty(count, dtype=object)
+    option_cols = np.empty((count, 4), dtype=object)
+
+    for rows in np.split(order, bounds):
+        if not rows.size:
+            continue
+        subject, key, template = entries[int(flat[rows[0]])]
+        q_ids = (rows + start_id).tolist()
+
+        if template.params:
+            names = [name for name, _, _ in template.params]
+            columns = [np_rng.integers(low, high + 1, size=rows.size).tolist() for _, low, high in template.params]
+            texts, answers = [], []
+            for q_id, values in zip(q_ids, zip(*columns)):
+                params = dict(zip(names, values))
+                texts.append(f"Q.{q_id} " + template.body.format(**params))
+                answers.append(template.answer_fn(**params))
+            answer_col[rows] = answers
+            option_cols[rows] = numeric_options_batch(subject, key, answers, np_rng)
+        else:
+            body = template.body
+            texts = [f"Q.{q_id} {body}" for q_id in q_ids]
+            answer_col[rows] = template.answer
+            table = option_table(subject, key, template.answer)
+            option_cols[rows] = table[np_rng.integers(0, len(table), size=rows.size)]
+        question_col[rows] = texts
+
+    option_a, option_b, option_c, option_d = option_cols.T.tolist()
+    subject_col = np.array(subject_names, dtype=object)[subjects]
+    return list(zip(question_col.tolist(), option_a, option_b, option_c, option_d, answer_col.tolist(),
+                    itertools.repeat("SSC", count), itertools.repeat("SSC Exam", count),
+                    itertools.repeat(created_date, count), subject_col.tolist()))
+
+def generate_question_data_vectorized(num_questions=10000, seed=None, chunk_size=BATCH_CHUNK_SIZE):
+    """Batch-mode counterpart of generate_question_data (as INSERT_COLUMNS rows); the same seed gives the same bank"""
+    questions_data = []
+    for _, chunk in iter_question_chunks(num_questions, seed, True, chunk_size):
+        questions_data.extend(chunk)
+    return questions_data
+
+# ==============================
+# Bulk Insert Function (Updated with Subject)
+# ==============================
+BULK_BATCH_SIZE = 5000        # rows per executemany round trip / commit
+BULK_MAX_RETRIES = 3          # retries per batch on deadlocks and transient errors
+FAILED_BATCHES_PATH = "ssc_failed_batches.jsonl"
+
+INSERT_COLUMNS = ["Question", "OptionA", "OptionB", "OptionC", "OptionD", "Answer", "Categoery", "Course", "CREATEDDATE", "Subject"]
+QUESTION_KEYS = ["question_text", "optionA", "optionB", "optionC", "optionD", "answer", "category", "course", "created_date", "subject"]
+
+def question_row(question):
+    return (
+        question['question_text'],
+        question['optionA'],
+        question['optionB'],
+        question['optionC'],
+        question['optionD'],
+        question['answer'],
+        question['category'],
+        question['course'],
+        question['created_date'],
+        question['subject']
+    )
+
+def question_rows(questions_data):
+    """INSERT_COLUMNS rows for a chunk of question dicts; batch mode already yields rows"""
+    if questions_data and isinstance(questions_data[0], dict):
+        return [question_row(question) for question in questions_data]
+    return questions_data
+
+def insert_batch(rows, max_retries=BULK_MAX_RETRIES):
+    """Send one batch (fast_executemany on SQL Server) and commit it, retrying transient failures"""
+    for attempt in range(max_retries + 1):
         try:
-            for question in batch:
-                cursor.execute(insert_query, 
-                    question['question_text'],
-                    question['optionA'],
-                    question['optionB'], 
-                    question['optionC'],
-                    question['optionD'],
-                    question['answer'],
-                    question['category'],
-                    question['course'],
-                    question['created_date'],
-                    question['subject']
-                )
-                
-                # Count by subject
-                subject = question['subject']
-                subject_count[subject] = subject_count.get(subject, 0) + 1
-            
-            conn.commit()
-            inserted_count += len(batch)
-            print(f"Inserted batch {i//batch_size + 1}: {len(batch)} questions (Total: {inserted_count})")
-            
-        except Exception as e:
-            print(f"Error inserting batch: {e}")
-            conn.rollback()
+            mcq_db.insert_mcqs(INSERT_COLUMNS, rows)
+            mcq_db.commit()
+            return None
+        except storage.StorageError as e:
+            # insert_mcqs has already rolled the batch back
+            if attempt < max_retries and e.transient:
+                delay = 0.5 * (2 ** attempt) * random.uniform(1, 1.5)
+                print(f"🔁 Transient error ({e}), retrying batch in {delay:.1f}s...")
+                time.sleep(delay)
+                continue
+            return e
+
+def save_failed_batch(first_row, rows, error, path=FAILED_BATCHES_PATH):
+    """Append a failed batch to a JSON-lines file so it can be inspected and replayed"""
+    with open(path, "a", encoding="utf-8") as f:
+        for offset, row in enumerate(rows):
+            record = dict(zip(QUESTION_KEYS, row))
+            record["created_date"] = record["created_date"].isoformat()
+            record["row"] = first_row + offset
+            record["error"] = str(error)
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+class LoadStats:
+    """Running totals of a load, shared by the one-shot and streaming loaders"""
+
+    def __init__(self):
+        self.generated = 0
+        self.inserted = 0
+        self.failed_batches = []
+        self.subject_count = {}
+        self.started = time.perf_counter()
+
+def load_questions(questions_data, first_row, stats, batch_size=BULK_BATCH_SIZE, max_retries=BULK_MAX_RETRIES):
+    """Insert a list of questions (dicts or rows) in batches; first_row numbers them for the failure report"""
+    all_rows = question_rows(questions_data)
+    for i in range(0, len(all_rows), batch_size):
+        rows = all_rows[i:i + batch_size]
+        batch_first = first_row + i
+        
+        error = insert_batch(rows, max_retries)
+        if error is not None:
+            print(f"❌ Batch failed (rows {batch_first}-{batch_first + len(rows) - 1}): {error}")
+            save_failed_batch(batch_first, rows, error)
+            stats.failed_batches.append((batch_first, len(rows), str(error)))
+            continue
+        
+        stats.inserted += len(rows)
+        for row in rows:
+            subject = row[-1]
+            stats.subject_count[subject] = stats.subject_count.get(subject, 0) + 1
+        print(f"Inserted rows {batch_first}-{batch_first + len(rows) - 1} (Total: {stats.inserted:,})")
+
+def print_load_report(stats):
+    elapsed = time.perf_counter() - stats.started
+    print(f"\n⚡ Loaded {stats.inserted:,} rows in {elapsed:.2f}s ({stats.inserted / max(elapsed, 1e-9):,.0f} rows/sec)")
+    
+    if stats.failed_batches:
+        failed_rows = sum(size for _, size, _ in stats.failed_batches)
+        print(f"⚠️ {len(stats.failed_batches)} batches ({failed_rows:,} rows) failed and were saved to {FAILED_BATCHES_PATH}:")
+        for first_row, size, error in stats.failed_batches:
+            print(f"  rows {first_row}-{first_row + size - 1}: {error}")
     
     # Print subject-wise distribution
     print("\n📊 Subject-wise Question Distribution:")
-    for subject, count in subject_count.items():
-        percentage = (count / total_questions) * 100
+    for subject, count in stats.subject_count.items():
+        percentage = (count / max(stats.inserted, 1)) * 100
         print(f"  {subject}: {count} questions ({percentage:.1f}%)")
-    
-    return inserted_count
+
+def bulk_insert_questions(questions_data, batch_size=BULK_BATCH_SIZE, max_retries=BULK_MAX_RETRIES):
+    stats = LoadStats()
+    stats.generated = len(questions_data)
+    load_questions(questions_data, 1, stats, batch_size, max_retries)
+    print_load_report(stats)
+    return stats.inserted
+
+# ==============================
+# Streaming Generate -> Load Pipeline
+# ==============================
+STREAM_QUEUE_SIZE = 4       # chunks buffered between generator and loader
+
+def iter_question_chunks(num_questions, seed=None, batch=False, chunk_size=BATCH_CHUNK_SIZE):
+    """Yield (first_id, questions) chunks so the whole bank never sits in memory"""
+    if batch:
+        np_rng = require_numpy().random.default_rng(seed)
+    else:
+        rng = random.Random(seed) if seed is not None else random
+
+    for start in range(1, num_questions + 1, chunk_size):
+        count = min(chunk_size, num_questions - start + 1)
+        if batch:
+            yield start, generate_question_batch(start, count, np_rng)
+        else:
+            yield start, generate_question_chunk(start, count, rng)
+
+def stream_questions_to_db(chunks, batch_size=BULK_BATCH_SIZE, max_retries=BULK_MAX_RETRIES, queue_size=STREAM_QUEUE_SIZE):
+    """
+    Generate on this thread while a loader thread inserts earlier chunks.
+
+    The bounded queue blocks the generator when the database falls behind, so
+    at most queue_size + 2 chunks are alive at any time regardless of the
+    total number of questions.
+    """
+    stats = LoadStats()
+    pending = queue.Queue(maxsize=queue_size)
+    loader_error = []
+
+    def loader():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            first_row, questions_data = item
+            try:
+                load_questions(questions_data, first_row, stats, batch_size, max_retries)
+            except Exception as e:
+                loader_error.append(e)
+                return
+
+    loader_thread = threading.Thread(target=loader, name="ssc-loader", daemon=True)
+    loader_thread.start()
+    try:
+        for first_row, questions_data in chunks:
+            if loader_error:
+                break
+            stats.generated += len(questions_data)
+            # put() with a timeout so a dead loader cannot block the generator forever
+            while loader_thread.is_alive():
+                try:
+                    pending.put((first_row, questions_data), timeout=1)
+                    break
+                except queue.Full:
+                    continue
+            else:
+                break
+    finally:
+        if loader_thread.is_alive():
+            pending.put(None)
+        loader_thread.join()
+
+    if loader_error:
+        raise loader_error[0]
+    print_load_report(stats)
+    return stats
+
+# ==============================
+# Sharded Multi-Process Generation
+# ==============================
+SHARD_SIZE = 25000              # questions per shard (one worker task); small, so the row budget below feeds many workers
+MAX_ROWS_IN_FLIGHT = STREAM_QUEUE_SIZE * BATCH_CHUNK_SIZE   # submitted or unconsumed shard rows the parent may hold
+
+def shard_seed(master_seed, shard_index):
+    """Independent, reproducible seed for one shard derived from the master seed"""
+    digest = hashlib.sha256(f"{master_seed}:{shard_index}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def plan_shards(num_questions, shard_size=SHARD_SIZE):
+    """Split Q.1..Q.num_questions into contiguous (shard_index, start_id, count) ranges"""
+    return [(index, start, min(shard_size, num_questions - start + 1))
+            for index, start in enumerate(range(1, num_questions + 1, shard_size))]
+
+def generate_shard(shard_index, start_id, count, master_seed, batch=False):
+    """Worker: generate one shard with its own RNG; the output depends only on the arguments"""
+    seed = shard_seed(master_seed, shard_index)
+    if batch:
+        return start_id, generate_question_batch(start_id, count, require_numpy().random.default_rng(seed))
+    return start_id, generate_question_chunk(start_id, count, random.Random(seed))
+
+def write_shard(shard_index, start_id, count, master_seed, batch, output_dir, file_format="jsonl"):
+    """Worker: generate one shard and write it to its own JSON-lines or Parquet file"""
+    _, questions_data = generate_shard(shard_index, start_id, count, master_seed, batch)
+    rows = question_rows(questions_data)
+    path = os.path.join(output_dir, f"ssc_questions_{shard_index:05d}.{file_format}")
+    if file_format == "parquet":
+        # Same columns as SSC_MCQ_Questions, so mcq_exporter.py can bulk-import it
+        from mcq_exporter import write_rows_parquet
+        write_rows_parquet(rows, path)
+        return path, len(rows)
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            record = dict(zip(QUESTION_KEYS, row))
+            record["created_date"] = record["created_date"].isoformat()
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return path, len(rows)
+
+def iter_sharded_chunks(num_questions, master_seed, batch=False, shard_size=SHARD_SIZE, workers=None):
+    """
+    Generate shards across processes and yield them in Q.<id> order.
+
+    At most MAX_ROWS_IN_FLIGHT rows of shards are submitted or waiting to be
+    yielded at once, whatever the worker count (up to workers * 2 shards), so
+    the parent holds about as much as the single-process stream's queue.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_shards = max(1, min(workers * 2, MAX_ROWS_IN_FLIGHT // shard_size))
+    shards = iter(plan_shards(num_questions, shard_size))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque(executor.submit(generate_shard, *shard, master_seed, batch)
+                          for shard in itertools.islice(shards, max_shards))
+        while in_flight:
+            start_id, questions_data = in_flight.popleft().result()
+            next_shard = next(shards, None)
+            if next_shard is not None:
+                in_flight.append(executor.submit(generate_shard, *next_shard, master_seed, batch))
+            yield start_id, questions_data
+
+def write_shard_files(num_questions, master_seed, output_dir, batch=False, shard_size=SHARD_SIZE, workers=None, file_format="jsonl"):
+    """Generate all shards in parallel straight to per-shard files; returns their paths"""
+    if file_format == "parquet":
+        from mcq_exporter import require_pyarrow
+        require_pyarrow()
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    shards = plan_shards(num_questions, shard_size)
+    paths = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(write_shard, *shard, master_seed, batch, output_dir, file_format) for shard in shards]
+        for future in futures:
+            path, count = future.result()
+            paths.append(path)
+            print(f"💾 Wrote {count:,} questions to {path}")
+    return paths
+
+# ==============================
+# PDF Question-Paper Ingestion
+# ==============================
+PDF_PAGES_PER_TASK = 8   # pages parsed per worker task
+PDF_SUBJECT = "PDF Import"
+
+# "Q.12 ...", "Q 12. ...", "12. ..." or "12) ..." at the start of a line
+_PDF_QUESTION_START = re.compile(r'^[ \t]*(?:Q\.?[ \t]*(\d{1,4})[.):]?|(\d{1,4})[.)])[ \t]+(?=\S)', re.M)
+# "(a) ...", "A) ..." anywhere, or "A. ..." at the start of a line
+_PDF_OPTION_MARKER = re.compile(r'(?:(?<=\s)|^)(?:\(([A-Da-d])\)|([A-Da-d])\)|(?<![^\n])[ \t]*([A-Da-d])\.)[ \t]*')
+_PDF_ANSWER = re.compile(r'^[ \t]*(?:Ans(?:wer)?|Correct[ \t]+Answer)[ \t]*[:.\-]?[ \t]*\(?([A-Da-d])\b\)?', re.I | re.M)
+_WHITESPACE = re.compile(r'\s+')
+
+def parse_question_block(block, created_date=None, subject=PDF_SUBJECT):
+    """Turn the text of one numbered question into a question dict, or None if it is incomplete"""
+    start = _PDF_QUESTION_START.match(block)
+    if not start:
+        return None
+    number = start.group(1) or start.group(2)
+
+    answer_match = _PDF_ANSWER.search(block, start.end())
+    if not answer_match:
+        return None
+    body = block[start.end():answer_match.start()]
+
+    # First A, then the first B after it, and so on
+    markers = []
+    for match in _PDF_OPTION_MARKER.finditer(body):
+        letter = (match.group(1) or match.group(2) or match.group(3)).upper()
+        if letter == "ABCD"[len(markers)]:
+            markers.append(match)
+            if len(markers) == 4:
+                break
+    if len(markers) < 4:
+        return None
+
+    question_text = _WHITESPACE.sub(" ", body[:markers[0].start()]).strip()
+    options = [
+        _WHITESPACE.sub(" ", body[marker.end():markers[i + 1].start() if i < 3 else len(body)]).strip()
+        for i, marker in enumerate(markers)
+    ]
+    if not question_text or not all(options):
+        return None
+
+    # Store the answer as option text, like the generated questions
+    answer = options["ABCD".index(answer_match.group(1).upper())]
+    return {
+        'question_text': f"Q.{number} {question_text}",
+        'optionA': options[0], 'optionB': options[1], 'optionC': options[2], 'optionD': options[3],
+        'answer': answer, 'category': "SSC", 'course': "SSC Exam",
+        'created_date': created_date or datetime.now(), 'subject': subject
+    }
+
+def split_question_blocks(text):
+    """Split page text at question numbers; text before the first number is returned separately"""
+    starts = [m.start() for m in _PDF_QUESTION_START.finditer(text)]
+    if not starts:
+        return text, []
+    return text[:starts[0]], [text[a:b] for a, b in zip(starts, starts[1:] + [len(text)])]
+
+def parse_pdf_pages(path, first_page, last_page, subject=PDF_SUBJECT):
+    """
+    Worker: parse pages first_page..last_page (0-based, inclusive) of a PDF.
+
+    Each page's text is extracted and its layout cache released before the
+    next page, so memory is bounded by one page. Text before the first
+    question on first_page belongs to the previous task; a question still
+    open after last_page is completed from the head of the following page.
+    """
+    import pdfplumber
+
+    created_date = datetime.now()
+    questions = []
+    pending = ""
+    with pdfplumber.open(path) as pdf:
+        page_count = len(pdf.pages)
+        for page_number in range(first_page, min(last_page + 1, page_count)):
+            page = pdf.pages[page_number]
+            text = page.extract_text() or ""
+            page.close()
+
+            head, blocks = split_question_blocks(text)
+            if pending:
+                # The open question continues onto this page
+                pending += "\n" + head
+            if blocks:
+                for block in ([pending] if pending else []) + blocks[:-1]:
+                    parsed = parse_question_block(block, created_date, subject)
+                    if parsed:
+                        questions.append(parsed)
+                pending = blocks[-1]
+
+        # Finish the last open question with the start of the next page
+        if pending and last_page + 1 < page_count:
+            page = pdf.pages[last_page + 1]
+            head, _ = split_question_blocks(page.extract_text() or "")
+            page.close()
+            pending += "\n" + head
+        if pending:
+            parsed = parse_question_block(pending, created_date, subject)
+            if parsed:
+                questions.append(parsed)
+
+    return first_page, questions
+
+def iter_pdf_question_chunks(path, workers=None, pages_per_task=PDF_PAGES_PER_TASK, subject=PDF_SUBJECT):
+    """Parse page ranges of a PDF across processes and yield (first_row, questions) in page order"""
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        page_count = len(pdf.pages)
+    print(f"📄 {path}: {page_count} pages")
+
+    workers = workers or os.cpu_count() or 1
+    ranges = iter([(first, min(first + pages_per_task, page_count) - 1)
+                   for first in range(0, page_count, pages_per_task)])
+    next_row = 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque(executor.submit(parse_pdf_pages, path, first, last, subject)
+                          for first, last in itertools.islice(ranges, workers * 2))
+        while in_flight:
+            first_page, questions = in_flight.popleft().result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                in_flight.append(executor.submit(parse_pdf_pages, path, *next_range, subject))
+            print(f"📄 Parsed {len(questions)} questions from pages {first_page + 1}-{min(first_page + pages_per_task, page_count)}")
+            if questions:
+                yield next_row, questions
+                next_row += len(questions)
+
+def ingest_pdf(path, workers=None, batch_size=BULK_BATCH_SIZE, subject=PDF_SUBJECT):
+    """Parse a question-paper PDF in parallel and stream it into SSC_MCQ_Questions"""
+    return stream_questions_to_db(iter_pdf_question_chunks(path, workers, subject=subject), batch_size)
 
 # ==============================
 # Main Execution
 # ==============================
-def main():
+def main(num_questions=10000, seed=None, batch=False, batch_size=BULK_BATCH_SIZE, workers=0, output_dir=None, file_format="jsonl",
+         pdf_path=None, pdf_subject=PDF_SUBJECT):
+    if pdf_path:
+        print(f"Importing questions from {pdf_path}...")
+        stats = ingest_pdf(pdf_path, workers or None, batch_size, pdf_subject)
+        print(f"\n✅ SUCCESS: Inserted {stats.inserted:,} of {stats.generated:,} parsed questions into the database!")
+        mcq_db.close()
+        return
+    
     print("Starting Enhanced SSC Questions Data Population...")
-    print("Generating 10,000 questions...")
+    print(f"Generating {num_questions:,} questions{' (NumPy batch mode)' if batch else ''}...")
     
-    # Generate and insert enhanced questions
-    questions_data = generate_question_data(10000)
+    if workers or output_dir:
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 63)
+        print(f"🧩 Sharded generation with master seed {seed} (pass --seed {seed} to reproduce)")
     
-    print(f"Generated {len(questions_data)} questions successfully")
+    if output_dir:
+        paths = write_shard_files(num_questions, seed, output_dir, batch, workers=workers or None, file_format=file_format)
+        print(f"\n✅ SUCCESS: Wrote {num_questions:,} questions to {len(paths)} shard files in {output_dir}")
+        return
     
-    print("Inserting questions into database...")
-    total_inserted = bulk_insert_questions(questions_data)
+    # Generate and insert enhanced questions, overlapping the two
+    if workers:
+        chunks = iter_sharded_chunks(num_questions, seed, batch, workers=workers)
+    else:
+        chunks = iter_question_chunks(num_questions, seed, batch)
+    stats = stream_questions_to_db(chunks, batch_size)
     
-    print(f"\n✅ SUCCESS: Inserted {total_inserted} questions into the database!")
+    print(f"\n✅ SUCCESS: Inserted {stats.inserted:,} of {stats.generated:,} generated questions into the database!")
     
-    cursor.close()
-    conn.close()
+    mcq_db.close()
+
+def cli(argv=None):
+    """Command-line entry point (also used by main.py so worker processes can import ssc)"""
+    parser = argparse.ArgumentParser(description="Generate SSC MCQ questions and load them into the MCQ database")
+    parser.add_argument("--count", type=int, default=10000, help="number of questions to generate")
+    parser.add_argument("--seed", type=int, default=None, help="seed for a reproducible bank")
+    parser.add_argument("--batch", action="store_true", help="vectorized NumPy batch mode")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE, help="rows per bulk insert round trip")
+    parser.add_argument("--workers", type=int, default=0, help="generate shards in this many processes (0 = single process)")
+    parser.add_argument("--output-dir", default=None, help="write per-shard files here instead of loading the database")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl", help="shard file format for --output-dir")
+    parser.add_argument("--pdf", default=None, help="ingest questions from a question-paper PDF instead of generating")
+    parser.add_argument("--pdf-subject", default=PDF_SUBJECT, help="Subject stored for questions imported from --pdf")
+    args = parser.parse_args(argv)
+    main(args.count, args.seed, args.batch, args.batch_size, args.workers, args.output_dir, args.format,
+         args.pdf, args.pdf_subject)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli()
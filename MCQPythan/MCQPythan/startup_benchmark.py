@@ -0,0 +1,251 @@
+﻿# startup_benchmark.py - Import time and time-to-first-work budgets for the entry points
+#
+#   python startup_benchmark.py [--repeat 3] [--module ssc ...]
+#
+# Every module is imported in a fresh interpreter with guards installed:
+# opening a socket, connecting to SQL Server or importing a heavy optional
+# package (Selenium, pyarrow, NumPy, pdfplumber) during import is a failure.
+# A small probe then measures the first useful piece of work. The exit code
+# is non-zero if any budget is exceeded or a guard fires.
+import argparse
+import importlib
+import importlib.machinery
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# ==============================
+# Budgets (seconds)
+# ==============================
+DEFAULT_IMPORT_BUDGET = 0.5
+DEFAULT_FIRST_WORK_BUDGET = 1.0
+
+IMPORT_BUDGETS = {
+    "main": 0.05,
+    "db": 0.05,
+    "storage": 0.05,
+    "scc_scraper": 1.0,    # SQLAlchemy declarative models
+}
+FIRST_WORK_BUDGETS = {
+    "mcq_exporter": 2.0,   # first use imports pyarrow
+}
+
+# Packages that must only be imported when first needed
+HEAVY_PACKAGES = {"pyodbc", "selenium", "webdriver_manager", "pyarrow", "numpy", "pdfplumber", "httpx", "PIL", "zstandard"}
+
+# ==============================
+# First-Work Probes
+# ==============================
+def _probe_scc(module):
+    classifier = module.CategoryClassifier.from_config()
+    classifier.classify("https://example.com/constitution", "Which Article of the Constitution deals with equality?")
+
+def _probe_ssc(module):
+    module.generate_question_chunk(1, 1000, random.Random(0))
+
+def _probe_dedupe(module):
+    module.get_dedupe_index().query("What is the capital of India? New Delhi")
+
+def _probe_slug(module):
+    module.generate_slug("Startup benchmark: first work, measured!")
+
+def _probe_clean_text(module):
+    module.clean_text("Line one\nCatch all the Technology News and Updates\nLine two")
+
+def _probe_exporter(module):
+    module.mcq_schema()
+
+PROBES = {
+    "scc_scraper": _probe_scc,
+    "ssc": _probe_ssc,
+    "MCQPythan": _probe_dedupe,
+    "test": _probe_dedupe,
+    "BusinessToday": _probe_slug,
+    "Times_Of_india": _probe_clean_text,
+    "mcq_exporter": _probe_exporter,
+}
+
+def default_modules():
+    from main import COMMANDS
+    modules = ["main", "db", "storage", "http_client", "fetch_middleware"]
+    for module_name, _, _ in COMMANDS.values():
+        if module_name not in modules and module_name != "startup_benchmark":
+            modules.append(module_name)
+    return modules
+
+# ==============================
+# Child: guarded import + probe
+# ==============================
+class GuardViolation(RuntimeError):
+    pass
+
+class GuardedLoader:
+    """Wraps the pyodbc loader so connect() is blocked as soon as the module exists"""
+
+    def __init__(self, loader, violations):
+        self.loader = loader
+        self.violations = violations
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.loader.exec_module(module)
+        violations = self.violations
+        def blocked_odbc_connect(*args, **kwargs):
+            violations.append("pyodbc.connect")
+            raise GuardViolation("database connection during startup")
+        module.connect = blocked_odbc_connect
+
+class StartupGuard:
+    """Meta path hook that records heavy packages imported while it is active"""
+
+    def __init__(self, violations):
+        self.violations = violations
+        self.imported = []
+        self.active = True
+
+    def find_spec(self, name, path=None, target=None):
+        top_level = name.partition(".")[0]
+        if self.active and top_level in HEAVY_PACKAGES and top_level not in self.imported:
+            self.imported.append(top_level)
+        if name == "pyodbc":
+            spec = importlib.machinery.PathFinder.find_spec(name, path)
+            if spec is not None and spec.loader is not None:
+                spec.loader = GuardedLoader(spec.loader, self.violations)
+            return spec
+        return None
+
+def install_guards(violations):
+    """Block sockets, SQL Server and SQLite connections; returns the import recorder"""
+    def blocked_connect(self, address, *args, **kwargs):
+        violations.append(f"socket connect to {address}")
+        raise GuardViolation(f"network access during startup: {address}")
+
+    def blocked_create_connection(address, *args, **kwargs):
+        violations.append(f"socket connect to {address}")
+        raise GuardViolation(f"network access during startup: {address}")
+
+    socket.socket.connect = blocked_connect
+    socket.socket.connect_ex = blocked_connect
+    socket.create_connection = blocked_create_connection
+
+    def blocked_sqlite_connect(*args, **kwargs):
+        violations.append("sqlite3.connect")
+        raise GuardViolation("database connection during startup")
+
+    sqlite3.connect = blocked_sqlite_connect
+
+    guard = StartupGuard(violations)
+    sys.meta_path.insert(0, guard)
+    return guard
+
+def run_child(module_name):
+    violations = []
+    recorder = install_guards(violations)
+
+    result = {"module": module_name, "error": None}
+    started = time.perf_counter()
+    try:
+        module = importlib.import_module(module_name)
+    except Exception as e:
+        result["error"] = f"import failed: {type(e).__name__}: {e}"
+        module = None
+    result["import_seconds"] = time.perf_counter() - started
+    result["heavy_imports"] = list(recorder.imported)
+    recorder.active = False
+
+    probe = PROBES.get(module_name)
+    result["first_work_seconds"] = None
+    if module is not None and probe is not None:
+        try:
+            probe(module)
+            result["first_work_seconds"] = time.perf_counter() - started
+        except Exception as e:
+            result["error"] = f"probe failed: {type(e).__name__}: {e}"
+    result["violations"] = violations
+    print(json.dumps(result))
+
+# ==============================
+# Parent: run and report
+# ==============================
+def measure(module_name, repeat=3):
+    """Best of `repeat` fresh-interpreter runs (the child's last stdout line is its JSON result)"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", module_name],
+                              cwd=HERE, capture_output=True, text=True)
+        wall = time.perf_counter() - started
+        lines = proc.stdout.strip().splitlines()
+        try:
+            result = json.loads(lines[-1])
+        except (IndexError, ValueError):
+            result = {"module": module_name, "error": f"child exited {proc.returncode}: {proc.stderr.strip()[-300:]}",
+                      "import_seconds": None, "first_work_seconds": None, "heavy_imports": [], "violations": []}
+        result["process_seconds"] = wall
+        if result["error"] or result["violations"] or result["heavy_imports"]:
+            return result
+        if best is None or result["import_seconds"] < best["import_seconds"]:
+            best = result
+    return best
+
+def check(result):
+    """List of reasons the result is over budget or unsafe"""
+    module_name = result["module"]
+    problems = []
+    if result["error"]:
+        problems.append(result["error"])
+    problems += [f"guard: {v}" for v in result["violations"]]
+    problems += [f"heavy import at startup: {name}" for name in result["heavy_imports"]]
+
+    import_budget = IMPORT_BUDGETS.get(module_name, DEFAULT_IMPORT_BUDGET)
+    if result["import_seconds"] is not None and result["import_seconds"] > import_budget:
+        problems.append(f"import {result['import_seconds'] * 1000:.0f}ms > {import_budget * 1000:.0f}ms")
+    first_work_budget = FIRST_WORK_BUDGETS.get(module_name, DEFAULT_FIRST_WORK_BUDGET)
+    if result["first_work_seconds"] is not None and result["first_work_seconds"] > first_work_budget:
+        problems.append(f"first work {result['first_work_seconds'] * 1000:.0f}ms > {first_work_budget * 1000:.0f}ms")
+    return problems
+
+def format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check import time and time-to-first-work budgets")
+    parser.add_argument("--module", action="append", help="only benchmark these modules")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh-interpreter runs per module (best is kept)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child)
+        return 0
+
+    print(f"{'Module':<18} {'Import':>8} {'1st work':>9} {'Process':>8}  Status")
+    print("-" * 60)
+    failures = 0
+    for module_name in args.module or default_modules():
+        result = measure(module_name, args.repeat)
+        problems = check(result)
+        failures += bool(problems)
+        status = "✅ ok" if not problems else "❌ " + "; ".join(problems)
+        print(f"{module_name:<18} {format_ms(result['import_seconds']):>8} {format_ms(result['first_work_seconds']):>9} "
+              f"{format_ms(result['process_seconds']):>8}  {status}")
+
+    print("-" * 60)
+    if failures:
+        print(f"❌ {failures} module(s) over budget or touching the network/database at startup")
+        return 1
+    print("✅ All modules within their startup budgets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,572 @@
+﻿# storage.py - Pluggable storage for the MCQ bank, the SCC Q&A tables and the news tables
+#
+#   STORAGE_BACKEND=sqlserver   (default) SQL Server at SERVER=. through db.py / pyodbc
+#   STORAGE_BACKEND=sqlite      local SQLite files in STORAGE_DIR, one per database
+#
+# Scripts get a Repository from get_repository(database) instead of writing
+# SQL against a pyodbc cursor, so the whole pipeline (and its benchmarks and
+# load tests) also runs on a machine without SQL Server.
+import abc
+import atexit
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import db
+
+# ==============================
+# Configuration
+# ==============================
+BACKENDS = ("sqlserver", "sqlite")
+BACKEND = os.environ.get("STORAGE_BACKEND", "sqlserver").lower()
+STORAGE_DIR = os.environ.get("STORAGE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+SQLSERVER_URL = "mssql+pyodbc://sa:123456@./{database}?driver=ODBC+Driver+17+for+SQL+Server"
+
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+# Deadlock victim, query/login timeouts and a dropped link are worth retrying
+TRANSIENT_SQLSTATES = {"40001", "HYT00", "HYT01", "08S01"}
+
+MCQ_TABLE = "SSC_MCQ_Questions"
+NEWS_TABLE = "Tbl_News"
+LINKS_TABLE = "Tbl_NewsLinks"
+BODIES_TABLE = "Tbl_NewsBodies"
+DICTS_TABLE = "Tbl_NewsBodyDicts"
+
+
+class StorageError(Exception):
+    """A failed statement; the driver error is the __cause__"""
+
+    def __init__(self, message, transient=False):
+        super().__init__(message)
+        self.transient = transient
+
+
+# ==============================
+# Repository Interface
+# ==============================
+class Repository(abc.ABC):
+    """
+    The tables of one database (MCQ or NASolution), whatever holds them.
+
+    Writes join the current transaction and are made durable by commit(),
+    which callers use where they used to call conn.commit(). Everything
+    here is dialect-neutral; the backends fill in connections, schema and
+    the few statements whose SQL differs.
+    """
+
+    backend = None
+
+    def __init__(self, database):
+        self.database = database
+        self._lock = threading.RLock()   # one connection, shared by scraper and service threads
+
+    # ---------- connection (backend) ----------
+    @abc.abstractmethod
+    def cursor(self):
+        ...
+
+    @abc.abstractmethod
+    def commit(self):
+        ...
+
+    @abc.abstractmethod
+    def rollback(self):
+        ...
+
+    @abc.abstractmethod
+    def close(self):
+        ...
+
+    @abc.abstractmethod
+    def sqlalchemy_url(self):
+        """URL for the SQLAlchemy models (SCC questions_answers and friends)"""
+
+    @abc.abstractmethod
+    def _driver_error(self):
+        ...
+
+    def is_transient(self, error):
+        return False
+
+    # ---------- statements ----------
+    def _wrap(self, error):
+        return StorageError(f"{type(error).__name__}: {error}", self.is_transient(error))
+
+    def execute(self, sql, params=()):
+        with self._lock:
+            try:
+                self.cursor().execute(sql, params)
+            except self._driver_error() as e:
+                raise self._wrap(e) from e
+
+    def query(self, sql, params=()):
+        with self._lock:
+            try:
+                cursor = self.cursor()
+                cursor.execute(sql, params)
+                return [tuple(row) for row in cursor.fetchall()]
+            except self._driver_error() as e:
+                raise self._wrap(e) from e
+
+    def query_one(self, sql, params=()):
+        rows = self.query(sql, params)
+        return rows[0] if rows else None
+
+    def insert_row(self, table, fields):
+        """INSERT one row from a {column: value} dict"""
+        columns = list(fields)
+        self.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                     [fields[column] for column in columns])
+
+    def insert_rows(self, table, columns, rows):
+        """INSERT a batch of row tuples; the transaction is rolled back if it fails"""
+        with self._lock:
+            try:
+                self.cursor().executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+            except self._driver_error() as e:
+                self.rollback()
+                raise self._wrap(e) from e
+
+    def iter_rows(self, table, columns, fetch_size):
+        """Yield lists of up to fetch_size rows of a whole table on a cursor of its own"""
+        cursor = self.new_cursor()
+        try:
+            cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+
+    @abc.abstractmethod
+    def new_cursor(self):
+        ...
+
+    # ---------- MCQ bank ----------
+    def ensure_mcq_schema(self):
+        pass
+
+    def insert_mcq(self, fields):
+        self.ensure_mcq_schema()
+        self.insert_row(MCQ_TABLE, fields)
+
+    def insert_mcqs(self, columns, rows):
+        self.ensure_mcq_schema()
+        self.insert_rows(MCQ_TABLE, columns, rows)
+
+    # ---------- news ----------
+    def news_slug_exists(self, slug):
+        return self.query_one(f"SELECT COUNT(*) FROM {NEWS_TABLE} WHERE Slug = ?", (slug,))[0] > 0
+
+    def insert_news(self, fields):
+        self.insert_row(NEWS_TABLE, fields)
+
+    def news_bodies(self, slug):
+        """(FullDescription, Content) of one article, or None"""
+        return self.query_one(f"SELECT FullDescription, Content FROM {NEWS_TABLE} WHERE Slug = ?", (slug,))
+
+    def update_news_column(self, column, slug, value):
+        self.execute(f"UPDATE {NEWS_TABLE} SET {column} = ? WHERE Slug = ?", (value, slug))
+
+    def ensure_links_table(self):
+        pass
+
+    def insert_news_link(self, fields):
+        self.ensure_links_table()
+        self.insert_row(LINKS_TABLE, fields)
+
+    # ---------- article bodies ----------
+    def ensure_body_tables(self):
+        pass
+
+    def latest_body_dicts(self):
+        """{source: newest DictId}"""
+        self.ensure_body_tables()
+        return dict(self.query(f"SELECT Source, MAX(DictId) FROM {DICTS_TABLE} GROUP BY Source"))
+
+    def body_dict(self, dict_id):
+        row = self.query_one(f"SELECT Dict FROM {DICTS_TABLE} WHERE DictId = ?", (dict_id,))
+        return bytes(row[0]) if row else None
+
+    @abc.abstractmethod
+    def insert_body_dict(self, source, data, sample_count):
+        """Store a dictionary and return its DictId"""
+
+    @abc.abstractmethod
+    def insert_body(self, digest, source, dict_id, raw_size, blob):
+        """Store a compressed body unless one with this hash is already there"""
+
+    def bodies(self, digests):
+        """(BodyHash, DictId, Body) rows for the given hashes"""
+        self.ensure_body_tables()
+        digests = list(digests)
+        return self.query(
+            f"SELECT BodyHash, DictId, Body FROM {BODIES_TABLE} WHERE BodyHash IN ({', '.join('?' * len(digests))})",
+            digests)
+
+    @abc.abstractmethod
+    def recent_body_hashes(self, source, limit):
+        ...
+
+    @abc.abstractmethod
+    def inline_bodies(self, column, after_slug, min_chars, limit):
+        """(Slug, body) of rows whose column still holds the text itself, in slug order"""
+
+    @abc.abstractmethod
+    def body_stats(self):
+        """(source, bodies, raw bytes, stored bytes) per source"""
+
+
+# ==============================
+# SQL Server
+# ==============================
+class SqlServerRepository(Repository):
+    """The production tables on SQL Server, through the shared lazy pyodbc connection"""
+
+    backend = "sqlserver"
+
+    def __init__(self, database):
+        super().__init__(database)
+        self.conn, self._cursor = db.lazy_connection(database)
+        self._mcq_schema_ready = False
+        self._links_table_ready = False
+        self._body_tables_ready = False
+
+    def cursor(self):
+        return self._cursor
+
+    def new_cursor(self):
+        return self.conn.cursor()
+
+    def commit(self):
+        with self._lock:
+            try:
+                self.conn.commit()
+            except self._driver_error() as e:
+                self.conn.rollback()
+                raise self._wrap(e) from e
+
+    def rollback(self):
+        with self._lock:
+            self.conn.rollback()
+
+    def close(self):
+        with self._lock:
+            self._cursor.close()
+            self.conn.close()
+
+    def sqlalchemy_url(self):
+        return SQLSERVER_URL.format(database=self.database)
+
+    def _driver_error(self):
+        import pyodbc
+        return pyodbc.Error
+
+    def is_transient(self, error):
+        sqlstate = error.args[0] if error.args else ""
+        return sqlstate in TRANSIENT_SQLSTATES or "1205" in str(error)
+
+    def insert_rows(self, table, columns, rows):
+        with self._lock:
+            self._cursor.fast_executemany = True
+            super().insert_rows(table, columns, rows)
+
+    # ---------- schema ----------
+    def ensure_mcq_schema(self):
+        """Add the Subject column to older SSC_MCQ_Questions tables (once per process)"""
+        if self._mcq_schema_ready:
+            return
+        import pyodbc
+        with self._lock:
+            check_cursor = self.conn.cursor()
+            try:
+                check_cursor.execute(f"SELECT Subject FROM {MCQ_TABLE} WHERE 1=0")
+            except pyodbc.Error:
+                print("Adding Subject column to the table...")
+                check_cursor.execute(f"ALTER TABLE {MCQ_TABLE} ADD Subject NVARCHAR(100)")
+                self.conn.commit()
+                print("Subject column added successfully")
+            finally:
+                check_cursor.close()
+            self._mcq_schema_ready = True
+
+    def ensure_links_table(self):
+        if self._links_table_ready:
+            return
+        self.execute(f"""
+            IF OBJECT_ID('{LINKS_TABLE}', 'U') IS NULL
+            CREATE TABLE {LINKS_TABLE} (
+                Id INT IDENTITY(1,1) PRIMARY KEY,
+                CanonicalSource NVARCHAR(50),
+                CanonicalUrl NVARCHAR(1000),
+                DuplicateSource NVARCHAR(50),
+                DuplicateUrl NVARCHAR(1000),
+                DuplicateTitle NVARCHAR(500),
+                Distance INT,
+                CreatedDate DATETIME
+            )
+        """)
+        self.commit()
+        self._links_table_ready = True
+
+    def ensure_body_tables(self):
+        if self._body_tables_ready:
+            return
+        self.execute(f"""
+            IF OBJECT_ID('{DICTS_TABLE}', 'U') IS NULL
+            CREATE TABLE {DICTS_TABLE} (
+                DictId INT IDENTITY(1,1) PRIMARY KEY,
+                Source NVARCHAR(50),
+                Dict VARBINARY(MAX),
+                SampleCount INT,
+                CreatedDate DATETIME
+            )
+        """)
+        self.execute(f"""
+            IF OBJECT_ID('{BODIES_TABLE}', 'U') IS NULL
+            CREATE TABLE {BODIES_TABLE} (
+                BodyHash CHAR(64) PRIMARY KEY,
+                Source NVARCHAR(50),
+                DictId INT NULL,
+                RawSize INT,
+                Body VARBINARY(MAX),
+                CreatedDate DATETIME
+            )
+        """)
+        self.commit()
+        self._body_tables_ready = True
+
+    # ---------- article bodies ----------
+    def insert_body_dict(self, source, data, sample_count):
+        self.ensure_body_tables()
+        row = self.query_one(f"""
+            INSERT INTO {DICTS_TABLE} (Source, Dict, SampleCount, CreatedDate)
+            OUTPUT INSERTED.DictId
+            VALUES (?, ?, ?, ?)
+        """, (source, data, sample_count, datetime.now()))
+        return int(row[0])
+
+    def insert_body(self, digest, source, dict_id, raw_size, blob):
+        self.ensure_body_tables()
+        self.execute(f"""
+            IF NOT EXISTS (SELECT 1 FROM {BODIES_TABLE} WHERE BodyHash = ?)
+            INSERT INTO {BODIES_TABLE} (BodyHash, Source, DictId, RawSize, Body, CreatedDate)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (digest, digest, source, dict_id, raw_size, blob, datetime.now()))
+
+    def recent_body_hashes(self, source, limit):
+        self.ensure_body_tables()
+        rows = self.query(f"SELECT TOP ({int(limit)}) BodyHash FROM {BODIES_TABLE} WHERE Source = ? ORDER BY CreatedDate DESC",
+                          (source,))
+        return [row[0].strip() for row in rows]
+
+    def inline_bodies(self, column, after_slug, min_chars, limit):
+        return self.query(f"""
+            SELECT TOP ({int(limit)}) Slug, {column} FROM {NEWS_TABLE}
+            WHERE Slug > ? AND LEN({column}) >= ? AND {column} NOT LIKE 'zbody:%'
+            ORDER BY Slug
+        """, (after_slug, min_chars))
+
+    def body_stats(self):
+        self.ensure_body_tables()
+        return self.query(f"""
+            SELECT Source, COUNT(*), SUM(CAST(RawSize AS BIGINT)), SUM(CAST(DATALENGTH(Body) AS BIGINT))
+            FROM {BODIES_TABLE} GROUP BY Source ORDER BY Source
+        """)
+
+
+# ==============================
+# SQLite
+# ==============================
+def _adapt_datetime(value):
+    return value.isoformat(" ")
+
+def _convert_datetime(value):
+    text = value.decode("utf-8")
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:   # listing dates that were stored as scraped text
+        return text
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("DATETIME", _convert_datetime)
+
+def apply_sqlite_pragmas(connection):
+    """WAL with relaxed fsync, and wait for a busy writer instead of failing (also used by the SQLAlchemy engine)"""
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+
+SQLITE_SCHEMAS = {
+    "MCQ": f"""
+        CREATE TABLE IF NOT EXISTS {MCQ_TABLE} (
+            Id INTEGER PRIMARY KEY AUTOINCREMENT,
+            Question TEXT, OptionA TEXT, OptionB TEXT, OptionC TEXT, OptionD TEXT, Answer TEXT,
+            Categoery TEXT, Course TEXT, CREATEDDATE DATETIME, Subject TEXT
+        );
+    """,
+    "NASolution": f"""
+        CREATE TABLE IF NOT EXISTS {NEWS_TABLE} (
+            Id INTEGER PRIMARY KEY AUTOINCREMENT,
+            Title TEXT, Slug TEXT, ShortDescription TEXT, FullDescription TEXT, Content TEXT,
+            Author TEXT, Category TEXT, Tags TEXT, ImageUrl TEXT,
+            MetaTitle TEXT, MetaDescription TEXT, MetaKeywords TEXT,
+            PublishedDate DATETIME, UpdatedDate DATETIME, IsPublished INTEGER, IsActive INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS IX_{NEWS_TABLE}_Slug ON {NEWS_TABLE} (Slug);
+        CREATE TABLE IF NOT EXISTS {LINKS_TABLE} (
+            Id INTEGER PRIMARY KEY AUTOINCREMENT,
+            CanonicalSource TEXT, CanonicalUrl TEXT, DuplicateSource TEXT, DuplicateUrl TEXT,
+            DuplicateTitle TEXT, Distance INTEGER, CreatedDate DATETIME
+        );
+        CREATE TABLE IF NOT EXISTS {DICTS_TABLE} (
+            DictId INTEGER PRIMARY KEY AUTOINCREMENT,
+            Source TEXT, Dict BLOB, SampleCount INTEGER, CreatedDate DATETIME
+        );
+        CREATE TABLE IF NOT EXISTS {BODIES_TABLE} (
+            BodyHash TEXT PRIMARY KEY,
+            Source TEXT, DictId INTEGER, RawSize INTEGER, Body BLOB, CreatedDate DATETIME
+        );
+    """,
+}
+
+class SqliteRepository(Repository):
+    """
+    A local SQLite file per database, created with its tables on first use.
+
+    The file runs in WAL mode with synchronous=NORMAL, where a commit
+    appends to the log without an fsync, so the per-row commits of the
+    scrapers stay cheap and every commit() is visible to other processes.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, database, directory=None):
+        super().__init__(database)
+        self.path = os.path.join(directory or STORAGE_DIR, f"{database}.sqlite3")
+        self._conn = None
+        self._cursor = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    conn = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+                    apply_sqlite_pragmas(conn)
+                    conn.executescript(SQLITE_SCHEMAS.get(self.database, ""))
+                    self._conn = conn
+        return self._conn
+
+    def cursor(self):
+        if self._cursor is None:
+            self._cursor = self.conn.cursor()
+        return self._cursor
+
+    def new_cursor(self):
+        return self.conn.cursor()
+
+    def commit(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                raise self._wrap(e) from e
+
+    def rollback(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.rollback()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = self._cursor = None
+
+    def sqlalchemy_url(self):
+        return "sqlite:///" + self.path.replace(os.sep, "/")
+
+    def _driver_error(self):
+        return sqlite3.Error
+
+    def is_transient(self, error):
+        return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+    # ---------- article bodies ----------
+    def insert_body_dict(self, source, data, sample_count):
+        with self._lock:
+            self.execute(f"INSERT INTO {DICTS_TABLE} (Source, Dict, SampleCount, CreatedDate) VALUES (?, ?, ?, ?)",
+                         (source, data, sample_count, datetime.now()))
+            return self.cursor().lastrowid
+
+    def insert_body(self, digest, source, dict_id, raw_size, blob):
+        self.execute(f"""
+            INSERT OR IGNORE INTO {BODIES_TABLE} (BodyHash, Source, DictId, RawSize, Body, CreatedDate)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (digest, source, dict_id, raw_size, blob, datetime.now()))
+
+    def recent_body_hashes(self, source, limit):
+        rows = self.query(f"SELECT BodyHash FROM {BODIES_TABLE} WHERE Source = ? ORDER BY CreatedDate DESC LIMIT ?",
+                          (source, int(limit)))
+        return [row[0] for row in rows]
+
+    def inline_bodies(self, column, after_slug, min_chars, limit):
+        return self.query(f"""
+            SELECT Slug, {column} FROM {NEWS_TABLE}
+            WHERE Slug > ? AND LENGTH({column}) >= ? AND {column} NOT LIKE 'zbody:%'
+            ORDER BY Slug LIMIT ?
+        """, (after_slug, min_chars, int(limit)))
+
+    def body_stats(self):
+        return self.query(f"""
+            SELECT Source, COUNT(*), SUM(RawSize), SUM(LENGTH(Body))
+            FROM {BODIES_TABLE} GROUP BY Source ORDER BY Source
+        """)
+
+
+# ==============================
+# Shared repositories
+# ==============================
+_repositories = {}
+_repositories_lock = threading.Lock()
+
+def get_repository(database="MCQ", backend=None):
+    """The process-wide repository for a database on the configured backend (nothing connects until first use)"""
+    backend = (backend or BACKEND).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND {backend!r} (choose from {', '.join(BACKENDS)})")
+    with _repositories_lock:
+        repository = _repositories.get((backend, database))
+        if repository is None:
+            repository_class = SqliteRepository if backend == "sqlite" else SqlServerRepository
+            repository = _repositories[(backend, database)] = repository_class(database)
+        return repository
+
+def commit_all():
+    """Commit every open repository, before state that refers to its rows is saved elsewhere"""
+    with _repositories_lock:
+        repositories = list(_repositories.values())
+    for repository in repositories:
+        repository.commit()
+
+def close_all():
+    """Commit and close every repository that was opened"""
+    with _repositories_lock:
+        repositories = list(_repositories.values())
+        _repositories.clear()
+    for repository in repositories:
+        repository.close()
+
+atexit.register(close_all)
@@ -0,0 +1,200 @@
+﻿# story_index.py - SimHash index for cross-source duplicate news stories
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+from array import array
+from datetime import datetime
+
+import storage
+from metrics import metrics
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'news_stories.simhash')
+
+FINGERPRINT_BITS = 64
+MAX_DISTANCE = 7            # Hamming distance that still counts as the same story (rewritten headlines land at 4-8)
+BLOCKS = MAX_DISTANCE + 1   # pigeonhole: a match within MAX_DISTANCE shares at least one block exactly
+LEAD_WORDS = 40             # words of the lead text that go into the fingerprint
+STORY_TTL_DAYS = 14         # stories older than this are dropped from the index on load
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+_BLOCK_BITS = FINGERPRINT_BITS // BLOCKS
+_BLOCK_MASK = (1 << _BLOCK_BITS) - 1
+
+# ==================== FINGERPRINTS ====================
+def normalize_words(text):
+    """Lowercase words without punctuation or stop words"""
+    return [word for word in _NON_WORD.sub(" ", (text or "").lower()).split() if word not in _STOP_WORDS]
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+def story_features(title, lead):
+    """Word counts of the title plus the first LEAD_WORDS of the lead"""
+    weights = {}
+    for word in normalize_words(title) + normalize_words(lead)[:LEAD_WORDS]:
+        weights[word] = weights.get(word, 0) + 1
+    return weights
+
+def simhash(title, lead=""):
+    """64-bit SimHash of a story's normalized title and lead text"""
+    totals = [0] * FINGERPRINT_BITS
+    for feature, weight in story_features(title, lead).items():
+        h = _feature_hash(feature)
+        for bit in range(FINGERPRINT_BITS):
+            totals[bit] += weight if (h >> bit) & 1 else -weight
+    fingerprint = 0
+    for bit, total in enumerate(totals):
+        if total > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+# ==================== INDEX ====================
+class StoryIndex:
+    """
+    SimHash fingerprints of stored stories, bucketed by 8-bit blocks.
+
+    Fingerprints live in one flat array('Q') with a parallel array of
+    timestamps; block buckets are rebuilt on load. Any fingerprint within
+    MAX_DISTANCE of a stored one shares at least one block with it, so a
+    query compares only the stories in its BLOCKS buckets.
+    """
+
+    def __init__(self, path=None, max_distance=MAX_DISTANCE):
+        self.path = path or DEFAULT_INDEX_PATH
+        self.max_distance = max_distance
+        self.keys = []                 # (source, url) of the stored story
+        self.fingerprints = array('Q')
+        self.added = array('d')        # epoch seconds
+        self.buckets = [{} for _ in range(BLOCKS)]
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    @staticmethod
+    def _blocks(fingerprint):
+        return [(fingerprint >> (block * _BLOCK_BITS)) & _BLOCK_MASK for block in range(BLOCKS)]
+
+    def _index(self, doc_id, fingerprint):
+        for bucket, value in zip(self.buckets, self._blocks(fingerprint)):
+            bucket.setdefault(value, []).append(doc_id)
+
+    def query(self, fingerprint):
+        """Return (key, distance) of the closest stored story within max_distance, or None"""
+        with self._lock:
+            best = None
+            for bucket, value in zip(self.buckets, self._blocks(fingerprint)):
+                for doc_id in bucket.get(value, ()):
+                    distance = hamming_distance(self.fingerprints[doc_id], fingerprint)
+                    if distance <= self.max_distance and (best is None or distance < best[1]):
+                        best = (self.keys[doc_id], distance)
+            return best
+
+    def add(self, key, fingerprint, added=None):
+        with self._lock:
+            doc_id = len(self.keys)
+            self.keys.append(key)
+            self.fingerprints.append(fingerprint)
+            self.added.append(added or time.time())
+            self._index(doc_id, fingerprint)
+            self.dirty = True
+
+    # ---------- persistence ----------
+    def save(self, path=None):
+        """Write keys, fingerprints and timestamps atomically"""
+        path = path or self.path
+        with self._lock:
+            payload = {
+                'max_distance': self.max_distance, 'keys': self.keys,
+                'fingerprints': self.fingerprints.tobytes(), 'added': self.added.tobytes(),
+            }
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path=None, ttl_days=STORY_TTL_DAYS):
+        """Load the index, dropping stories older than ttl_days, or start an empty one"""
+        path = path or DEFAULT_INDEX_PATH
+        index = cls(path=path)
+        if not os.path.exists(path):
+            return index
+
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+        fingerprints = array('Q')
+        fingerprints.frombytes(payload['fingerprints'])
+        added = array('d')
+        added.frombytes(payload['added'])
+        index.max_distance = payload['max_distance']
+
+        cutoff = time.time() - ttl_days * 86400
+        for key, fingerprint, timestamp in zip(payload['keys'], fingerprints, added):
+            if timestamp >= cutoff:
+                index.add(key, fingerprint, timestamp)
+        index.dirty = len(index) != len(payload['keys'])
+        return index
+
+# ==================== NEWS HELPERS ====================
+# Shared by the news scripts and news_service; the database is opened on the first link
+news_repository = storage.get_repository("NASolution")
+
+_story_index = None
+_story_index_lock = threading.Lock()
+
+def get_story_index():
+    """Load the persisted story index on first use"""
+    global _story_index
+    if _story_index is None:
+        with _story_index_lock:
+            if _story_index is None:
+                _story_index = StoryIndex.load()
+    return _story_index
+
+def item_fingerprint(item):
+    """Fingerprint of a listing item from its title and short description (the lead)"""
+    return simhash(item.get('title'), item.get('short_desc'))
+
+def find_duplicate(item):
+    """(source, url) and distance of an already stored copy of this story, or None"""
+    return get_story_index().query(item_fingerprint(item))
+
+def remember_story(source, item):
+    """Index a story that was just stored so later copies are linked to it"""
+    get_story_index().add((source, item['url']), item_fingerprint(item))
+
+def link_duplicate(source, item, match):
+    """Record that item is a copy of an already stored story instead of storing it again"""
+    (canonical_source, canonical_url), distance = match
+    if canonical_url == item['url']:
+        # Seen again on a later run: it is already stored, nothing to link
+        metrics.inc('duplicates_skipped_total', scraper=source)
+        return
+    news_repository.insert_news_link({
+        'CanonicalSource': canonical_source,
+        'CanonicalUrl': canonical_url,
+        'DuplicateSource': source,
+        'DuplicateUrl': item['url'],
+        'DuplicateTitle': item.get('title'),
+        'Distance': distance,
+        'CreatedDate': datetime.now(),
+    })
+    news_repository.commit()
+    metrics.inc('cross_source_duplicates_total', scraper=source, canonical=canonical_source)
+    print(f"🔗 {source}: '{(item.get('title') or '')[:60]}' is a copy of {canonical_source} story {canonical_url}")
+
+def save_story_index():
+    if _story_index is not None and _story_index.dirty:
+        _story_index.save()
@@ -1,14 +1,10 @@
 ﻿import time
 import traceback
-import pyodbc
 from urllib.parse import urlparse
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from datetime import datetime
+import storage
+from near_duplicate import NearDuplicateIndex
+from metrics import metrics
 
 # ==============================
 # Configuration
@@ -20,25 +16,44 @@ RETRY_DELAY = 3  # seconds to wait before retrying page load or next page
 # ==============================
 # Database Connection
 # ==============================
-conn = pyodbc.connect(
-    "DRIVER={ODBC Driver 17 for SQL Server};"
-    "SERVER=.;"
-    "DATABASE=MCQ;"
-    "UID=sa;"
-    "PWD=123456;"
-)
-cursor = conn.cursor()
+# Opened on first insert, not at import (SQL Server or local SQLite, see storage.py)
+mcq_db = storage.get_repository("MCQ")
+
+# Shared with the SCC scraper so the same question from another site is caught
+_dedupe_index = None
+
+def get_dedupe_index():
+    """Load the near-duplicate index on first use"""
+    global _dedupe_index
+    if _dedupe_index is None:
+        _dedupe_index = NearDuplicateIndex.load()
+    return _dedupe_index
 
 def insert_question(category, subject, course, question, optionA, optionB, optionC, optionD, answer):
+    answer_text = {'A': optionA, 'B': optionB, 'C': optionC, 'D': optionD}.get(answer, answer)
+    with metrics.timer('dedupe', scraper='examveda'):
+        duplicate_of = get_dedupe_index().query(f"{question} {answer_text or ''}")
+    if duplicate_of is not None:
+        metrics.inc('duplicates_skipped_total', scraper='examveda')
+        print(f"⏭️ Near-duplicate of {duplicate_of}, skipped: {question[:60]}...")
+        return False
+
     try:
-        cursor.execute("""
-            INSERT INTO SSC_MCQ_Questions
-            (Categoery, Subject, Course, Question, OptionA, OptionB, OptionC, OptionD, Answer, CreatedDate)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, GETDATE())
-        """, (category, subject, course, question, optionA, optionB, optionC, optionD, answer))
-        conn.commit()
+        with metrics.timer('db_write', scraper='examveda'):
+            mcq_db.insert_mcq({
+                'Categoery': category, 'Subject': subject, 'Course': course, 'Question': question,
+                'OptionA': optionA, 'OptionB': optionB, 'OptionC': optionC, 'OptionD': optionD,
+                'Answer': answer, 'CreatedDate': datetime.now(),
+            })
+            mcq_db.commit()
+        metrics.inc('rows_saved_total', scraper='examveda')
     except Exception as e:
+        metrics.inc('db_errors_total', scraper='examveda')
         print(f"❌ DB Insert error: {e}\n{traceback.format_exc()}")
+        return False
+
+    get_dedupe_index().add(f"mcq:{category}:{question[:40]}", f"{question} {answer_text or ''}")
+    return True
 
 def get_category_subject_from_url(url: str):
     path = urlparse(url).path.strip("/").lower()
@@ -52,6 +67,12 @@ def get_category_subject_from_url(url: str):
     return category, subject
 
 def create_driver():
+    # Selenium is only imported when a browser is actually needed
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from webdriver_manager.chrome import ChromeDriverManager
+
     chrome_options = Options()
     if HEADLESS:
         chrome_options.add_argument("--headless")
@@ -65,6 +86,10 @@ def create_driver():
     return driver
 
 def scrape_section(start_url):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     category_name, subject_name = get_category_subject_from_url(start_url)
     course_name = "SSC"  # Fixed course
 
@@ -72,16 +97,19 @@ def scrape_section(start_url):
 
     driver = create_driver()
     try:
-        driver.get(start_url)
+        with metrics.timer('fetch', scraper='examveda'):
+            driver.get(start_url)
+        metrics.inc('pages_fetched_total', scraper='examveda')
         page_num = 1
 
         while True:
             print(f"\n📄 Scraping {category_name} | Page {page_num}")
 
             try:
-                WebDriverWait(driver, WAIT_TIMEOUT).until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.question.single-question"))
-                )
+                with metrics.timer('render_wait', scraper='examveda'):
+                    WebDriverWait(driver, WAIT_TIMEOUT).until(
+                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.question.single-question"))
+                    )
             except Exception as e:
                 print(f"⚠️ Timeout waiting for questions on page {page_num}: {e}")
                 break
@@ -93,21 +121,22 @@ def scrape_section(start_url):
 
             for idx, q in enumerate(questions, start=1):
                 try:
-                    question_text = q.find_element(By.CSS_SELECTOR, "div.question-main").text.strip()
-
-                    # FIXED OPTION EXTRACTION
-                    option_ps = q.find_elements(By.CSS_SELECTOR, "div.form-inputs.clearfix.question-options > p")
-                    optionA = option_ps[0].find_elements(By.TAG_NAME, "label")[1].text.strip()
-                    optionB = option_ps[1].find_elements(By.TAG_NAME, "label")[1].text.strip()
-                    optionC = option_ps[2].find_elements(By.TAG_NAME, "label")[1].text.strip()
-                    optionD = option_ps[3].find_elements(By.TAG_NAME, "label")[1].text.strip()
-
-                    answer_value = q.find_element(By.CSS_SELECTOR, "input[type='hidden']").get_attribute("value")
-                    answer_map = {'1': 'A', '2': 'B', '3': 'C', '4': 'D'}
-                    answer_letter = answer_map.get(answer_value, "Unknown")
-
-                    insert_question(category_name, subject_name, course_name, question_text, optionA, optionB, optionC, optionD, answer_letter)
-                    print(f"✅ [{category_name}] Q{idx} Inserted: {question_text[:60]}...")
+                    with metrics.timer('parse', scraper='examveda'):
+                        question_text = q.find_element(By.CSS_SELECTOR, "div.question-main").text.strip()
+
+                        # FIXED OPTION EXTRACTION
+                        option_ps = q.find_elements(By.CSS_SELECTOR, "div.form-inputs.clearfix.question-options > p")
+                        optionA = option_ps[0].find_elements(By.TAG_NAME, "label")[1].text.strip()
+                        optionB = option_ps[1].find_elements(By.TAG_NAME, "label")[1].text.strip()
+                        optionC = option_ps[2].find_elements(By.TAG_NAME, "label")[1].text.strip()
+                        optionD = option_ps[3].find_elements(By.TAG_NAME, "label")[1].text.strip()
+
+                        answer_value = q.find_element(By.CSS_SELECTOR, "input[type='hidden']").get_attribute("value")
+                        answer_map = {'1': 'A', '2': 'B', '3': 'C', '4': 'D'}
+                        answer_letter = answer_map.get(answer_value, "Unknown")
+
+                    if insert_question(category_name, subject_name, course_name, question_text, optionA, optionB, optionC, optionD, answer_letter):
+                        print(f"✅ [{category_name}] Q{idx} Inserted: {question_text[:60]}...")
                 except Exception as e:
                     print(f"❌ Error processing question {idx} on page {page_num}: {e}")
                     #print(traceback.format_exc())
@@ -119,7 +148,9 @@ def scrape_section(start_url):
                     print("🚀 No more pages found, finishing category.")
                     break
 
-                driver.get(next_url)
+                with metrics.timer('fetch', scraper='examveda'):
+                    driver.get(next_url)
+                metrics.inc('pages_fetched_total', scraper='examveda')
                 page_num += 1
                 time.sleep(RETRY_DELAY)
             except Exception as e:
@@ -433,8 +464,13 @@ urls = [
 ]
 
 if __name__ == "__main__":
+    metrics.maybe_start_http_server()
+
     for url in urls:
         scrape_section(url)
 
-    cursor.close()
-    conn.close()
+    if _dedupe_index is not None:
+        _dedupe_index.save()
+    json_path, prom_path = metrics.export('examveda')
+    print(f"📈 Metrics written to {json_path} and {prom_path}")
+    storage.close_all()